@@ -0,0 +1,41 @@
+"""Add trigram indexes for searching aliases
+
+Revision ID: 3c7a9e2f5b1d
+Revises: 8b2e4c6d1a7f
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7a9e2f5b1d'
+down_revision = '8b2e4c6d1a7f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_email_alias_local_trgm',
+        'email_alias',
+        ['local'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'local': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_reserved_alias_local_trgm',
+        'reserved_alias',
+        ['local'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'local': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reserved_alias_local_trgm', table_name='reserved_alias')
+    op.drop_index('ix_email_alias_local_trgm', table_name='email_alias')
+    # The extension is kept, as other objects may depend on it
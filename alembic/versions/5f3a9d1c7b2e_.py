@@ -0,0 +1,31 @@
+"""Add key digests to API keys
+
+Revision ID: 5f3a9d1c7b2e
+Revises: db19ec3696ae
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f3a9d1c7b2e'
+down_revision = 'db19ec3696ae'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('api_key', sa.Column('key_digest', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_api_key_key_digest'), 'api_key', ['key_digest'], unique=True)
+    # Existing keys keep their `hashed_key` until they are used for the first time
+    op.alter_column('api_key', 'hashed_key', existing_type=sa.String(), nullable=True)
+
+
+def downgrade() -> None:
+    # Keys that only have a digest can't be verified anymore
+    op.execute('DELETE FROM api_key WHERE hashed_key IS NULL')
+    op.alter_column('api_key', 'hashed_key', existing_type=sa.String(), nullable=False)
+    op.drop_index(op.f('ix_api_key_key_digest'), table_name='api_key')
+    op.drop_column('api_key', 'key_digest')
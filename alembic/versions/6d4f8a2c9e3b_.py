@@ -0,0 +1,41 @@
+"""Add creation time to email reports
+
+Revision ID: 6d4f8a2c9e3b
+Revises: 3c7a9e2f5b1d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d4f8a2c9e3b'
+down_revision = '3c7a9e2f5b1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing reports get the time of the migration, in UTC like the model's default
+    op.add_column(
+        'email_report',
+        sa.Column(
+            'created_at',
+            sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+    )
+    op.alter_column('email_report', 'created_at', server_default=None)
+    op.create_index(
+        'ix_email_report_user_id_created_at',
+        'email_report',
+        ['user_id', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_report_user_id_created_at', table_name='email_report')
+    op.drop_column('email_report', 'created_at')
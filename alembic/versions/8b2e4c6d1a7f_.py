@@ -0,0 +1,29 @@
+"""Add index for listing aliases
+
+Revision ID: 8b2e4c6d1a7f
+Revises: 5f3a9d1c7b2e
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4c6d1a7f'
+down_revision = '5f3a9d1c7b2e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_email_alias_user_id_local_id',
+        'email_alias',
+        ['user_id', 'local', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_alias_user_id_local_id', table_name='email_alias')
@@ -0,0 +1,26 @@
+"""Add API key scope for reading the mail queue
+
+Revision ID: 9c1e5b7d3f2a
+Revises: 6d4f8a2c9e3b
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e5b7d3f2a'
+down_revision = '6d4f8a2c9e3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE apikeyscope ADD VALUE IF NOT EXISTS 'ADMIN_MAIL_QUEUE_READ'")
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE api_key SET scopes = array_remove(scopes, 'ADMIN_MAIL_QUEUE_READ')"
+    )
+    # Postgres can't remove values from enums, so the unused value is kept
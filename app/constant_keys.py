@@ -10,6 +10,7 @@ __all__ = [
     "JWT_REFRESH_SECRET_KEY",
     "VERP_SECRET",
     "IMAGE_PROXY_SECRET",
+    "API_KEY_DIGEST_SECRET",
 ]
 
 SLOW_HASH_SALT = pbkdf2_hmac(
@@ -58,3 +59,10 @@ IMAGE_PROXY_SECRET = pbkdf2_hmac(
     b"KLECKRELAY:IMAGE_PROXY_SECRET--uhevfIMUvbt8w4zh8nt7947t6698",
     life_constants.KDF_ITERATIONS
 ).hex()
+
+API_KEY_DIGEST_SECRET = pbkdf2_hmac(
+    "sha256",
+    life_constants.KLECK_SECRET.encode(),
+    b"KLECKRELAY:API_KEY_DIGEST_SECRET--Zt7qeMvH3wLkA9xuRbN2cdfp",
+    life_constants.KDF_ITERATIONS
+).hex()
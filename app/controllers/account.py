@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 
 from app import logger
+from app.controllers import alias_routing
 from app.models import User
 from app.schemas.user import UserUpdate
 
@@ -25,3 +26,5 @@ def update_account_data(
     db.add(user)
     db.commit()
     db.refresh(user)
+    # The public key might have changed
+    alias_routing.invalidate_user_alias_routes(user.id)
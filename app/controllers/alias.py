@@ -1,15 +1,16 @@
 import secrets
 import uuid
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, tuple_
+from sqlalchemy.orm import joinedload, load_only, Query, Session
 
 from app import logger
-from app.controllers import global_settings as settings
+from app.controllers import alias_routing, global_settings as settings
 from app.constants import MAX_RANDOM_ALIAS_ID_GENERATION
-from app.controllers.alias_utils import check_if_alias_exists, get_aliases_amount
+from app.database.search import get_fuzzy_distance, matches_fuzzy
+from app.controllers.alias_utils import check_if_alias_exists, get_approximate_aliases_amount
 from app.life_constants import MAIL_DOMAIN
 from app.models import User
 from app.models.alias import DeletedEmailAlias, EmailAlias
@@ -19,7 +20,9 @@ from app.utils.common import contains_word
 
 __all__ = [
     "get_alias_from_user",
+    "get_alias_for_routing",
     "find_aliases_from_user_ordered",
+    "find_aliases_from_user_after",
     "create_local_with_suffix",
     "generate_random_local_id",
     "create_alias",
@@ -30,6 +33,17 @@ __all__ = [
 ]
 
 
+# Columns required for `AliasList`
+ALIAS_LIST_COLUMNS = (
+    EmailAlias.id,
+    EmailAlias.local,
+    EmailAlias.domain,
+    EmailAlias.is_active,
+    EmailAlias.type,
+    EmailAlias.encrypted_notes,
+)
+
+
 def _calculate_id_length(db: Session, /, aliases_amount: int) -> int:
     """Calculates the required min length for a new alias."""
     length = settings.get(db, "RANDOM_EMAIL_ID_MIN_LENGTH")
@@ -71,21 +85,43 @@ def _generate_suffix(db: Session, /) -> str:
     )
 
 
-def find_aliases_from_user_ordered(
+def _get_alias_sort_columns(search: str) -> list:
+    # `id` makes the order stable for aliases with the same `local`
+    if search:
+        return [get_fuzzy_distance(EmailAlias.local, search), EmailAlias.local, EmailAlias.id]
+
+    return [EmailAlias.local, EmailAlias.id]
+
+
+def _is_alias_sort_key(sort_key: list[Any], search: str) -> bool:
+    """Whether `sort_key` has the values of `_get_alias_sort_columns(search)`.
+
+    A cursor from a listing with a search can't continue one without a search and vice versa.
+    """
+    value_types = [int, str, uuid.UUID] if search else [str, uuid.UUID]
+
+    return len(sort_key) == len(value_types) and all(
+        isinstance(value, value_type)
+        for value, value_type in zip(sort_key, value_types)
+    )
+
+
+def _filter_aliases_from_user(
     db: Session,
     /,
     user: User,
     search: str = "",
     active: Optional[bool] = None,
     alias_type: Optional[AliasType] = None,
-):
+) -> Query:
     query = db \
         .query(EmailAlias) \
-        .filter_by(user_id=user.id)
+        .filter_by(user_id=user.id) \
+        .options(load_only(*ALIAS_LIST_COLUMNS))
 
     if search:
         query = query.filter(
-            func.similarity(EmailAlias.local, search) > 0.005
+            matches_fuzzy(EmailAlias.local, search)
         )
 
     if active is not None:
@@ -94,9 +130,61 @@ def find_aliases_from_user_ordered(
     if alias_type is not None:
         query = query.filter_by(type=alias_type)
 
-    return query \
-        .order_by(func.levenshtein(EmailAlias.local, search) if search else EmailAlias.local) \
-        .all()
+    return query
+
+
+def find_aliases_from_user_ordered(
+    db: Session,
+    /,
+    user: User,
+    search: str = "",
+    active: Optional[bool] = None,
+    alias_type: Optional[AliasType] = None,
+) -> Query:
+    return _filter_aliases_from_user(
+        db,
+        user=user,
+        search=search,
+        active=active,
+        alias_type=alias_type,
+    ).order_by(*_get_alias_sort_columns(search))
+
+
+def find_aliases_from_user_after(
+    db: Session,
+    /,
+    user: User,
+    after: Optional[list[Any]],
+    limit: int,
+    search: str = "",
+    active: Optional[bool] = None,
+    alias_type: Optional[AliasType] = None,
+) -> tuple[list[EmailAlias], Optional[list[Any]]]:
+    """Keyset pagination: return up to `limit` aliases that come after the sort key `after`
+    and the sort key of the last returned alias if there are more aliases."""
+    sort_columns = _get_alias_sort_columns(search)
+    query = _filter_aliases_from_user(
+        db,
+        user=user,
+        search=search,
+        active=active,
+        alias_type=alias_type,
+    ).add_columns(*sort_columns)
+
+    if after:
+        if not _is_alias_sort_key(after, search):
+            raise HTTPException(status_code=400, detail="Cursor does not match the query.")
+
+        query = query.filter(tuple_(*sort_columns) > tuple_(*after))
+
+    rows = query.order_by(*sort_columns).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return [row[0] for row in rows], None
+
+    rows = rows[:limit]
+
+    return [row[0] for row in rows], list(rows[-1][1:])
 
 
 def get_alias_from_user(db: Session, /, user: User, id: uuid.UUID) -> EmailAlias:
@@ -120,11 +208,24 @@ def get_alias_by_local_and_domain(db: Session, /, local: str, domain: str) -> Em
         .one()
 
 
+def get_alias_for_routing(db: Session, /, local: str, domain: str) -> EmailAlias:
+    """Like `get_alias_by_local_and_domain`, but loads the user, its email and its preferences
+    in the same query, as forwarding a mail requires all of them."""
+    return db \
+        .query(EmailAlias) \
+        .options(
+            joinedload(EmailAlias.user).joinedload(User.email),
+            joinedload(EmailAlias.user).joinedload(User.preferences),
+        ) \
+        .filter(and_(EmailAlias.local == local, EmailAlias.domain == domain)) \
+        .one()
+
+
 def generate_random_local_id(db: Session, /, domain: str = None) -> str:
     domain = domain or settings.get(db, "MAIL_DOMAIN")
 
     generation_round = 1
-    amount = get_aliases_amount(db, domain=domain)
+    amount = get_approximate_aliases_amount(db, domain=domain)
     length = _calculate_id_length(db, aliases_amount=amount)
 
     logger.info("Generate random local id -> Creating id...")
@@ -193,6 +294,8 @@ def create_alias(db: Session, /, data: AliasCreate, user: User) -> EmailAlias:
     db.add(alias)
     db.commit()
     db.refresh(alias)
+    # The address might have been cached as unknown
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
     logger.info("Request: Create Alias -> Instance saved successfully.")
 
     return alias
@@ -208,6 +311,7 @@ def update_alias(db: Session, /, alias: EmailAlias, data: AliasUpdate) -> None:
     db.add(alias)
     db.commit()
     db.refresh(alias)
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
 
     logger.info(f"Request: Update Alias -> Alias {alias.id} saved successfully.")
 
@@ -230,5 +334,6 @@ def delete_alias(db: Session, /, alias: EmailAlias) -> None:
 
     db.delete(alias)
     db.commit()
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
 
     logger.info(f"Request: Delete Alias -> Alias {alias.id} deleted successfully.")
@@ -0,0 +1,170 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from app import life_constants
+# Imported as modules, as they invalidate routes themselves
+from app.controllers import alias as alias_controller, reserved_alias as reserved_alias_controller
+from app.models import EffectivePreferences, EmailAlias, ReservedAlias
+
+__all__ = [
+    "AliasRoute",
+    "ReservedAliasRoute",
+    "resolve_alias_route",
+    "invalidate_alias_route",
+    "invalidate_user_alias_routes",
+]
+
+MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True)
+class AliasRoute:
+    """Everything required to forward a mail to an alias, resolved once."""
+    id: uuid.UUID
+    local: str
+    domain: str
+    is_active: bool
+    user_id: uuid.UUID
+    # Where mails to the alias are forwarded to
+    target_address: str
+    public_key: Optional[str]
+    preferences: EffectivePreferences
+
+    @property
+    def address(self) -> str:
+        return f"{self.local}@{self.domain}"
+
+    def create_outside_email(self, email: str) -> str:
+        return f"{email.replace('@', '_at_')}_{self.address}"
+
+
+@dataclass(frozen=True)
+class ReservedAliasRoute:
+    id: uuid.UUID
+    local: str
+    domain: str
+    is_active: bool
+    target_addresses: tuple[str, ...]
+
+    @property
+    def address(self) -> str:
+        return f"{self.local}@{self.domain}"
+
+    def create_outside_email(self, email: str) -> str:
+        return f"{email.replace('@', '_at_')}_{self.address}"
+
+
+Route = Union[AliasRoute, ReservedAliasRoute, None]
+
+# Unknown recipients are not cached. They are rejected permanently, and other processes can't
+# invalidate this cache once an alias has been created for them.
+_entries: dict[tuple[str, str], tuple[Route, float]] = {}
+_lock = threading.Lock()
+
+
+def _create_alias_route(alias: EmailAlias) -> AliasRoute:
+    return AliasRoute(
+        id=alias.id,
+        local=alias.local,
+        domain=alias.domain,
+        is_active=alias.is_active,
+        user_id=alias.user.id,
+        target_address=alias.user.email.address,
+        public_key=alias.user.public_key,
+        preferences=alias.get_effective_preferences(),
+    )
+
+
+def _create_reserved_alias_route(alias: ReservedAlias) -> ReservedAliasRoute:
+    return ReservedAliasRoute(
+        id=alias.id,
+        local=alias.local,
+        domain=alias.domain,
+        is_active=alias.is_active,
+        target_addresses=tuple(user.email.address for user in alias.users),
+    )
+
+
+def _find_route(db: Session, /, local: str, domain: str) -> Route:
+    try:
+        alias = alias_controller.get_alias_for_routing(db, local=local, domain=domain)
+        return _create_alias_route(alias)
+    except NoResultFound:
+        pass
+
+    reserved_alias = reserved_alias_controller.get_reserved_alias_by_address(
+        db,
+        local=local,
+        domain=domain,
+    )
+
+    if reserved_alias is None:
+        return None
+
+    return _create_reserved_alias_route(reserved_alias)
+
+
+def _get_cached_route(key: tuple[str, str]) -> Route:
+    with _lock:
+        entry = _entries.get(key)
+
+    if entry is None:
+        return None
+
+    route, expires_at = entry
+
+    if time.monotonic() >= expires_at:
+        return None
+
+    return route
+
+
+def _cache_route(key: tuple[str, str], route: Route) -> None:
+    now = time.monotonic()
+
+    with _lock:
+        if len(_entries) >= MAX_ENTRIES:
+            for cached_key, (_, expires_at) in list(_entries.items()):
+                if now >= expires_at:
+                    del _entries[cached_key]
+
+            if len(_entries) >= MAX_ENTRIES:
+                _entries.clear()
+
+        _entries[key] = (route, now + life_constants.ALIAS_ROUTING_CACHE_TTL_IN_SECONDS)
+
+
+def resolve_alias_route(db: Session, /, local: str, domain: str) -> Route:
+    """Find the alias or reserved alias for an address. Returns `None` if there is none."""
+    key = (local, domain)
+
+    if (route := _get_cached_route(key)) is None:
+        route = _find_route(db, local=local, domain=domain)
+
+        if route is not None:
+            _cache_route(key, route)
+
+    return route
+
+
+def invalidate_alias_route(local: str, domain: str) -> None:
+    with _lock:
+        _entries.pop((local, domain), None)
+
+
+def invalidate_user_alias_routes(user_id: uuid.UUID) -> None:
+    """Invalidate all routes that forward to the user, e.g. after its preferences changed.
+
+    Reserved alias routes are invalidated as well, as there are only a few of them.
+    """
+    with _lock:
+        for key, (route, _) in list(_entries.items()):
+            if isinstance(route, ReservedAliasRoute) \
+                    or (isinstance(route, AliasRoute) and route.user_id == user_id):
+                del _entries[key]
@@ -1,31 +1,49 @@
+import time
+
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
+from app import life_constants
 from app.models import ReservedAlias
 from app.models.alias import DeletedEmailAlias, EmailAlias
 
 __all__ = [
     "get_aliases_amount",
+    "get_approximate_aliases_amount",
     "check_if_alias_exists",
 ]
 
+# Amount of aliases and the time it expires by domain
+_cached_amounts: dict[str, tuple[int, float]] = {}
+
 
 def get_aliases_amount(db: Session, /, domain: str) -> int:
     return db.query(EmailAlias).filter_by(domain=domain).count() + \
            db.query(ReservedAlias).filter_by(domain=domain).count()
 
 
+def get_approximate_aliases_amount(db: Session, /, domain: str) -> int:
+    """Like `get_aliases_amount`, but only counts once per `ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS`.
+
+    Good enough to calculate the length of new aliases, as collisions are retried anyway.
+    """
+    amount, expires_at = _cached_amounts.get(domain, (0, 0.0))
+
+    if time.monotonic() >= expires_at:
+        amount = get_aliases_amount(db, domain=domain)
+        _cached_amounts[domain] = (
+            amount,
+            time.monotonic() + life_constants.ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS,
+        )
+
+    return amount
+
+
 def check_if_alias_exists(db: Session, /, local: str, domain: str) -> bool:
-    return \
-        db.query(db
-                 .query(EmailAlias)
-                 .filter_by(domain=domain)
-                 .filter_by(local=local)
-                 .exists()
-                 ).scalar() or \
-        db.query(db
-                 .query(ReservedAlias)
-                 .filter_by(domain=domain)
-                 .filter_by(local=local)
-                 .exists()
-                 ).scalar() or \
-        db.query(db.query(DeletedEmailAlias).filter_by(email=f"{local}@{domain}").exists()).scalar()
+    return db.query(
+        or_(
+            db.query(EmailAlias).filter_by(domain=domain, local=local).exists(),
+            db.query(ReservedAlias).filter_by(domain=domain, local=local).exists(),
+            db.query(DeletedEmailAlias).filter_by(email=f"{local}@{domain}").exists(),
+        )
+    ).scalar()
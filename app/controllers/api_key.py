@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 import secrets
 import uuid
 from datetime import datetime
@@ -5,10 +7,11 @@ from typing import Optional
 
 from sqlalchemy.orm import Session
 
-from app import life_constants
+from app import life_constants, logger
+from app.constant_keys import API_KEY_DIGEST_SECRET
 from app.models import APIKey, User
 from app.schemas.api_key import APIKeyCreateModel
-from app.utils.hashes import hash_fast, verify_fast_hash
+from app.utils.hashes import verify_fast_hash
 
 __all__ = [
     "create_api_key",
@@ -18,7 +21,6 @@ __all__ = [
     "delete_expired_api_keys",
 ]
 
-
 def _generate_key() -> str:
     return "".join(
         secrets.choice(life_constants.API_KEY_CHARS)
@@ -26,6 +28,10 @@ def _generate_key() -> str:
     )
 
 
+def _create_key_digest(key: str) -> str:
+    return hmac.new(API_KEY_DIGEST_SECRET.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
 def create_api_key(
     db: Session,
     /,
@@ -38,7 +44,7 @@ def create_api_key(
         scopes=data.scopes,
         expires_at=data.expires_at,
         label=data.label,
-        hashed_key=hash_fast(key),
+        key_digest=_create_key_digest(key),
     )
 
     db.add(api_key_instance)
@@ -48,16 +54,52 @@ def create_api_key(
     return api_key_instance, key
 
 
+def _find_legacy_api_key(db: Session, /, key: str, key_digest: str) -> Optional[APIKey]:
+    # No keys without a digest are created anymore, so this only runs until the last of them
+    # has expired (at most `API_KEY_MAX_DAYS` after the migration) or has been migrated
+    legacy_keys = db.query(APIKey.id, APIKey.hashed_key).filter(
+        APIKey.key_digest.is_(None),
+        APIKey.hashed_key.isnot(None),
+        APIKey.expires_at > datetime.utcnow(),
+    ).all()
+
+    api_key_id = next(
+        (id for id, hashed_key in legacy_keys if verify_fast_hash(hashed_key, key)),
+        None,
+    )
+
+    if api_key_id is None:
+        return None
+
+    logger.info(f"API Key -> Migrating legacy API key {api_key_id} to a key digest.")
+
+    api_key = db.query(APIKey).filter_by(id=api_key_id).one()
+    api_key.key_digest = key_digest
+    api_key.hashed_key = None
+
+    db.add(api_key)
+    db.commit()
+    db.refresh(api_key)
+
+    return api_key
+
+
 def find_api_key(
     db: Session,
     key: str
 ) -> Optional[APIKey]:
-    # Does someone have a better way to do this?
-    all_keys = db.query(APIKey).filter(APIKey.expires_at > datetime.utcnow())
+    key_digest = _create_key_digest(key)
+
+    api_key = db.query(APIKey).filter(
+        APIKey.key_digest == key_digest,
+        APIKey.expires_at > datetime.utcnow(),
+    ).one_or_none()
+
+    if api_key is not None:
+        return api_key
 
-    for api_key in all_keys:
-        if verify_fast_hash(api_key.hashed_key, key):
-            return api_key
+    # Keys created before digests existed are migrated the first time they are used
+    return _find_legacy_api_key(db, key=key, key_digest=key_digest)
 
 
 def get_api_key_from_user_by_id(
@@ -9,7 +9,6 @@ from .admin import get_admin_users
 from app.cron_report_builder import CronReportBuilder
 from app.models import CronReport, CronReportData
 from .. import life_constants
-from ..gpg_handler import sign_message
 
 __all__ = [
     "create_cron_report",
@@ -35,14 +34,12 @@ def create_cron_report(
     report_data.id = report.id
 
     for user in admins:
-        encrypted_content = str(sign_message(
-            user.encrypt(
-                json.dumps(
-                    report_data,
-                    cls=DataclassJSONEncoder
-                ),
-            )
-        ))
+        encrypted_content = user.encrypt_and_sign(
+            json.dumps(
+                report_data,
+                cls=DataclassJSONEncoder
+            ),
+        )
         data = CronReportData(
             encrypted_report=encrypted_content,
             user_id=user.id,
@@ -1,51 +1,247 @@
 import json
+import os
+import time
 import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, Query, Session
 
+from app import life_constants, logger
+from app.constants import ROOT_DIR
 from app.email_report_data import EmailReportData
-from app.gpg_handler import sign_message
+from app.gpg_handler import encrypt_and_sign_message
 from app.models import EmailReport, User
 
 from email_utils.utils import DataclassJSONEncoder
 
 __all__ = [
-    "create_email_report",
+    "find_reports_from_user_ordered",
+    "find_reports_from_user_before",
+    "queue_email_report",
+    "flush_email_reports",
+    "recover_email_reports",
     "get_report_from_user_by_id",
     "delete_report",
 ]
 
+# Queued reports are kept on disk until they have been created, so that they survive crashes
+# of the email handler once the spool has completed their mail:
+#   <time queued in ms>-<report id>.json
+# They are encrypted before they are queued, so that no details of mails are stored in
+# plaintext, even while the database is unavailable.
+# Reports that are being created are kept in a folder named after the pid of the process
+# creating them, like spool entries.
+PENDING_REPORTS_PATH = ROOT_DIR / "storage" / "email-reports"
 
-def create_email_report(
+
+def find_reports_from_user_ordered(db: Session, /, user: User) -> Query:
+    """Newest reports first."""
+    return db \
+        .query(EmailReport) \
+        .filter_by(user_id=user.id) \
+        .order_by(EmailReport.created_at.desc(), EmailReport.id.desc())
+
+
+def find_reports_from_user_before(
     db: Session,
     /,
-    report_data: EmailReportData,
-    user: User
-) -> EmailReport:
-    report = EmailReport(
-        user_id=user.id,
-        encrypted_content="",
-    )
-
-    db.add(report)
-    db.commit()
-    db.refresh(report)
-
-    report_data.report_id = report.id
-    report.encrypted_content = str(sign_message(
-        user.encrypt(
-            json.dumps(
-                report_data,
-                cls=DataclassJSONEncoder
-            ),
+    user: User,
+    before: Optional[list[Any]],
+    limit: int,
+) -> tuple[list[EmailReport], Optional[list[Any]]]:
+    """Keyset pagination: return up to `limit` reports that are older than the sort key
+    `before` and the sort key of the last returned report if there are more reports.
+
+    The content of the reports is only loaded when it's accessed."""
+    query = find_reports_from_user_ordered(db, user=user) \
+        .options(defer(EmailReport.encrypted_content))
+
+    if before:
+        query = query.filter(
+            tuple_(EmailReport.created_at, EmailReport.id) < tuple_(*before)
         )
+
+    reports = query.limit(limit + 1).all()
+
+    if len(reports) <= limit:
+        return reports, None
+
+    reports = reports[:limit]
+
+    return reports, [reports[-1].created_at, reports[-1].id]
+
+
+def _get_folder(pid: Optional[int] = None) -> Path:
+    folder = PENDING_REPORTS_PATH if pid is None else PENDING_REPORTS_PATH / str(pid)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    return folder
+
+
+def queue_email_report(
+    report_data: EmailReportData,
+    user_id: uuid.UUID,
+    public_key: str,
+) -> None:
+    """Create the report later on, so that the mail doesn't have to wait for the database.
+
+    Queued reports are kept on disk until `flush_email_reports` is called.
+    """
+    report_data.report_id = uuid.uuid4()
+    created_at = datetime.utcnow()
+    encrypted_content = str(encrypt_and_sign_message(
+        json.dumps(report_data, cls=DataclassJSONEncoder),
+        public_key,
     ))
 
-    db.add(report)
-    db.commit()
-    db.refresh(report)
+    folder = _get_folder()
+    path = folder / f"{int(time.time() * 1000):015d}-{report_data.report_id}.json"
+    temporary_file = folder / f".{report_data.report_id}.tmp"
+
+    temporary_file.write_text(json.dumps({
+        "id": str(report_data.report_id),
+        "user_id": str(user_id),
+        "created_at": created_at.isoformat(),
+        "encrypted_content": encrypted_content,
+    }))
+    # Replacing is atomic, so flushes never see partially written reports
+    os.replace(temporary_file, path)
+
+
+def recover_email_reports(pid: Optional[int] = None) -> int:
+    """Put back reports that were being created when the email handler stopped.
+
+    If `pid` is given, only the reports of that process are put back. It must not be running
+    anymore.
+
+    Returns the amount of recovered reports.
+    """
+    pattern = "*/*.json" if pid is None else f"{pid}/*.json"
+    count = 0
+
+    for path in _get_folder().glob(pattern):
+        os.replace(path, _get_folder() / path.name)
+        count += 1
+
+    return count
+
+
+def _drop_excess_reports(paths: list[Path]) -> list[Path]:
+    excess_amount = len(paths) - life_constants.EMAIL_REPORT_MAX_PENDING
+
+    if excess_amount <= 0:
+        return paths
+
+    # The oldest reports are dropped, as they are the least interesting ones
+    for path in paths[:excess_amount]:
+        logger.warning(f"Email Report -> Too many reports are queued. Dropping {path.name}.")
+        path.unlink(missing_ok=True)
+
+    return paths[excess_amount:]
+
+
+def _claim_reports(limit: int) -> list[Path]:
+    claimed_folder = _get_folder(os.getpid())
+    paths = _drop_excess_reports(sorted(_get_folder().glob("*.json")))
+    claimed_paths = []
+
+    for path in paths[:limit]:
+        claimed_path = claimed_folder / path.name
+
+        try:
+            os.replace(path, claimed_path)
+        except FileNotFoundError:
+            # Claimed by another process
+            continue
+
+        claimed_paths.append(claimed_path)
+
+    return claimed_paths
+
+
+def _build_report_row(path: Path) -> dict[str, Any]:
+    report = json.loads(path.read_text())
+
+    return {
+        "id": uuid.UUID(report["id"]),
+        "user_id": uuid.UUID(report["user_id"]),
+        "created_at": datetime.fromisoformat(report["created_at"]),
+        "encrypted_content": report["encrypted_content"],
+    }
+
+
+def _insert_rows_separately(db: Session, /, rows: list[dict[str, Any]]) -> int:
+    """Insert `rows` one by one, dropping those that can't be inserted, e.g. because their user
+    has been deleted in the meantime.
+
+    Returns the amount of inserted rows.
+    """
+    inserted_amount = 0
+
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(EmailReport).values(row).on_conflict_do_nothing())
+        except IntegrityError as error:
+            logger.warning(
+                f"Email Report -> Could not insert report {row['id']}: {error}. Dropping it."
+            )
+            continue
+
+        inserted_amount += 1
+
+    return inserted_amount
+
+
+def flush_email_reports(db: Session, /) -> int:
+    """Insert all queued reports with one `INSERT` per batch.
+
+    Returns the amount of created reports.
+    """
+    created_amount = 0
+
+    while paths := _claim_reports(life_constants.EMAIL_REPORT_BATCH_SIZE):
+        rows = []
+
+        for path in paths:
+            try:
+                rows.append(_build_report_row(path))
+            except Exception as error:
+                logger.warning(
+                    f"Email Report -> Could not read report {path.name}: {error}. Dropping it."
+                )
+                path.unlink(missing_ok=True)
+
+        try:
+            if rows:
+                # Reports that have been created before a crash are put back and created again
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(EmailReport).values(rows).on_conflict_do_nothing())
+
+                    inserted_amount = len(rows)
+                except IntegrityError:
+                    inserted_amount = _insert_rows_separately(db, rows)
+
+                db.commit()
+                created_amount += inserted_amount
+        except Exception:
+            logger.warning("Email Report -> Could not insert reports. Retrying later.")
+
+            db.rollback()
+            recover_email_reports(os.getpid())
+
+            raise
+
+        for path in paths:
+            path.unlink(missing_ok=True)
 
-    return report
+    return created_amount
 
 
 def get_report_from_user_by_id(db: Session, user: User, id: uuid.UUID) -> EmailReport:
@@ -1,3 +1,6 @@
+import time
+from typing import Any, Optional
+
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
@@ -11,7 +14,8 @@ __all__ = [
     "get_settings",
     "get_settings_model",
     "get",
-    "update_settings"
+    "update_settings",
+    "invalidate_cache",
 ]
 
 
@@ -27,6 +31,10 @@ def _get_changeable_constants() -> list[str]:
 
 SETTINGS_FIELDS = _get_changeable_constants()
 
+# Values of the settings row by field, so that `get` doesn't query the database on every call
+_cached_values: Optional[dict[str, Any]] = None
+_cache_expires_at = 0.0
+
 
 def _create_settings(db: Session, /) -> GlobalSettings:
     settings = GlobalSettings(
@@ -60,17 +68,38 @@ def get_settings_model(db: Session, /) -> GlobalSettingsModel:
     )
 
 
+def invalidate_cache() -> None:
+    global _cached_values
+
+    _cached_values = None
+
+
+def _read_values(db: Session, /) -> dict[str, Any]:
+    settings = get_settings(db)
+
+    return {
+        field: getattr(settings, field.lower())
+        for field in SETTINGS_FIELDS
+    }
+
+
+def _get_values(db: Session, /) -> dict[str, Any]:
+    global _cached_values, _cache_expires_at
+
+    if _cached_values is None or time.monotonic() >= _cache_expires_at:
+        _cached_values = _read_values(db)
+        _cache_expires_at = time.monotonic() + life_constants.GLOBAL_SETTINGS_CACHE_TTL_IN_SECONDS
+
+    return _cached_values
+
+
 def get(db: Session, /, field: str):
     default_value = getattr(life_constants, field)
 
     if not life_constants.USE_GLOBAL_SETTINGS or field not in SETTINGS_FIELDS:
         return default_value
 
-    settings = get_settings(db)
-
-    settings_field_name = field.lower()
-
-    if (value := getattr(settings, settings_field_name)) is not None:
+    if (value := _get_values(db)[field]) is not None:
         return value
 
     return default_value
@@ -87,4 +116,6 @@ def update_settings(db: Session, /, update: SettingsModel) -> GlobalSettings:
     db.commit()
     db.refresh(settings)
 
+    invalidate_cache()
+
     return settings
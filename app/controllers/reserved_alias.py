@@ -2,11 +2,12 @@ import uuid
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import func
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
 from app import logger
+from app.controllers import alias_routing
+from app.database.search import get_fuzzy_distance, matches_fuzzy
 from app.life_constants import MAIL_DOMAIN
 from app.models import ReservedAlias, User
 from app.models.reserved_alias import ReservedAliasUser as ReservedAliasUserModel
@@ -58,12 +59,15 @@ def find_reserved_aliases_ordered(db: Session, /, search: str = "") -> list[Rese
     if search:
         logger.info(f"Find reserved aliases ordered -> Filtering by {search=}.")
         query = query.filter(
-            func.similarity(ReservedAlias.local, search) > 0.005
+            matches_fuzzy(ReservedAlias.local, search)
         )
 
     logger.info(f"Find reserved aliases ordered -> Success!.")
     return query\
-        .order_by(func.levenshtein(ReservedAlias.local, search) if search else ReservedAlias.local) \
+        .order_by(
+            get_fuzzy_distance(ReservedAlias.local, search) if search else ReservedAlias.local,
+            ReservedAlias.local,
+        ) \
         .all()
 
 
@@ -97,6 +101,8 @@ def create_reserved_alias(db: Session, /, data: ReservedAliasCreate) -> Reserved
     db.add_all(alias_user)
     db.commit()
     db.refresh(alias)
+    # The address might have been cached as unknown
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
 
     logger.info(f"Request: Create Reserved Alias -> Success! Returning alias back.")
     return alias
@@ -136,6 +142,8 @@ def update_reserved_alias(
         db.commit()
         db.refresh(alias)
 
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
+
     logger.info(f"Request: Update Reserved Alias -> Success!")
     return alias
 
@@ -153,6 +161,7 @@ def delete_reserved_alias(db: Session, /, alias: ReservedAlias) -> None:
 
     logger.info(f"Request: Delete Alias -> Committing to database.")
     db.commit()
+    alias_routing.invalidate_alias_route(alias.local, alias.domain)
 
     logger.info(f"Request: Delete Alias -> Success!")
 
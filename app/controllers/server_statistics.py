@@ -1,9 +1,13 @@
+import threading
+import time
+from collections import Counter
 from typing import Optional
 
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
-from app.controllers import global_settings as settings
 
+from app import life_constants, logger
+from app.controllers import global_settings as settings
 from app.models import ServerStatistics
 
 __all__ = [
@@ -11,9 +15,17 @@ __all__ = [
     "add_sent_email",
     "add_expanded_urls",
     "add_proxied_images",
-    "add_removed_trackers"
+    "add_removed_trackers",
+    "flush",
+    "flush_if_due",
 ]
 
+# Increments are buffered per process and written with a single atomic `UPDATE` on flush, so
+# concurrent workers neither lose updates nor wait for each other on the statistics row
+_pending_amounts: Counter[str] = Counter()
+_pending_lock = threading.Lock()
+_last_flush_at = time.monotonic()
+
 
 def _create_statistics(db: Session, /) -> ServerStatistics:
     statistics = ServerStatistics()
@@ -35,53 +47,65 @@ def get_server_statistics(db: Session, /) -> Optional[ServerStatistics]:
         return _create_statistics(db)
 
 
-def add_sent_email(db: Session, /) -> None:
-    statistics = get_server_statistics(db)
+def flush(db: Session, /) -> None:
+    """Write all buffered increments to the database."""
+    global _last_flush_at
 
-    if statistics is None:
-        return
+    with _pending_lock:
+        amounts = +_pending_amounts
+        _pending_amounts.clear()
+        _last_flush_at = time.monotonic()
 
-    statistics.sent_emails_amount += 1
+    if not amounts:
+        return
 
-    db.add(statistics)
-    db.commit()
-    db.refresh(statistics)
+    try:
+        if get_server_statistics(db) is None:
+            return
 
+        db.query(ServerStatistics).update(
+            {
+                getattr(ServerStatistics, field): getattr(ServerStatistics, field) + amount
+                for field, amount in amounts.items()
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    except Exception:
+        logger.warning("Server Statistics -> Could not flush statistics. Retrying later.")
 
-def add_proxied_images(db: Session, /, amount: int) -> None:
-    statistics = get_server_statistics(db)
+        db.rollback()
 
-    if statistics is None:
-        return
+        with _pending_lock:
+            _pending_amounts.update(amounts)
 
-    statistics.proxied_images_amount += amount
+        raise
 
-    db.add(statistics)
-    db.commit()
-    db.refresh(statistics)
 
+def flush_if_due(db: Session, /) -> None:
+    if time.monotonic() - _last_flush_at >= life_constants.STATISTICS_FLUSH_INTERVAL_IN_SECONDS:
+        flush(db)
 
-def add_expanded_urls(db: Session, /, amount: int) -> None:
-    statistics = get_server_statistics(db)
 
-    if statistics is None:
+def _add(db: Session, /, field: str, amount: int) -> None:
+    if amount <= 0 or not settings.get(db, "ALLOW_STATISTICS"):
         return
 
-    statistics.expanded_urls_amount += amount
+    with _pending_lock:
+        _pending_amounts[field] += amount
 
-    db.add(statistics)
-    db.commit()
-    db.refresh(statistics)
 
+def add_sent_email(db: Session, /) -> None:
+    _add(db, "sent_emails_amount", 1)
 
-def add_removed_trackers(db: Session, /, amount: int) -> None:
-    statistics = get_server_statistics(db)
 
-    if statistics is None:
-        return
+def add_proxied_images(db: Session, /, amount: int) -> None:
+    _add(db, "proxied_images_amount", amount)
 
-    statistics.trackers_removed_amount += amount
 
-    db.add(statistics)
-    db.commit()
-    db.refresh(statistics)
+def add_expanded_urls(db: Session, /, amount: int) -> None:
+    _add(db, "expanded_urls_amount", amount)
+
+
+def add_removed_trackers(db: Session, /, amount: int) -> None:
+    _add(db, "trackers_removed_amount", amount)
@@ -3,8 +3,9 @@ from datetime import datetime, timedelta
 
 from sqlalchemy import and_
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import joinedload, Session
 
+from app.controllers import alias_routing
 from app.controllers.email import create_email, get_email_by_address
 from app.controllers.user_preferences import create_user_preferences
 from app.logger import logger
@@ -20,6 +21,7 @@ __all__ = [
     "get_user_by_email",
     "create_user",
     "get_user_by_id",
+    "get_user_for_auth_by_id",
     "delete_non_verified_users",
     "delete_user"
 ]
@@ -70,6 +72,15 @@ def get_user_by_id(db: Session, /, user_id: uuid.UUID) -> User:
     return db.query(User).filter_by(id=user_id).one()
 
 
+def get_user_for_auth_by_id(db: Session, /, user_id: uuid.UUID) -> User:
+    """Also loads the email and OTP that authentication checks, in the same query."""
+    return db \
+        .query(User) \
+        .options(joinedload(User.email), joinedload(User.otp)) \
+        .filter_by(id=user_id) \
+        .one()
+
+
 def delete_non_verified_users(db: Session, /) -> int:
     lifetime = get(db, "NON_VERIFIED_USER_LIFE_TIME_IN_DAYS")
 
@@ -96,5 +107,8 @@ def delete_user(
     /,
     user: User,
 ) -> None:
+    user_id = user.id
+
     db.delete(user)
     db.commit()
+    alias_routing.invalidate_user_alias_routes(user_id)
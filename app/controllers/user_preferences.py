@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 
 from app import logger
+from app.controllers import alias_routing
 from app.models import EmailAlias, UserPreferences
 from app.schemas.user_preferences import UserPreferencesUpdate
 
@@ -39,6 +40,7 @@ def update_user_preferences(
     db.add(user.preferences)
     db.commit()
     db.refresh(user.preferences)
+    alias_routing.invalidate_user_alias_routes(user.id)
 
     if update_all:
         update_fields = {
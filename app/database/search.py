@@ -0,0 +1,43 @@
+from sqlalchemy import cast, Integer
+from sqlalchemy.sql.elements import ColumnElement
+
+__all__ = [
+    "matches_fuzzy",
+    "get_fuzzy_distance",
+]
+
+
+# Both use `pg_trgm` operators that can be answered by a trigram index on `column`. Word
+# similarity is used instead of plain similarity, as while typing `search` is usually only a
+# part of `column`.
+
+# Shorter searches have too few trigrams to ever reach the word similarity threshold
+_MIN_FUZZY_SEARCH_LENGTH = 3
+
+
+def _escape_like(search: str) -> str:
+    return search \
+        .replace("\\", "\\\\") \
+        .replace("%", "\\%") \
+        .replace("_", "\\_")
+
+
+def matches_fuzzy(column: ColumnElement, search: str) -> ColumnElement:
+    """Whether `search` is similar to a part of `column`.
+
+    Uses `pg_trgm.word_similarity_threshold`; 0.6 by default. Searches shorter than three
+    characters match any `column` containing them instead.
+    """
+    if len(search) < _MIN_FUZZY_SEARCH_LENGTH:
+        return column.ilike(f"%{_escape_like(search)}%", escape="\\")
+
+    return column.op("%>")(search)
+
+
+def get_fuzzy_distance(column: ColumnElement, search: str) -> ColumnElement:
+    """The word distance between `search` and `column` from 0 (equal) to 1000 (unrelated).
+
+    Scaled to an integer so that it can be compared again after being passed around, e.g. in a
+    pagination cursor.
+    """
+    return cast(column.op("<->>")(search) * 1000, Integer)
@@ -15,16 +15,28 @@ MAIL_DOMAIN = "mail.kleckrelay.com"
 APP_DOMAIN = "app.kleckrelay.com"
 RANDOM_EMAIL_ID_MIN_LENGTH = 6
 RANDOM_EMAIL_ID_CHARS = string.ascii_letters + string.digits
+# Random aliases containing a word of this list will be regenerated
+ALIAS_WORD_LIST_PATH = "/usr/share/dict/words"
+# Shorter words are too common to be avoided
+ALIAS_WORD_MIN_LENGTH = 4
+ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS = 60
 RANDOM_EMAIL_LENGTH_INCREASE_ON_PERCENTAGE = 0.0005  # 0.05%
 CUSTOM_EMAIL_SUFFIX_LENGTH = 4
 CUSTOM_EMAIL_SUFFIX_CHARS = string.digits
 POSTFIX_HOST = "127.0.0.1"
 POSTFIX_PORT = 25
 POSTFIX_USE_TLS = "True"
+POSTFIX_POOL_SIZE = 4
+# Postfix closes idle connections after 300 seconds by default
+POSTFIX_POOL_MAX_IDLE_TIME_IN_SECONDS = 60
 DEBUG_MAILS = "False"
 IMAGE_PROXY_TIMEOUT_IN_SECONDS = 8
 IMAGE_PROXY_STORAGE_LIFE_TIME_IN_HOURS = 24
 IMAGE_PROXY_STORAGE_PATH = "./storage/image_proxy/images"
+IMAGE_PROXY_STORAGE_FRESHNESS_IN_HOURS = 6
+IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS = 16
+IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL = 6
+IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS = 20
 ENABLE_IMAGE_PROXY = "True"
 ENABLE_IMAGE_PROXY_STORAGE = "True"
 USER_EMAIL_ENABLE_DISPOSABLE_EMAILS = "False"
@@ -99,9 +111,15 @@ SERVER_PRIVATE_KEY = \
 "4WUllcE91QW94OUhiWDUKPWd3d0EKLS0tLS1FTkQgUEdQIFBSSVZBVEUgS0VZIEJMT0NLLS0tLS0K"""
 EMAIL_RESEND_WAIT_TIME_IN_SECONDS = 60
 ALLOW_STATISTICS = "True"
+STATISTICS_FLUSH_INTERVAL_IN_SECONDS = 10
+EMAIL_REPORT_FLUSH_INTERVAL_IN_SECONDS = 2
+EMAIL_REPORT_BATCH_SIZE = 100
+EMAIL_REPORT_MAX_PENDING = 10_000
 DKIM_PRIVATE_KEY = ""
 ADMINS = ""
 USE_GLOBAL_SETTINGS = "True"
+# Other processes will see changed global settings after at most this time
+GLOBAL_SETTINGS_CACHE_TTL_IN_SECONDS = 10
 ALLOW_LOGS = "True"
 ALLOW_ALIAS_DELETION = "False"
 MAX_ALIASES_PER_USER = "0"
@@ -117,7 +135,18 @@ RECOVERY_CODE_LENGTH = 35
 RECOVERY_CODES_AMOUNT = 5
 IMAGE_PROXY_FALLBACK_IMAGE_TYPE = "jpeg"
 IMAGE_PROXY_FALLBACK_USER_AGENT_TYPE = "firefox"
+ALIAS_ROUTING_CACHE_TTL_IN_SECONDS = 10
 EMAIL_HANDLER_HOST = "127.0.0.1"
+# 25 MiB
+EMAIL_MAX_SIZE_IN_BYTES = 26_214_400
+EMAIL_HANDLER_MAX_WORKERS = 8
+EMAIL_HANDLER_ACCEPT_WORKERS = 4
+EMAIL_HANDLER_PROCESSES = 1
+EMAIL_HANDLER_HEALTH_CHECK_TIMEOUT_IN_SECONDS = 30
+EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS = 30
+EMAIL_SPOOL_MAX_ATTEMPTS = 8
+EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS = 60
+EMAIL_SPOOL_POLL_INTERVAL_IN_SECONDS = 0.5
 # Entropy of about 214 bits
 API_KEY_CHARS = string.ascii_uppercase + string.ascii_lowercase + string.digits
 API_KEY_LENGTH = 36
@@ -13,7 +13,7 @@ from app import constants, logger
 from app.authentication.authentication_response import OTPVerificationStatus
 from app.authentication.handler import access_security
 from app.controllers.api_key import find_api_key
-from app.controllers.user import get_user_by_id
+from app.controllers.user import get_user_for_auth_by_id
 from app.database.dependencies import get_db
 from app.models import APIKey, User
 from app.models.enums.api_key import APIKeyScope
@@ -85,7 +85,7 @@ def get_auth(
                 logger.info("JWT Token found.")
 
                 try:
-                    return get_user_by_id(db, credentials["id"]), credentials
+                    return get_user_for_auth_by_id(db, credentials["id"]), credentials
                 except NoResultFound:
                     logger.info("User account not found.")
 
@@ -3,7 +3,7 @@ from math import log
 
 from . import constants, default_life_constants, life_constants, logger
 from .gpg_handler import gpg
-from .utils.common import _get_words
+from .utils.common import _get_word_filter
 
 __all__ = [
     "check_life_constants",
@@ -82,8 +82,8 @@ def check_server_private_key():
 def check_life_constants() -> None:
     validate_value_is_random_string("KLECK_SECRET")
 
-    # Cache word list
-    _get_words()
+    # Build word filter
+    _get_word_filter()
 
     logger.logger.info(
         f"Doctor: App Domain: {life_constants.API_DOMAIN}."
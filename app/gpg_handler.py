@@ -1,5 +1,6 @@
 import base64
 import sys
+from functools import lru_cache
 
 from pretty_bad_protocol import gnupg
 from pretty_bad_protocol._parsers import ImportResult
@@ -9,6 +10,7 @@ from app import life_constants
 __all__ = [
     "gpg",
     "encrypt_message",
+    "encrypt_and_sign_message",
     "SERVER_PUBLIC_KEY",
     "sign_message"
 ]
@@ -25,6 +27,8 @@ __private_key: ImportResult = gpg.import_keys(
 )
 SERVER_PUBLIC_KEY = gpg.export_keys(__private_key.fingerprints[0])
 
+PUBLIC_KEY_CACHE_SIZE = 10_000
+
 
 def sign_message(message: str) -> str:
     return gpg.sign(
@@ -34,7 +38,23 @@ def sign_message(message: str) -> str:
     )
 
 
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def _import_public_key(public_key_in_str: str) -> str:
+    """Import the key and return its fingerprint.
+
+    Imported keys stay in the keyring, so each key only needs to be imported once.
+    """
+    return gpg.import_keys(public_key_in_str).fingerprints[0]
+
+
 def encrypt_message(message: str, public_key_in_str: str) -> str:
-    public_key = gpg.import_keys(public_key_in_str)
+    return gpg.encrypt(message, _import_public_key(public_key_in_str))
 
-    return gpg.encrypt(message, public_key.fingerprints[0])
+
+def encrypt_and_sign_message(message: str, public_key_in_str: str) -> str:
+    """Encrypt the message and sign it with the server key inside the encrypted message."""
+    return gpg.encrypt(
+        message,
+        _import_public_key(public_key_in_str),
+        default_key=__private_key.fingerprints[0],
+    )
@@ -24,6 +24,9 @@ __all__ = [
     "APP_DOMAIN",
     "RANDOM_EMAIL_ID_MIN_LENGTH",
     "RANDOM_EMAIL_ID_CHARS",
+    "ALIAS_WORD_LIST_PATH",
+    "ALIAS_WORD_MIN_LENGTH",
+    "ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS",
     "RANDOM_EMAIL_LENGTH_INCREASE_ON_PERCENTAGE",
     "CUSTOM_EMAIL_SUFFIX_LENGTH",
     "CUSTOM_EMAIL_SUFFIX_CHARS",
@@ -31,10 +34,16 @@ __all__ = [
     "POSTFIX_HOST",
     "POSTFIX_PORT",
     "POSTFIX_USE_TLS",
+    "POSTFIX_POOL_SIZE",
+    "POSTFIX_POOL_MAX_IDLE_TIME_IN_SECONDS",
     "DEBUG_MAILS",
     "IMAGE_PROXY_TIMEOUT_IN_SECONDS",
     "IMAGE_PROXY_STORAGE_LIFE_TIME_IN_HOURS",
     "IMAGE_PROXY_STORAGE_PATH",
+    "IMAGE_PROXY_STORAGE_FRESHNESS_IN_HOURS",
+    "IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS",
+    "IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL",
+    "IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS",
     "ENABLE_IMAGE_PROXY",
     "ENABLE_IMAGE_PROXY_STORAGE",
     "USER_EMAIL_ENABLE_DISPOSABLE_EMAILS",
@@ -43,6 +52,10 @@ __all__ = [
     "SERVER_PRIVATE_KEY",
     "EMAIL_RESEND_WAIT_TIME_IN_SECONDS",
     "ALLOW_STATISTICS",
+    "STATISTICS_FLUSH_INTERVAL_IN_SECONDS",
+    "EMAIL_REPORT_FLUSH_INTERVAL_IN_SECONDS",
+    "EMAIL_REPORT_BATCH_SIZE",
+    "EMAIL_REPORT_MAX_PENDING",
     "ADMINS",
     "DKIM_PRIVATE_KEY",
     "USER_EMAIL_OTHER_RELAY_DOMAINS",
@@ -51,6 +64,7 @@ __all__ = [
     "ALLOW_LOGS",
     "ALLOW_ALIAS_DELETION",
     "USE_GLOBAL_SETTINGS",
+    "GLOBAL_SETTINGS_CACHE_TTL_IN_SECONDS",
     "KEEP_CRON_JOBS_AMOUNT",
     "SUPPORT_MAIL_FROM_NAME",
     "KDF_ITERATIONS",
@@ -60,7 +74,17 @@ __all__ = [
     "RECOVERY_CODE_LENGTH",
     "IMAGE_PROXY_FALLBACK_IMAGE_TYPE",
     "IMAGE_PROXY_FALLBACK_USER_AGENT_TYPE",
+    "ALIAS_ROUTING_CACHE_TTL_IN_SECONDS",
     "EMAIL_HANDLER_HOST",
+    "EMAIL_MAX_SIZE_IN_BYTES",
+    "EMAIL_HANDLER_MAX_WORKERS",
+    "EMAIL_HANDLER_ACCEPT_WORKERS",
+    "EMAIL_HANDLER_PROCESSES",
+    "EMAIL_HANDLER_HEALTH_CHECK_TIMEOUT_IN_SECONDS",
+    "EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS",
+    "EMAIL_SPOOL_MAX_ATTEMPTS",
+    "EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS",
+    "EMAIL_SPOOL_POLL_INTERVAL_IN_SECONDS",
     "RECOVERY_CODES_AMOUNT",
     "API_KEY_CHARS",
     "API_KEY_LENGTH",
@@ -139,6 +163,9 @@ MAIL_DOMAIN = get_str("MAIL_DOMAIN")
 APP_DOMAIN = get_str("APP_DOMAIN")
 RANDOM_EMAIL_ID_MIN_LENGTH = get_int("RANDOM_EMAIL_ID_MIN_LENGTH")
 RANDOM_EMAIL_ID_CHARS = get_str("RANDOM_EMAIL_ID_CHARS")
+ALIAS_WORD_LIST_PATH = get_path("ALIAS_WORD_LIST_PATH", must_exist=False)
+ALIAS_WORD_MIN_LENGTH = get_int("ALIAS_WORD_MIN_LENGTH")
+ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS = get_int("ALIASES_AMOUNT_CACHE_TTL_IN_SECONDS")
 RANDOM_EMAIL_LENGTH_INCREASE_ON_PERCENTAGE = get_float("RANDOM_EMAIL_LENGTH_INCREASE_ON_PERCENTAGE")
 CUSTOM_EMAIL_SUFFIX_LENGTH = get_int("CUSTOM_EMAIL_SUFFIX_LENGTH")
 CUSTOM_EMAIL_SUFFIX_CHARS = get_str("CUSTOM_EMAIL_SUFFIX_CHARS")
@@ -146,10 +173,24 @@ FROM_MAIL = get_str("FROM_MAIL", default=f"noreply@{MAIL_DOMAIN}")
 POSTFIX_HOST = get_str("POSTFIX_HOST")
 POSTFIX_PORT = get_int("POSTFIX_PORT")
 POSTFIX_USE_TLS = get_bool("POSTFIX_USE_TLS")
+# Maximum amount of connections to Postfix that are kept open per process
+POSTFIX_POOL_SIZE = get_int("POSTFIX_POOL_SIZE")
+POSTFIX_POOL_MAX_IDLE_TIME_IN_SECONDS = get_int("POSTFIX_POOL_MAX_IDLE_TIME_IN_SECONDS")
 DEBUG_MAILS = get_bool("DEBUG_MAILS")
 IMAGE_PROXY_TIMEOUT_IN_SECONDS = get_int("IMAGE_PROXY_TIMEOUT_IN_SECONDS")
 IMAGE_PROXY_STORAGE_LIFE_TIME_IN_HOURS = get_int("IMAGE_PROXY_STORAGE_LIFE_TIME_IN_HOURS")
 IMAGE_PROXY_STORAGE_PATH = get_str("IMAGE_PROXY_STORAGE_PATH")
+# Images downloaded within this time will be reused instead of being downloaded again
+IMAGE_PROXY_STORAGE_FRESHNESS_IN_HOURS = get_int("IMAGE_PROXY_STORAGE_FRESHNESS_IN_HOURS")
+# Limits how many images are downloaded at the same time by one process (across all mails)
+IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS = get_int("IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS")
+IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL = get_int(
+    "IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL"
+)
+# Images that could not be downloaded in this time will be proxied when the user views them
+IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS = get_int(
+    "IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS"
+)
 # This only affects new mails. Existing mails will still be able to proxy their requests.
 ENABLE_IMAGE_PROXY = get_bool("ENABLE_IMAGE_PROXY")
 ENABLE_IMAGE_PROXY_STORAGE = get_bool("ENABLE_IMAGE_PROXY_STORAGE")
@@ -161,8 +202,16 @@ GNUPG_HOME_DIR = get_path("GNUPG_HOME_DIR")
 SERVER_PRIVATE_KEY = get_str("SERVER_PRIVATE_KEY")
 EMAIL_RESEND_WAIT_TIME_IN_SECONDS = get_int("EMAIL_RESEND_WAIT_TIME_IN_SECONDS")
 ALLOW_STATISTICS = get_bool("ALLOW_STATISTICS")
+# Statistics are counted in memory and written to the database in this interval
+STATISTICS_FLUSH_INTERVAL_IN_SECONDS = get_int("STATISTICS_FLUSH_INTERVAL_IN_SECONDS")
+# Email reports are queued on disk and encrypted and inserted in batches in this interval
+EMAIL_REPORT_FLUSH_INTERVAL_IN_SECONDS = get_float("EMAIL_REPORT_FLUSH_INTERVAL_IN_SECONDS")
+EMAIL_REPORT_BATCH_SIZE = get_int("EMAIL_REPORT_BATCH_SIZE")
+# The oldest queued reports are dropped beyond this amount, e.g. while the database is down
+EMAIL_REPORT_MAX_PENDING = get_int("EMAIL_REPORT_MAX_PENDING")
 ADMINS = [value.lower() for value in get_list("ADMINS")]
 USE_GLOBAL_SETTINGS = get_bool("USE_GLOBAL_SETTINGS")
+GLOBAL_SETTINGS_CACHE_TTL_IN_SECONDS = get_int("GLOBAL_SETTINGS_CACHE_TTL_IN_SECONDS")
 DKIM_PRIVATE_KEY = get_str("DKIM_PRIVATE_KEY")
 ALLOW_LOGS = get_bool("ALLOW_LOGS")
 ALLOW_ALIAS_DELETION = get_bool("ALLOW_ALIAS_DELETION")
@@ -178,7 +227,25 @@ RECOVERY_CODE_LENGTH = get_int("RECOVERY_CODE_LENGTH")
 RECOVERY_CODES_AMOUNT = get_int("RECOVERY_CODES_AMOUNT")
 IMAGE_PROXY_FALLBACK_IMAGE_TYPE = get_str("IMAGE_PROXY_FALLBACK_IMAGE_TYPE")
 IMAGE_PROXY_FALLBACK_USER_AGENT_TYPE = get_str("IMAGE_PROXY_FALLBACK_USER_AGENT_TYPE")
+# Changes to aliases made by other processes are seen by the email handler after at most this time
+ALIAS_ROUTING_CACHE_TTL_IN_SECONDS = get_int("ALIAS_ROUTING_CACHE_TTL_IN_SECONDS")
 EMAIL_HANDLER_HOST = get_str("EMAIL_HANDLER_HOST")
+EMAIL_MAX_SIZE_IN_BYTES = get_int("EMAIL_MAX_SIZE_IN_BYTES")
+# Amount of mails that are processed at the same time
+EMAIL_HANDLER_MAX_WORKERS = get_int("EMAIL_HANDLER_MAX_WORKERS")
+# Accepting mails has its own workers, so it never waits for mails that are being processed
+EMAIL_HANDLER_ACCEPT_WORKERS = get_int("EMAIL_HANDLER_ACCEPT_WORKERS")
+# Each process has its own workers, SMTP pool and database pool
+EMAIL_HANDLER_PROCESSES = get_int("EMAIL_HANDLER_PROCESSES")
+# Processes that didn't respond for this long are restarted
+EMAIL_HANDLER_HEALTH_CHECK_TIMEOUT_IN_SECONDS = get_int(
+    "EMAIL_HANDLER_HEALTH_CHECK_TIMEOUT_IN_SECONDS"
+)
+EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS = get_int("EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS")
+EMAIL_SPOOL_MAX_ATTEMPTS = get_int("EMAIL_SPOOL_MAX_ATTEMPTS")
+# Doubled after each failed attempt
+EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS = get_int("EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS")
+EMAIL_SPOOL_POLL_INTERVAL_IN_SECONDS = get_float("EMAIL_SPOOL_POLL_INTERVAL_IN_SECONDS")
 API_KEY_CHARS = get_str("API_KEY_CHARS")
 API_KEY_LENGTH = get_int("API_KEY_LENGTH")
 API_KEY_MAX_DAYS = get_int("API_KEY_MAX_DAYS")
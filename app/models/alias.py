@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import sqlalchemy as sa
@@ -12,13 +13,45 @@ from .enums.alias import AliasType, ImageProxyFormatType, ProxyUserAgentType
 from ..mixins.model_preference import ModelPreference
 
 __all__ = [
+    "EffectivePreferences",
     "EmailAlias",
     "DeletedEmailAlias",
 ]
 
 
+@dataclass(frozen=True, slots=True)
+class EffectivePreferences:
+    """The preferences of an alias with the user's preferences filled in.
+
+    Resolving a preference walks from the alias to the user's preferences, so they are resolved
+    once and the content pipeline receives this snapshot instead of the alias.
+    """
+    remove_trackers: bool
+    create_mail_report: bool
+    proxy_images: bool
+    proxy_image_format: ImageProxyFormatType
+    proxy_user_agent: ProxyUserAgentType
+    expand_url_shorteners: bool
+    reject_on_privacy_leak: bool
+
+    @property
+    def user_agent_string(self) -> str:
+        return PROXY_USER_AGENT_STRING_MAP[self.proxy_user_agent]
+
+
 class EmailAlias(Base, IDMixin, ModelPreference):
     __tablename__ = "email_alias"
+    __table_args__ = (
+        # Listing a user's aliases is ordered by `local` and paginated by (`local`, `id`)
+        sa.Index("ix_email_alias_user_id_local_id", "user_id", "local", "id"),
+        # Searching aliases uses `pg_trgm`, see `app.database.search`
+        sa.Index(
+            "ix_email_alias_local_trgm",
+            "local",
+            postgresql_using="gin",
+            postgresql_ops={"local": "gin_trgm_ops"},
+        ),
+    )
 
     if TYPE_CHECKING:
         from .user import User
@@ -145,6 +178,17 @@ class EmailAlias(Base, IDMixin, ModelPreference):
     def reject_on_privacy_leak(self) -> bool:
         return self.get_preference_value("reject_on_privacy_leak")
 
+    def get_effective_preferences(self) -> EffectivePreferences:
+        return EffectivePreferences(
+            remove_trackers=self.remove_trackers,
+            create_mail_report=self.create_mail_report,
+            proxy_images=self.proxy_images,
+            proxy_image_format=self.proxy_image_format,
+            proxy_user_agent=self.proxy_user_agent,
+            expand_url_shorteners=self.expand_url_shorteners,
+            reject_on_privacy_leak=self.reject_on_privacy_leak,
+        )
+
 
 class DeletedEmailAlias(Base, IDMixin, CreationMixin):
     """Store all deleted alias to make sure they will not be reused, so that new owner won't
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 import sqlalchemy as sa
 from sqlalchemy import ForeignKey
@@ -25,7 +25,8 @@ class APIKey(Base, IDMixin):
         user_id: str
         user: User
         expires_at: datetime
-        hashed_key: str
+        hashed_key: Optional[str]
+        key_digest: Optional[str]
         scopes: list[APIKeyScope]
     else:
         user_id = sa.Column(
@@ -40,9 +41,17 @@ class APIKey(Base, IDMixin):
             sa.Date,
             nullable=False,
         )
+        # Only set for keys created before `key_digest` existed
         hashed_key = sa.Column(
             sa.String(len(hash_fast("1234"))),
-            nullable=False,
+            nullable=True,
+        )
+        # Keyed SHA-256 digest of the key; keys are random enough to not need a slow hash
+        key_digest = sa.Column(
+            sa.String(64),
+            nullable=True,
+            unique=True,
+            index=True,
         )
         scopes = sa.Column(
             sa.ARRAY(sa.Enum(APIKeyScope)),
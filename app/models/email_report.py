@@ -6,15 +6,19 @@ from sqlalchemy.dialects.postgresql import UUID
 
 from app import constants
 from app.database.base import Base
-from app.models import IDMixin
+from app.models import CreationMixin, IDMixin
 
 __all__ = [
     "EmailReport",
 ]
 
 
-class EmailReport(Base, IDMixin):
+class EmailReport(Base, IDMixin, CreationMixin):
     __tablename__ = "email_report"
+    __table_args__ = (
+        # Reports are listed newest first per user
+        sa.Index("ix_email_report_user_id_created_at", "user_id", "created_at"),
+    )
 
     if TYPE_CHECKING:
         from .user import User
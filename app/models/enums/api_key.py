@@ -23,6 +23,7 @@ class APIKeyScope(str, enum.Enum):
     ADMIN_CRON_REPORT_READ = "read:admin_cron_report"
     ADMIN_SETTINGS_READ = "read:admin_settings"
     ADMIN_SETTINGS_UPDATE = "update:admin_settings"
+    ADMIN_MAIL_QUEUE_READ = "read:admin_mail_queue"
 
     ADMIN_RESERVED_ALIAS_READ = "read:admin_reserved_alias"
     ADMIN_RESERVED_ALIAS_CREATE = "create:admin_reserved_alias"
@@ -26,6 +26,15 @@ class ReservedAliasUser(Base, IDMixin):
 
 class ReservedAlias(Base, IDMixin):
     __tablename__ = "reserved_alias"
+    __table_args__ = (
+        # Searching reserved aliases uses `pg_trgm`, see `app.database.search`
+        sa.Index(
+            "ix_reserved_alias_local_trgm",
+            "local",
+            postgresql_using="gin",
+            postgresql_ops={"local": "gin_trgm_ops"},
+        ),
+    )
 
     if TYPE_CHECKING:
         local: str
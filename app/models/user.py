@@ -128,3 +128,6 @@ class User(Base, IDMixin, CreationMixin):
 
     def encrypt(self, message: str) -> str:
         return str(gpg_handler.encrypt_message(message, self.public_key))
+
+    def encrypt_and_sign(self, message: str) -> str:
+        return str(gpg_handler.encrypt_and_sign_message(message, self.public_key))
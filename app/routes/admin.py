@@ -10,11 +10,12 @@ from app.database.dependencies import get_db
 from app.dependencies.auth import AuthResult, get_auth
 from app.models.enums.api_key import APIKeyScope
 from app.schemas.admin import (
-    AdminGlobalSettingsDisabledResponseModel,
+    AdminGlobalSettingsDisabledResponseModel, AdminMailQueueResponseModel,
     AdminUpdateGlobalSettingsModel, AdminUsersResponseModel,
 )
 from app.schemas.cron_report import CronReportResponseModel
 from app.schemas.global_settings import GlobalSettingsModel
+from email_utils.spool import get_spool_statistics
 
 router = APIRouter()
 
@@ -135,3 +136,16 @@ def get_cron_jobs(
     logger.info(f"Request: Get Cron Jobs -> Returning data.")
 
     return response_data
+
+
+@router.get("/mail-queue/", response_model=AdminMailQueueResponseModel)
+def get_mail_queue(
+    _: AuthResult = Depends(get_auth(
+        require_admin=True,
+        allow_api=True,
+        api_key_scope=APIKeyScope.ADMIN_MAIL_QUEUE_READ,
+    ))
+):
+    logger.info("Request: Get Mail Queue -> New Request.")
+
+    return AdminMailQueueResponseModel.from_orm(get_spool_statistics())
@@ -1,7 +1,9 @@
 import uuid
+from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi_pagination import Page, paginate, Params
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.sqlalchemy import paginate
 from pydantic import ValidationError
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
@@ -9,8 +11,8 @@ from starlette.requests import Request
 
 from app import logger
 from app.controllers.alias import (
-    create_alias, delete_alias, find_aliases_from_user_ordered, get_alias_from_user,
-    update_alias,
+    create_alias, delete_alias, find_aliases_from_user_after, find_aliases_from_user_ordered,
+    get_alias_from_user, update_alias,
 )
 from app.controllers.global_settings import get_settings_model
 from app.database.dependencies import get_db
@@ -18,7 +20,10 @@ from app.dependencies.auth import AuthResult, get_auth
 from app.models.alias import AliasType
 from app.models.enums.api_key import APIKeyScope
 from app.schemas._basic import HTTPNotFoundExceptionModel, SimpleDetailResponseModel
-from app.schemas.alias import AliasCreate, AliasDetail, AliasList, AliasUpdate
+from app.schemas.alias import (
+    AliasCreate, AliasCursorPage, AliasDetail, AliasList, AliasUpdate,
+)
+from app.utils.cursor import decode_cursor, encode_cursor
 from app.controllers import global_settings as settings
 
 router = APIRouter()
@@ -53,6 +58,58 @@ def get_all_aliases(
     )
 
 
+def _parse_sort_key(sort_key: list[Any]) -> list[Any]:
+    *values, id = sort_key
+
+    return [*values, uuid.UUID(id)]
+
+
+@router.get(
+    "/cursor/",
+    response_model=AliasCursorPage,
+)
+def get_aliases_by_cursor(
+    auth: AuthResult = Depends(get_auth(
+        allow_api=True,
+        api_key_scope=APIKeyScope.ALIAS_READ,
+    )),
+    db: Session = Depends(get_db),
+    cursor: str = Query(None),
+    size: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
+    query: str = Query(""),
+    active: bool = Query(None),
+    alias_type: AliasType = Query(None),
+):
+    logger.info("Request: Get aliases by cursor -> New Request.")
+
+    aliases, next_sort_key = find_aliases_from_user_after(
+        db,
+        user=auth.user,
+        after=decode_cursor(cursor, _parse_sort_key),
+        limit=size,
+        search=query,
+        active=active,
+        alias_type=alias_type,
+    )
+    total = None
+
+    if include_total:
+        total = find_aliases_from_user_ordered(
+            db,
+            user=auth.user,
+            search=query,
+            active=active,
+            alias_type=alias_type,
+        ).order_by(None).count()
+
+    return {
+        "items": aliases,
+        "next_cursor": encode_cursor(next_sort_key),
+        "total": total,
+    }
+
+
 @router.post(
     "/",
     response_model=AliasDetail,
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, Query
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from PIL import UnidentifiedImageError
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
 
 from app import life_constants
+from app.controllers import global_settings as settings
 from app.controllers.alias import get_alias_by_id
 from app.database.dependencies import get_db
 from app.models.enums.alias import ImageProxyFormatType, ProxyUserAgentType
 from app.schemas._basic import HTTPBadRequestExceptionModel
-from app.utils.image import download_image, extract_image_data
-from app.utils.parse_proxied_image import convert_image_to_type
+from app.utils.image import extract_image_data, save_image
+from app.utils.image_store import get_variant
 
 router = APIRouter()
 
@@ -18,6 +23,40 @@ FALLBACK_TYPE = ImageProxyFormatType(life_constants.IMAGE_PROXY_FALLBACK_IMAGE_T
 FALLBACK_USER_AGENT = ProxyUserAgentType(life_constants.IMAGE_PROXY_FALLBACK_USER_AGENT_TYPE)
 
 
+def _is_not_modified(request: Request, etag: str, modified_at: float) -> bool:
+    if (if_none_match := request.headers.get("if-none-match")) is not None:
+        return etag in [value.strip() for value in if_none_match.split(",")]
+
+    if (if_modified_since := request.headers.get("if-modified-since")) is not None:
+        try:
+            return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def _create_image_response(request: Request, path: Path, max_age: int) -> Response:
+    stat = path.stat()
+    etag = f'"{path.name}-{int(stat.st_mtime)}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        # Proxy urls are signed per alias, so they must not be stored by shared caches
+        "Cache-Control": f"private, max-age={max_age}",
+    }
+
+    if _is_not_modified(request, etag=etag, modified_at=stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        media_type=f"image/{path.suffix[1:]}",
+        headers=headers,
+        stat_result=stat,
+    )
+
+
 @router.get(
     "/image",
     responses={
@@ -28,6 +67,7 @@ FALLBACK_USER_AGENT = ProxyUserAgentType(life_constants.IMAGE_PROXY_FALLBACK_USE
     }
 )
 def proxy_image(
+    request: Request,
     db: Session = Depends(get_db),
     data: str = Query(..., description="The data of the request."),
     signature: str = Query(..., description="The signature of the request."),
@@ -48,23 +88,32 @@ def proxy_image(
     except NoResultFound:
         pass
 
-    if image_path and image_path.exists():
+    max_age = settings.get(db, "IMAGE_PROXY_STORAGE_LIFE_TIME_IN_HOURS") * 60 * 60
+
+    if image_path and image_path.is_file():
         try:
-            return StreamingResponse(
-                convert_image_to_type(
-                    image_path.read_bytes(),
-                    preferred_type=preferred_format,
-                ),
-                media_type=f"image/{preferred_format.value.lower()}",
+            return _create_image_response(
+                request,
+                get_variant(image_path, preferred_format),
+                max_age=max_age,
             )
         except (UnidentifiedImageError, ValueError, IOError):
             pass
 
-    return StreamingResponse(
-        download_image(
+    # The image has not been downloaded while handling the mail, so it is downloaded now and
+    # stored for the following requests
+    try:
+        file = save_image(
             url=original_url,
             preferred_type=preferred_format,
             user_agent=preferred_user_agent,
-        ),
-        media_type=f"image/{preferred_format.value.lower()}",
-    )
+        )
+        # A fresh variant in another format may have been reused
+        file = get_variant(file, preferred_format)
+    except (UnidentifiedImageError, ValueError, IOError):
+        raise HTTPException(
+            status_code=502,
+            detail="Image could not be proxied.",
+        )
+
+    return _create_image_response(request, file, max_age=max_age)
@@ -1,20 +1,26 @@
 import uuid
+from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_pagination import Page, paginate, Params
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
 from app import logger
 from app.controllers.email_report import (
     delete_report,
+    find_reports_from_user_before,
+    find_reports_from_user_ordered,
     get_report_from_user_by_id,
 )
 from app.database.dependencies import get_db
 from app.dependencies.auth import AuthResult, get_auth
 from app.models.enums.api_key import APIKeyScope
 from app.schemas._basic import SimpleDetailResponseModel
-from app.schemas.report import Report
+from app.schemas.report import Report, ReportCursorPage
+from app.utils.cursor import decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -22,11 +28,46 @@ router = APIRouter()
 @router.get("/", response_model=Page[Report])
 def get_reports(
     auth: AuthResult = Depends(get_auth(allow_api=True, api_key_scope=APIKeyScope.REPORT_READ)),
+    db: Session = Depends(get_db),
     params: Params = Depends(),
 ):
     logger.info("Request: Get all Reports -> New Request.")
 
-    return paginate(auth.user.email_reports, params)
+    return paginate(find_reports_from_user_ordered(db, user=auth.user), params)
+
+
+def _parse_sort_key(sort_key: list[Any]) -> list[Any]:
+    created_at, id = sort_key
+
+    return [datetime.fromisoformat(created_at), uuid.UUID(id)]
+
+
+@router.get("/cursor/", response_model=ReportCursorPage)
+def get_reports_by_cursor(
+    auth: AuthResult = Depends(get_auth(allow_api=True, api_key_scope=APIKeyScope.REPORT_READ)),
+    db: Session = Depends(get_db),
+    cursor: str = Query(None),
+    size: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
+):
+    logger.info("Request: Get Reports by cursor -> New Request.")
+
+    reports, next_sort_key = find_reports_from_user_before(
+        db,
+        user=auth.user,
+        before=decode_cursor(cursor, _parse_sort_key),
+        limit=size,
+    )
+    total = None
+
+    if include_total:
+        total = find_reports_from_user_ordered(db, user=auth.user).order_by(None).count()
+
+    return {
+        "items": reports,
+        "next_cursor": encode_cursor(next_sort_key),
+        "total": total,
+    }
 
 
 @router.get("/{id}", response_model=Report)
@@ -5,7 +5,8 @@ from pydantic import BaseModel, Field
 
 __all__ = [
     "AdminUsersResponseModel",
-    "AdminGlobalSettingsDisabledResponseModel"
+    "AdminGlobalSettingsDisabledResponseModel",
+    "AdminMailQueueResponseModel",
 ]
 
 SMALL_INTEGER_LIMIT = 32_767
@@ -51,3 +52,13 @@ class AdminUpdateGlobalSettingsModel(BaseModel):
     allow_alias_deletion: Optional[bool] = None
     max_aliases_per_user: Optional[int] = Field(None, ge=0, le=INTEGER_LIMIT)
     allow_registrations: Optional[bool] = None
+
+
+class AdminMailQueueResponseModel(BaseModel):
+    incoming_amount: int
+    processing_amount: int
+    failed_amount: int
+    oldest_age_in_seconds: float
+
+    class Config:
+        orm_mode = True
@@ -14,6 +14,7 @@ __all__ = [
     "AliasCreate",
     "AliasUpdate",
     "AliasList",
+    "AliasCursorPage",
     "AliasDetail",
 ]
 
@@ -103,6 +104,14 @@ class AliasList(BaseModel):
         orm_mode = True
 
 
+class AliasCursorPage(BaseModel):
+    items: list[AliasList]
+    # `None` if there are no more aliases
+    next_cursor: Optional[str]
+    # Only counted if requested
+    total: Optional[int]
+
+
 class AliasDetail(AliasBase):
     id: uuid.UUID
     domain: str
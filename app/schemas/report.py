@@ -1,9 +1,13 @@
 import uuid
+from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel
 
 __all__ = [
-    "Report"
+    "ReportList",
+    "ReportCursorPage",
+    "Report",
 ]
 
 
@@ -11,8 +15,25 @@ class ReportBase(BaseModel):
     pass
 
 
+class ReportList(ReportBase):
+    id: uuid.UUID
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ReportCursorPage(BaseModel):
+    items: list[ReportList]
+    # `None` if there are no more reports
+    next_cursor: Optional[str]
+    # Only counted if requested
+    total: Optional[int]
+
+
 class Report(ReportBase):
     id: uuid.UUID
+    created_at: datetime
     encrypted_content: str
 
     class Config:
@@ -1,9 +1,12 @@
 from functools import cache
 from pathlib import Path
-from typing import Iterator, TYPE_CHECKING
+from typing import TYPE_CHECKING
 
 from sqlalchemy import inspect
 
+from app import life_constants
+from .word_filter import WordFilter
+
 if TYPE_CHECKING:
     from ..database.base import Base
 
@@ -13,19 +16,18 @@ __all__ = [
 ]
 
 
-@cache
-def _get_words() -> Iterator[str]:
+def _get_words() -> list[str]:
     try:
-        return (
-            word.lower()
-            for word in Path("/usr/share/dict/words")
-        .read_text()
-        .splitlines()
-        )
+        return Path(life_constants.ALIAS_WORD_LIST_PATH).read_text().splitlines()
     except OSError:
         return []
 
 
+@cache
+def _get_word_filter() -> WordFilter:
+    return WordFilter(_get_words(), min_length=life_constants.ALIAS_WORD_MIN_LENGTH)
+
+
 def object_as_dict(obj: "Base") -> dict:
     return {
         attr.key: getattr(obj, attr.key)
@@ -34,7 +36,4 @@ def object_as_dict(obj: "Base") -> dict:
 
 
 def contains_word(value: str) -> bool:
-    return any(
-        word in value
-        for word in _get_words()
-    )
+    return _get_word_filter().matches(value)
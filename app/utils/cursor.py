@@ -0,0 +1,36 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+__all__ = [
+    "encode_cursor",
+    "decode_cursor",
+]
+
+
+def encode_cursor(sort_key: Optional[list[Any]]) -> Optional[str]:
+    """Encode the sort key of the last item of a page into an opaque cursor."""
+    if sort_key is None:
+        return None
+
+    return base64.urlsafe_b64encode(json.dumps(sort_key, default=str).encode()).decode()
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    parse_sort_key: Callable[[list[Any]], list[Any]],
+) -> Optional[list[Any]]:
+    """Decode a cursor created by `encode_cursor`.
+
+    `parse_sort_key` restores the values of the sort key that were encoded as strings.
+    """
+    if not cursor:
+        return None
+
+    try:
+        return parse_sort_key(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    except (binascii.Error, ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=422, detail="Cursor invalid.")
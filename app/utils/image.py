@@ -1,7 +1,10 @@
 import base64
 import hashlib
 import hmac
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
@@ -10,15 +13,15 @@ from urllib.parse import urlencode, urlunparse
 
 import requests
 from fastapi import HTTPException
-from PIL import Image
-from requests import HTTPError
+from PIL import Image, UnidentifiedImageError
+from requests import HTTPError, RequestException, Timeout
 from urllib3.exceptions import ConnectTimeoutError
 
 from app import constant_keys, constants, life_constants, logger
-from app.constants import ROOT_DIR
 from app.life_constants import IS_DEBUG
-from app.models import EmailAlias
 from app.models.constants.alias import PROXY_USER_AGENT_STRING_MAP
+from app.utils import image_store
+from app.utils.image_store import add_reference, create_blob_key, find_fresh_blob, store_blob
 from app.utils.parse_proxied_image import convert_image_to_type
 from app.models.enums.alias import ImageProxyFormatType, ProxyUserAgentType
 from app.utils.url import Components
@@ -28,9 +31,15 @@ __all__ = [
     "extract_image_data",
     "download_image",
     "save_image",
+    "save_images",
+    "create_download_deadline",
 ]
 
-STORAGE_PATH = ROOT_DIR / "storage" / "proxy" / "images"
+
+# Shared by all mails handled by this process
+_download_semaphore = threading.BoundedSemaphore(
+    life_constants.IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS
+)
 
 
 def _create_signature(payload: bytes) -> bytes:
@@ -50,7 +59,7 @@ def create_image_url(
         (
             base64.b64encode(original_url.encode("utf-8")).decode("utf-8"),
             str(alias_id),
-            str(file.relative_to(STORAGE_PATH)) if file else "",
+            str(file.relative_to(image_store.STORAGE_PATH)) if file else "",
             datetime.utcnow().isoformat(),
         )
     )
@@ -98,7 +107,7 @@ def extract_image_data(
         .split("_")
 
     original_url = base64.b64decode(original_url_in_base64.encode("utf-8")).decode("utf-8")
-    path = STORAGE_PATH / relative_path
+    path = image_store.STORAGE_PATH / relative_path
 
     return original_url, uuid.UUID(alias_id), path
 
@@ -109,16 +118,17 @@ def download_image(
     user_agent: ProxyUserAgentType,
 ) -> BytesIO:
     try:
-        proxied_response = requests.request(
-            method="GET",
-            url=url,
-            allow_redirects=True,
-            timeout=life_constants.IMAGE_PROXY_TIMEOUT_IN_SECONDS,
-            headers={
-                "User-Agent": PROXY_USER_AGENT_STRING_MAP[user_agent],
-            }
-        )
-    except ConnectTimeoutError:
+        with _download_semaphore:
+            proxied_response = requests.request(
+                method="GET",
+                url=url,
+                allow_redirects=True,
+                timeout=life_constants.IMAGE_PROXY_TIMEOUT_IN_SECONDS,
+                headers={
+                    "User-Agent": PROXY_USER_AGENT_STRING_MAP[user_agent],
+                }
+            )
+    except (ConnectTimeoutError, Timeout):
         logger.info(
             f"Request: Proxy Image -> Timeout while trying to proxy {url=}."
         )
@@ -126,7 +136,7 @@ def download_image(
             status_code=502,
             detail="Timeout while trying to proxy image.",
         )
-    except HTTPError:
+    except (HTTPError, RequestException):
         logger.info(
             f"Request: Proxy Image -> Error while trying to proxy {url=}."
         )
@@ -162,28 +172,131 @@ def download_image(
     )
 
 
+def _save_image(
+    url: str,
+    user_agent: ProxyUserAgentType,
+    preferred_type: ImageProxyFormatType,
+    cancelled: Optional[threading.Event],
+) -> Optional[Path]:
+    key = create_blob_key(url)
+
+    if (file := find_fresh_blob(key, preferred_type)) is not None:
+        logger.info(f"Download Image -> Reusing stored image url={url} from {file=}.")
+    else:
+        content = download_image(
+            url=url,
+            user_agent=user_agent,
+            preferred_type=preferred_type,
+        )
+
+        # Nothing waits for the image anymore, so it would never be referenced
+        if cancelled is not None and cancelled.is_set():
+            logger.info(f"Download Image -> Discarding late image url={url}.")
+            return None
+
+        with Image.open(content) as image:
+            logger.info(f"Download Image -> Saving image url={url}.")
+
+            file = store_blob(key, image)
+
+    add_reference(file)
+
+    return file
+
+
 def save_image(
     url: str,
-    alias: EmailAlias,
+    user_agent: ProxyUserAgentType,
+    preferred_type: ImageProxyFormatType,
 ) -> Path:
-    content = download_image(
+    return _save_image(
         url=url,
-        user_agent=alias.proxy_user_agent,
-        preferred_type=alias.proxy_image_format,
+        user_agent=user_agent,
+        preferred_type=preferred_type,
+        cancelled=None,
     )
 
-    with Image.open(content) as image:
-        file = (
-            STORAGE_PATH /
-            datetime.utcnow().strftime("%Y-%m-%d") /
-            f"{uuid.uuid4()}.{image.format.lower()}"
+
+def _save_image_or_none(
+    url: str,
+    user_agent: ProxyUserAgentType,
+    preferred_type: ImageProxyFormatType,
+    cancelled: threading.Event,
+) -> Optional[Path]:
+    try:
+        return _save_image(
+            url=url,
+            user_agent=user_agent,
+            preferred_type=preferred_type,
+            cancelled=cancelled,
         )
+    except (HTTPException, UnidentifiedImageError, ValueError, OSError):
+        return None
 
-        file.parent.mkdir(parents=True, exist_ok=True)
-        file.touch(exist_ok=True)
 
-        logger.info(f"Download Image -> Saving image url={url} to {file=}.")
+def create_download_deadline() -> float:
+    """The time until which the images of a mail may be downloaded, for `save_images`."""
+    return time.monotonic() + life_constants.IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS
 
-        image.save(str(file))
 
-    return file
+def save_images(
+    urls: list[str],
+    user_agent: ProxyUserAgentType,
+    preferred_type: ImageProxyFormatType,
+    deadline: Optional[float] = None,
+) -> dict[str, Optional[Path]]:
+    """Download and save multiple images concurrently.
+
+    At most `IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL` images are downloaded at the same
+    time. Images that could not be saved before `deadline` or failed to download are mapped to
+    `None`, so they can be proxied lazily instead. Mails with multiple HTML parts should share
+    one deadline created by `create_download_deadline`; by default a new one is created.
+
+    Returns a dict mapping each url to its saved file.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+
+    if not unique_urls:
+        return {}
+
+    deadline = deadline or create_download_deadline()
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(
+        max_workers=min(
+            len(unique_urls),
+            life_constants.IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL,
+        ),
+        thread_name_prefix="image-proxy",
+    )
+
+    try:
+        futures = {
+            url: executor.submit(
+                _save_image_or_none,
+                url=url,
+                user_agent=user_agent,
+                preferred_type=preferred_type,
+                cancelled=cancelled,
+            )
+            for url in unique_urls
+        }
+
+        wait(
+            futures.values(),
+            timeout=max(0.0, deadline - time.monotonic()),
+        )
+    finally:
+        # Do not wait for downloads that exceeded the time budget; their images are discarded
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    files = {}
+
+    for url, future in futures.items():
+        if future.done() and not future.cancelled():
+            files[url] = future.result()
+        else:
+            logger.info(f"Download Image -> Image url={url} exceeded the time budget.")
+            files[url] = None
+
+    return files
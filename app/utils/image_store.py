@@ -0,0 +1,216 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from app import life_constants, logger
+from app.constants import ROOT_DIR
+from app.models.enums.alias import ImageProxyFormatType
+
+__all__ = [
+    "STORAGE_PATH",
+    "create_blob_key",
+    "find_fresh_blob",
+    "store_blob",
+    "get_variant",
+    "add_reference",
+    "collect_garbage",
+]
+
+STORAGE_PATH = ROOT_DIR / "storage" / "proxy" / "images"
+# Images are stored once per upstream url, with one pre-encoded variant per format:
+#   blobs/<first two chars of key>/<key>.<format>
+BLOBS_FOLDER = "blobs"
+# A blob is referenced on each day a mail uses it:
+#   references/<date>/<key>
+# Blobs without any reference left will be deleted by `collect_garbage`.
+REFERENCES_FOLDER = "references"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def _get_blob_folder(key: str) -> Path:
+    return STORAGE_PATH / BLOBS_FOLDER / key[:2]
+
+
+def _is_date_folder(path: Path) -> bool:
+    try:
+        datetime.strptime(path.name, DATE_FORMAT)
+    except ValueError:
+        return False
+
+    return path.is_dir()
+
+
+def _is_folder_expired(path: Path, life_time_in_hours: int) -> bool:
+    d = datetime.strptime(path.name, DATE_FORMAT).date()
+    # References are dated in UTC
+    diff = datetime.utcnow().date() - d
+    diff_in_hours = diff.days * 24
+
+    return diff_in_hours >= life_time_in_hours
+
+
+def _get_blob_key(blob: Path) -> str:
+    return blob.name.split(".", 1)[0]
+
+
+def _save_atomically(image: Image.Image, path: Path, image_format: str) -> None:
+    temporary_file = path.parent / f".{uuid.uuid4()}.tmp"
+
+    if image_format.lower() == str(ImageProxyFormatType.JPEG) and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    image.save(str(temporary_file), format=image_format)
+    # Replacing is atomic, so readers never see partially written images
+    os.replace(temporary_file, path)
+
+
+def create_blob_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _is_fresh(blob: Path) -> bool:
+    try:
+        downloaded_at = datetime.fromtimestamp(blob.stat().st_mtime)
+    except FileNotFoundError:
+        return False
+
+    freshness = timedelta(hours=life_constants.IMAGE_PROXY_STORAGE_FRESHNESS_IN_HOURS)
+
+    return datetime.now() - downloaded_at <= freshness
+
+
+def find_fresh_blob(key: str, preferred_type: ImageProxyFormatType) -> Optional[Path]:
+    """Return a variant of `key` that has been downloaded within the freshness window.
+
+    The `preferred_type` variant is returned if it is fresh; otherwise any fresh variant, which
+    can be converted with `get_variant`.
+    """
+    fresh_blobs = [
+        blob
+        for blob in _get_blob_folder(key).glob(f"{key}.*")
+        if _is_fresh(blob)
+    ]
+
+    for blob in fresh_blobs:
+        if blob.suffix == f".{preferred_type}":
+            return blob
+
+    return fresh_blobs[0] if fresh_blobs else None
+
+
+def store_blob(key: str, image: Image.Image) -> Path:
+    folder = _get_blob_folder(key)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    blob = folder / f"{key}.{image.format.lower()}"
+
+    logger.info(f"Image Store -> Saving blob {blob}.")
+
+    _save_atomically(image, blob, image.format)
+
+    # Fresh variants may have been stored by other mails in the meantime and are still in use
+    for variant in folder.glob(f"{key}.*"):
+        if variant != blob and not _is_fresh(variant):
+            variant.unlink(missing_ok=True)
+
+    return blob
+
+
+def get_variant(blob: Path, preferred_type: ImageProxyFormatType) -> Path:
+    """Return the `preferred_type` variant of `blob`. It is encoded once, when it is requested
+    for the first time, and again once `blob` has been downloaded again."""
+    variant = blob.with_suffix(f".{preferred_type}")
+
+    if variant == blob:
+        return variant
+
+    try:
+        if variant.stat().st_mtime >= blob.stat().st_mtime:
+            return variant
+    except FileNotFoundError:
+        pass
+
+    logger.info(f"Image Store -> Creating variant {variant}.")
+
+    with Image.open(blob) as image:
+        _save_atomically(image, variant, str(preferred_type))
+
+    # A variant is as fresh as the download it has been created from
+    blob_stat = blob.stat()
+    os.utime(variant, (blob_stat.st_atime, blob_stat.st_mtime))
+
+    return variant
+
+
+def add_reference(blob: Path) -> None:
+    folder = STORAGE_PATH / REFERENCES_FOLDER / datetime.utcnow().strftime(DATE_FORMAT)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    (folder / _get_blob_key(blob)).touch(exist_ok=True)
+
+
+def _delete_legacy_images(life_time_in_hours: int) -> int:
+    """Delete images that have been stored per day before the blob store existed."""
+    count = 0
+
+    for result in STORAGE_PATH.iterdir():
+        if _is_date_folder(result) and _is_folder_expired(result, life_time_in_hours):
+            shutil.rmtree(str(result))
+            count += 1
+
+    return count
+
+
+def collect_garbage(life_time_in_hours: int) -> int:
+    """Delete all references older than `life_time_in_hours` and all blobs that are not
+    referenced anymore.
+
+    Returns the amount of deleted images.
+    """
+    if not STORAGE_PATH.exists():
+        return 0
+
+    started_at = datetime.now().timestamp()
+    blobs_path = STORAGE_PATH / BLOBS_FOLDER
+    references_path = STORAGE_PATH / REFERENCES_FOLDER
+    count = _delete_legacy_images(life_time_in_hours)
+
+    referenced_blobs = set()
+
+    if references_path.exists():
+        for folder in references_path.iterdir():
+            if not _is_date_folder(folder):
+                continue
+
+            if _is_folder_expired(folder, life_time_in_hours):
+                shutil.rmtree(str(folder))
+            else:
+                referenced_blobs.update(reference.name for reference in folder.iterdir())
+
+    if not blobs_path.exists():
+        return count
+
+    for blob in blobs_path.glob("*/*"):
+        if _get_blob_key(blob) in referenced_blobs:
+            continue
+
+        try:
+            modified_at = blob.stat().st_mtime
+        except FileNotFoundError:
+            # Renamed or deleted in the meantime
+            continue
+
+        # Blobs saved during the collection may not have their reference yet
+        if modified_at >= started_at:
+            continue
+
+        blob.unlink(missing_ok=True)
+        count += 1
+
+    return count
@@ -0,0 +1,108 @@
+import string
+from collections import deque
+from typing import Iterable
+
+__all__ = [
+    "WordFilter",
+]
+
+ALPHABET = frozenset(string.ascii_lowercase)
+
+
+class WordFilter:
+    """Aho-Corasick automaton answering whether a value contains any of the given words in
+    O(len(value)).
+
+    Words are matched case-insensitively. Words shorter than `min_length` or containing
+    characters outside a-z are ignored.
+    """
+
+    def __init__(self, words: Iterable[str], min_length: int):
+        # Transitions are kept in one flat dict keyed by `state << 8 | ord(char)` as that needs
+        # far less memory than a dict per state
+        self._transitions: dict[int, int] = {}
+        self._fail_states: list[int] = [0]
+        self._is_terminal = bytearray(1)
+
+        self._build_trie(words, min_length)
+        self._build_fail_states()
+
+    def __len__(self) -> int:
+        return len(self._fail_states)
+
+    def _build_trie(self, words: Iterable[str], min_length: int) -> None:
+        candidates = {
+            word
+            for raw_word in words
+            if len(word := raw_word.strip().lower()) >= min_length and ALPHABET.issuperset(word)
+        }
+
+        # Inserting shorter words first allows skipping words that start with another word, as
+        # they can never match on their own
+        for word in sorted(candidates, key=len):
+            state = 0
+
+            for char in word:
+                if self._is_terminal[state]:
+                    break
+
+                key = state << 8 | ord(char)
+
+                if (next_state := self._transitions.get(key)) is None:
+                    next_state = len(self._fail_states)
+                    self._transitions[key] = next_state
+                    self._fail_states.append(0)
+                    self._is_terminal.append(0)
+
+                state = next_state
+            else:
+                self._is_terminal[state] = 1
+
+    def _build_fail_states(self) -> None:
+        children: dict[int, list[tuple[str, int]]] = {}
+
+        for key, next_state in self._transitions.items():
+            children.setdefault(key >> 8, []).append((chr(key & 0xFF), next_state))
+
+        queue = deque(next_state for _, next_state in children.get(0, []))
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in children.get(state, []):
+                fail_state = self._fail_states[state]
+
+                while fail_state and (fail_state << 8 | ord(char)) not in self._transitions:
+                    fail_state = self._fail_states[fail_state]
+
+                fail_state = self._transitions.get(fail_state << 8 | ord(char), 0)
+
+                self._fail_states[next_state] = fail_state
+                # A state ending in a word matches as well
+                self._is_terminal[next_state] |= self._is_terminal[fail_state]
+
+                queue.append(next_state)
+
+    def matches(self, value: str) -> bool:
+        transitions = self._transitions
+        fail_states = self._fail_states
+        is_terminal = self._is_terminal
+        state = 0
+
+        for char in value.lower():
+            if char not in ALPHABET:
+                # No word contains this character
+                state = 0
+                continue
+
+            code = ord(char)
+
+            while state and (state << 8 | code) not in transitions:
+                state = fail_states[state]
+
+            state = transitions.get(state << 8 | code, 0)
+
+            if is_terminal[state]:
+                return True
+
+        return False
@@ -1,20 +1,36 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import signal
+import threading
 import time
 import traceback
-from email import message_from_bytes
 from mailbox import Message
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from multiprocessing.sharedctypes import Synchronized
+from typing import Optional
 
 from aiosmtpd.controller import Controller
 from aiosmtpd.smtp import Envelope
 
 from app import life_constants, logger
-from email_utils import status
+from app.controllers import server_statistics
+from app.controllers.email_report import flush_email_reports, recover_email_reports
+from app.database.dependencies import with_db
+from email_utils import spool, status
 from email_utils.bounce_messages import is_not_deliverable
 from email_utils.errors import EmailHandlerError
-from email_utils.handler import handle
 from email_utils.sanitizers import sanitize_envelope, sanitize_message
 from email_utils.send_mail import (
     draft_message, send_mail,
 )
+from email_utils.utils import parse_message_headers
+from email_utils.validators import is_known_recipient
+from email_utils.workers import run_in_acceptor
+
+HEARTBEAT_INTERVAL_IN_SECONDS = 2
 
 
 class ExampleHandler:
@@ -23,25 +39,31 @@ class ExampleHandler:
         sanitize_envelope(envelope)
 
         logger.info("Sanitizing message...")
-        message = message_from_bytes(envelope.original_content)
+        # Only the headers are required here, the spool workers parse the whole message
+        message = parse_message_headers(envelope.original_content)
         sanitize_message(message)
 
         logger.info("Data validated successfully.")
 
         return envelope, message
 
+    def has_known_recipient(self, envelope: Envelope) -> bool:
+        with with_db() as db:
+            return is_known_recipient(db, envelope.rcpt_tos[0])
+
     async def handle_DATA(self, server, session, envelope: Envelope):
         logger.info("New DATA received. Validating data...")
 
         message = None
 
         try:
-            envelope, message = self.validate(envelope)
+            envelope, message = await run_in_acceptor(self.validate, envelope)
 
             logger.info(f"New mail received from {envelope.mail_from} to {envelope.rcpt_tos[0]}")
 
             if len(envelope.rcpt_tos) != 1 and not is_not_deliverable(envelope, message):
-                send_mail(
+                await run_in_acceptor(
+                    send_mail,
                     to_mail=envelope.mail_from,
                     message=draft_message(
                         template="not-deliverable-to-server",
@@ -65,17 +87,27 @@ class ExampleHandler:
                 )
                 return status.E501
 
-            status_code = await handle(envelope, message)
+            # Unknown recipients are rejected before accepting the mail, as bouncing it later
+            # would send mails to senders that may have been forged. Bounces are never answered.
+            if envelope.mail_from != "<>" \
+                    and not await run_in_acceptor(self.has_known_recipient, envelope):
+                logger.info(f"Recipient {envelope.rcpt_tos[0]} is unknown. Rejecting mail.")
+                return status.E515
 
-            logger.info(f"Mail handled successfully. Returning status code: {status_code}.")
+            # The mail is handled by the spool workers, so heavy mails never run into the
+            # SMTP timeouts of Postfix
+            await run_in_acceptor(spool.enqueue, envelope)
 
-            return status_code
+            logger.info("Mail spooled successfully.")
+
+            return status.E200
 
         except EmailHandlerError as error:
             logger.info("An EmailHandlerError occurred while handling the mail.")
 
             if not error.avoid_error_email and not is_not_deliverable(envelope, message):
-                send_mail(
+                await run_in_acceptor(
+                    send_mail,
                     to_mail=envelope.mail_from,
                     message=draft_message(
                         template="not-deliverable-to-server",
@@ -104,19 +136,216 @@ class ExampleHandler:
                 f"{envelope.rcpt_tos}."
             )
 
-            return status.E501
+            return status.E404
 
 
-def main():
-    controller = Controller(
+class ReusePortController(Controller):
+    """Allows multiple processes to listen on the same port; the kernel balances the
+    connections between them."""
+
+    def _create_server(self):
+        return self.loop.create_server(
+            self._factory_invoker,
+            host=self.hostname,
+            port=self.port,
+            ssl=self.ssl_context,
+            reuse_port=True,
+        )
+
+    def _trigger_server(self):
+        # The kernel may pass a test connection to another process listening on the port, so
+        # the SMTP factory is checked directly instead
+        self.loop.call_soon_threadsafe(self._factory_invoker)
+
+
+def _is_event_loop_responsive(controller: Controller) -> bool:
+    future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0), controller.loop)
+
+    try:
+        future.result(timeout=HEARTBEAT_INTERVAL_IN_SECONDS)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        return False
+
+    return True
+
+
+def _flush_statistics(force: bool) -> None:
+    try:
+        with with_db() as db:
+            if force:
+                server_statistics.flush(db)
+            else:
+                server_statistics.flush_if_due(db)
+    except Exception as error:
+        logger.warning(f"Email handler {os.getpid()} -> Could not flush statistics: {error}.")
+
+
+def _flush_email_reports() -> None:
+    try:
+        with with_db() as db:
+            flush_email_reports(db)
+    except Exception as error:
+        logger.warning(f"Email handler {os.getpid()} -> Could not create email reports: {error}.")
+
+
+def _create_email_reports_forever(stop_event: threading.Event) -> None:
+    # Encrypting is slow, so this runs in its own thread to not delay the heartbeat
+    while not stop_event.wait(life_constants.EMAIL_REPORT_FLUSH_INTERVAL_IN_SECONDS):
+        _flush_email_reports()
+
+
+def serve(
+    stop_event: threading.Event,
+    heartbeat: Optional[Synchronized] = None,
+    recover_interrupted: bool = True,
+) -> bool:
+    """Handle mails until `stop_event` is set.
+
+    Returns whether all mails have been handled in time. Otherwise, the caller must exit the
+    process, as the workers that are still handling mails keep it alive.
+    """
+    controller = ReusePortController(
         ExampleHandler(),
         hostname=life_constants.EMAIL_HANDLER_HOST,
-        port=20381
+        port=20381,
+        # Larger mails are rejected before they are read into memory
+        data_size_limit=life_constants.EMAIL_MAX_SIZE_IN_BYTES,
     )
     controller.start()
 
-    while True:
-        time.sleep(2)
+    if recover_interrupted:
+        recover_email_reports()
+
+    spool_thread = threading.Thread(
+        target=asyncio.run,
+        args=(spool.process_forever(stop_event, recover_interrupted=recover_interrupted),),
+        name="spool",
+        # Otherwise, mails that are stuck would keep the process alive after the timeout
+        daemon=True,
+    )
+    spool_thread.start()
+
+    reports_thread = threading.Thread(
+        target=_create_email_reports_forever,
+        args=(stop_event,),
+        name="email-reports",
+    )
+    reports_thread.start()
+
+    while not stop_event.wait(HEARTBEAT_INTERVAL_IN_SECONDS):
+        if heartbeat is not None and _is_event_loop_responsive(controller):
+            heartbeat.value = time.time()
+
+        _flush_statistics(force=False)
+
+    logger.info(f"Email handler {os.getpid()} -> Shutting down.")
+
+    controller.stop()
+    spool_thread.join(timeout=life_constants.EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS)
+
+    has_handled_all = not spool_thread.is_alive()
+
+    if not has_handled_all:
+        logger.warning(
+            f"Email handler {os.getpid()} -> Mails are still being handled. They will be "
+            f"retried after the next start."
+        )
+
+    reports_thread.join()
+    _flush_email_reports()
+    _flush_statistics(force=True)
+
+    logger.info(f"Email handler {os.getpid()} -> Shut down.")
+
+    return has_handled_all
+
+
+def _run_worker(heartbeat: Synchronized) -> None:
+    stop_event = threading.Event()
+
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    # The supervisor decides when to shut down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if not serve(stop_event, heartbeat=heartbeat, recover_interrupted=False):
+        os._exit(1)
+
+
+def _start_worker(context: BaseContext) -> tuple[BaseProcess, Synchronized]:
+    heartbeat = context.Value("d", time.time())
+    process = context.Process(target=_run_worker, args=(heartbeat,), name="email-handler")
+    process.start()
+
+    logger.info(f"Email handler supervisor -> Started worker {process.pid}.")
+
+    return process, heartbeat
+
+
+def _stop_worker(process: BaseProcess) -> None:
+    process.join(timeout=life_constants.EMAIL_HANDLER_SHUTDOWN_TIMEOUT_IN_SECONDS)
+
+    if process.is_alive():
+        logger.warning(f"Email handler supervisor -> Killing worker {process.pid}.")
+        process.kill()
+        process.join()
+
+
+def supervise(processes: int, stop_event: threading.Event) -> None:
+    """Run `processes` workers that share the SMTP port, restarting unhealthy ones."""
+    # Must happen before any worker starts processing the spool
+    spool.recover()
+    recover_email_reports()
+
+    # Workers must not inherit database or SMTP connections
+    context = multiprocessing.get_context("spawn")
+    workers = [_start_worker(context) for _ in range(processes)]
+
+    while not stop_event.wait(HEARTBEAT_INTERVAL_IN_SECONDS):
+        for index, (process, heartbeat) in enumerate(workers):
+            if not process.is_alive():
+                logger.warning(
+                    f"Email handler supervisor -> Worker {process.pid} exited with "
+                    f"{process.exitcode}. Restarting it."
+                )
+            elif time.time() - heartbeat.value > \
+                    life_constants.EMAIL_HANDLER_HEALTH_CHECK_TIMEOUT_IN_SECONDS:
+                logger.warning(
+                    f"Email handler supervisor -> Worker {process.pid} is not responding. "
+                    f"Restarting it."
+                )
+                process.kill()
+                process.join()
+            else:
+                continue
+
+            spool.recover(process.pid)
+            recover_email_reports(process.pid)
+            workers[index] = _start_worker(context)
+
+    logger.info("Email handler supervisor -> Shutting down workers.")
+
+    for process, _ in workers:
+        process.terminate()
+
+    for process, _ in workers:
+        _stop_worker(process)
+
+    # Killed workers may have left entries behind
+    spool.recover()
+    recover_email_reports()
+
+
+def main():
+    stop_event = threading.Event()
+
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    if life_constants.EMAIL_HANDLER_PROCESSES > 1:
+        supervise(life_constants.EMAIL_HANDLER_PROCESSES, stop_event)
+    elif not serve(stop_event):
+        os._exit(1)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,6 @@ import base64
 import enum
 import hmac
 import json
-import re
 from datetime import datetime, timedelta
 from email.message import Message
 from typing import Optional
@@ -12,6 +11,7 @@ from aiosmtpd.smtp import Envelope
 from app import life_constants, constant_keys, constants
 from app.utils.email import is_local_a_bounce_address
 from email_utils import headers
+from email_utils.utils import parse_message_headers
 
 __all__ = [
     "StatusType",
@@ -19,18 +19,13 @@ __all__ = [
     "extract_forward_status",
     "is_bounce",
     "is_not_deliverable",
-    "get_report_from_message",
+    "get_bounce_report",
     "extract_forward_status_header",
     "extract_in_reply_to_header",
 ]
 
 
-FORWARD_STATUS_HEADER_REGEX = re.compile(
-    rf"\n{headers.KLECK_FORWARD_STATUS}:\s+([a-z0-9]+\.[a-z0-9]+)\n"
-)
-IN_REPLY_TO_HEADER_REGEX = re.compile(
-    rf"\n{headers.IN_REPLY_TO}:\s+( -~)\n"
-)
+REPORT_CONTENT_TYPE = "multipart/report"
 
 
 class StatusType(enum.Enum):
@@ -118,18 +113,24 @@ def extract_forward_status(status: str) -> dict:
     return payload
 
 
+def _get_unfolded_header(message: Message, name: str) -> Optional[str]:
+    if (value := message.get(name)) is None:
+        return None
+
+    # Long values may have been folded by a server in between
+    return "".join(str(value).split()) or None
+
+
 def extract_forward_status_header(message: Message) -> Optional[str]:
-    if (result := FORWARD_STATUS_HEADER_REGEX.search(message.as_string())) is not None:
-        return result.group(1)
+    return _get_unfolded_header(message, headers.KLECK_FORWARD_STATUS)
 
 
 def extract_in_reply_to_header(message: Message) -> Optional[str]:
-    if (result := IN_REPLY_TO_HEADER_REGEX.search(message.as_string())) is not None:
-        return result.group(1)
+    return _get_unfolded_header(message, headers.IN_REPLY_TO)
 
 
 def is_bounce(envelope: Envelope, message: Message) -> bool:
-    return envelope.mail_from == "<>" and message.get_content_type().lower() == "multipart/report"
+    return envelope.mail_from == "<>" and message.get_content_type() == REPORT_CONTENT_TYPE
 
 
 def is_not_deliverable(envelope: Envelope, message: Optional[Message] = None) -> bool:
@@ -143,7 +144,23 @@ def is_not_deliverable(envelope: Envelope, message: Optional[Message] = None) ->
     return False
 
 
-def get_report_from_message(message: Message) -> Optional[Message]:
-    for part in message.walk():
-        if part.get_content_type().lower() == "message/rfc822":
-            return part.get_payload()[0]
+def get_bounce_report(envelope: Envelope, message: Message) -> Optional[Message]:
+    """Return the headers of the mail `message` reports about, if `message` is a bounce.
+
+    Only the envelope, the top-level content type and the top-level parts are looked at, so
+    normal mails are neither walked nor serialized.
+    """
+    if not is_bounce(envelope, message) or not message.is_multipart():
+        return None
+
+    for part in message.get_payload():
+        content_type = part.get_content_type()
+
+        if content_type == "message/rfc822":
+            if part.is_multipart():
+                return part.get_payload(0)
+        elif content_type == "text/rfc822-headers":
+            if (content := part.get_payload(decode=True)) is not None:
+                return parse_message_headers(content)
+
+    return None
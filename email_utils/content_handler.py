@@ -1,91 +1,56 @@
+import uuid
 from datetime import datetime
+from typing import Optional
 
-import lxml.html
-import PIL
 import requests
-from fastapi import HTTPException
-from lxml.etree import _Element, XMLSyntaxError
-from pyquery import PyQuery as pq
+from lxml.etree import _Element
 
 from app.email_report_data import (
     EmailReportData, EmailReportExpandedURLData, EmailReportProxyImageData,
     EmailReportSinglePixelImageTrackerData,
 )
-from app.models import EmailAlias
-from app.models.constants.alias import PROXY_USER_AGENT_STRING_MAP
-from app.utils.image import create_image_url, save_image
+from app.models import EffectivePreferences
+from app.utils.image import create_image_url, save_images
 from email_utils.handlers import check_is_url_a_tracker
+from email_utils.html_rewriter import HTMLVisitor, rewrite_html
 
 __all__ = [
+    "ImageTrackerRemover",
+    "ImageProxyConverter",
+    "ShortenedURLExpander",
     "convert_images",
     "remove_image_trackers",
     "expand_shortened_urls"
 ]
 
 
-def convert_images(
-    report: EmailReportData,
-    /,
-    alias: EmailAlias,
-    html: str,
-) -> str:
-    try:
-        d = pq(lxml.html.fromstring(html))
-    except XMLSyntaxError as error:
-        return html
-
-    for image in d("img"):  # type: _Element
-        source = image.attrib["src"]
-        image.attrib["data-kleckrelay-original-src"] = source
-
-        file = None
-
-        try:
-            file = save_image(
-                url=source,
-                alias=alias,
-            )
-        except (HTTPException, PIL.UnidentifiedImageError, ValueError):
-            pass
-
-        url = create_image_url(
-            original_url=source,
-            alias_id=alias.id,
-            file=file,
-        )
-        image.attrib["src"] = url
-
-        report.proxied_images.append(
-            EmailReportProxyImageData(
-                url=source,
-                created_at=datetime.utcnow(),
-                server_url=url,
-            )
-        )
-
-    return d.outer_html()
-
-
 def check_is_single_pixel_image(image: _Element) -> bool:
     return str(image.attrib.get("width")) == "0" \
         or str(image.attrib.get("height")) == "0" \
            or (str(image.attrib.get("width")) == "1" and str(image.attrib.get("height") == "1"))
 
 
-def remove_image_trackers(report: EmailReportData, /, html: str) -> str:
-    try:
-        d = pq(lxml.html.fromstring(html))
-    except XMLSyntaxError:
-        return html
+def expand_url(url: str, user_agent: str) -> str:
+    response = requests.get(url, headers={"User-Agent": user_agent})
+
+    return response.url
+
+
+class ImageTrackerRemover(HTMLVisitor):
+    tags = ("img",)
 
-    for image in d("img"):  # type: _Element
-        source = image.attrib["src"]
+    def __init__(self, report: EmailReportData, /):
+        self.report = report
+
+    def visit(self, image: _Element) -> None:
+        if (source := image.attrib.get("src")) is None:
+            return
 
         tracker = {}
 
         if check_is_single_pixel_image(image) \
                 or (tracker := check_is_url_a_tracker(source)) is not None:
-            report.single_pixel_images.append(
+            self.report.single_pixel_images.append(
                 EmailReportSinglePixelImageTrackerData(
                     source=source,
                     tracker_name=tracker.get('name'),
@@ -95,36 +60,79 @@ def remove_image_trackers(report: EmailReportData, /, html: str) -> str:
 
             image.getparent().remove(image)
 
-    return d.outer_html()
 
+class ImageProxyConverter(HTMLVisitor):
+    """Converts images to proxy links.
 
-def expand_url(url: str, user_agent: str) -> str:
-    response = requests.get(url, headers={"User-Agent": user_agent})
+    Images are only collected while walking; they are downloaded concurrently in `finish`.
+    """
 
-    return response.url
+    tags = ("img",)
 
+    def __init__(
+        self,
+        report: EmailReportData,
+        /,
+        alias_id: uuid.UUID,
+        preferences: EffectivePreferences,
+        download_deadline: Optional[float] = None,
+    ):
+        self.report = report
+        self.alias_id = alias_id
+        self.preferences = preferences
+        self.download_deadline = download_deadline
+        self.images: list[tuple[_Element, str]] = []
 
-def expand_shortened_urls(
-    report: EmailReportData,
-    /,
-    alias: EmailAlias,
-    html: str
-) -> str:
-    try:
-        d = pq(lxml.html.fromstring(html))
-    except XMLSyntaxError:
-        return html
+    def visit(self, image: _Element) -> None:
+        if (source := image.attrib.get("src")) is None:
+            return
 
-    for link in d("a"):  # type: _Element
-        source = link.attrib["href"]
-        link.attrib["data-kleckrelay-original-href"] = source
-        url = expand_url(
-            source,
-            PROXY_USER_AGENT_STRING_MAP[alias.proxy_user_agent]
+        image.attrib["data-kleckrelay-original-src"] = source
+
+        self.images.append((image, source))
+
+    def finish(self) -> None:
+        files = save_images(
+            [source for _, source in self.images],
+            user_agent=self.preferences.proxy_user_agent,
+            preferred_type=self.preferences.proxy_image_format,
+            deadline=self.download_deadline,
         )
+
+        for image, source in self.images:
+            # Images without a file will be downloaded once the user views them
+            url = create_image_url(
+                original_url=source,
+                alias_id=self.alias_id,
+                file=files[source],
+            )
+            image.attrib["src"] = url
+
+            self.report.proxied_images.append(
+                EmailReportProxyImageData(
+                    url=source,
+                    created_at=datetime.utcnow(),
+                    server_url=url,
+                )
+            )
+
+
+class ShortenedURLExpander(HTMLVisitor):
+    tags = ("a",)
+
+    def __init__(self, report: EmailReportData, /, preferences: EffectivePreferences):
+        self.report = report
+        self.user_agent = preferences.user_agent_string
+
+    def visit(self, link: _Element) -> None:
+        if (source := link.attrib.get("href")) is None:
+            return
+
+        link.attrib["data-kleckrelay-original-href"] = source
+        url = expand_url(source, self.user_agent)
         link.attrib["href"] = url
 
-        report.expanded_urls.append(
+        self.report.expanded_urls.append(
             EmailReportExpandedURLData(
                 original_url=source,
                 expanded_url=url,
@@ -132,4 +140,28 @@ def expand_shortened_urls(
             )
         )
 
-    return d.outer_html()
+
+def convert_images(
+    report: EmailReportData,
+    /,
+    alias_id: uuid.UUID,
+    preferences: EffectivePreferences,
+    html: str,
+) -> str:
+    return rewrite_html(
+        html,
+        [ImageProxyConverter(report, alias_id=alias_id, preferences=preferences)],
+    )
+
+
+def remove_image_trackers(report: EmailReportData, /, html: str) -> str:
+    return rewrite_html(html, [ImageTrackerRemover(report)])
+
+
+def expand_shortened_urls(
+    report: EmailReportData,
+    /,
+    preferences: EffectivePreferences,
+    html: str
+) -> str:
+    return rewrite_html(html, [ShortenedURLExpander(report, preferences=preferences)])
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from app import logger
 from app.controllers import server_statistics
-from app.controllers.alias import get_alias_by_local_and_domain
+from app.controllers.alias import get_alias_for_routing
 from app.controllers.email import get_email_by_address
 from app.controllers.reserved_alias import get_reserved_alias_by_address
 from app.utils.email import normalize_email
@@ -63,12 +63,12 @@ async def handle_local_to_outside(
     else:
         # Local alias
         try:
-            alias = get_alias_by_local_and_domain(db, local=local, domain=domain)
+            alias = get_alias_for_routing(db, local=local, domain=domain)
         except NoResultFound:
             logger.info("Alias does not exist. Raising error.")
             raise AliasNotYoursError()
 
-        if user != alias.user:
+        if user.id != alias.user_id:
             logger.info("User does not own the alias. Raising error.")
             raise AliasNotYoursError()
 
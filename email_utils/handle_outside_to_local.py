@@ -1,4 +1,5 @@
 from email.message import Message
+from typing import Optional
 
 from aiosmtpd.smtp import Envelope
 from sqlalchemy.orm import Session
@@ -6,16 +7,17 @@ from sqlalchemy.orm import Session
 from app.controllers import server_statistics
 from app.controllers import global_settings as settings
 from app import logger
-from app.controllers.email_report import create_email_report
+from app.controllers.email_report import queue_email_report
 from app.email_report_data import EmailReportData
-from app.models import EmailAlias
+from app.controllers.alias_routing import AliasRoute
+from app.utils.image import create_download_deadline
 from email_utils import headers
 from email_utils.bounce_messages import generate_forward_status, StatusType
 from email_utils.content_handler import (
-    convert_images, expand_shortened_urls,
-    remove_image_trackers,
+    ImageProxyConverter, ImageTrackerRemover, ShortenedURLExpander,
 )
 from email_utils.headers import delete_header, set_header
+from email_utils.html_rewriter import HTMLVisitor, rewrite_html
 from email_utils.send_mail import send_mail
 from email_utils.utils import find_email_content, get_header_unicode
 from email_utils.validators import validate_alias
@@ -31,7 +33,7 @@ def handle_outside_to_local(
     /,
     envelope: Envelope,
     message: Message,
-    alias: EmailAlias,
+    alias: AliasRoute,
     message_id: str,
 ) -> None:
     logger.info("Mail is an alias mail (OUTSIDE wants to send to LOCAL).")
@@ -49,6 +51,8 @@ def handle_outside_to_local(
         subject=get_header_unicode(message[headers.SUBJECT]),
         message_id=message[headers.MESSAGE_ID],
     )
+    # All HTML parts of the mail share one time budget for downloading their images
+    image_download_deadline = create_download_deadline()
 
     for part, content in find_email_content(message):
         match part.get_content_type():
@@ -58,6 +62,7 @@ def handle_outside_to_local(
                     alias=alias,
                     report=report,
                     content=content,
+                    image_download_deadline=image_download_deadline,
                 )
                 delete_header(part, headers.CONTENT_TRANSFER_ENCODING)
 
@@ -72,14 +77,6 @@ def handle_outside_to_local(
                 message.set_payload(content, "utf-8")
 
     logger.info("Parsing content done.")
-    if alias.create_mail_report and alias.user.public_key is not None:
-        logger.info("Creating mail report.")
-        create_email_report(
-            db,
-            report_data=report,
-            user=alias.user,
-        )
-
     set_header(
         message,
         headers.KLECK_FORWARD_STATUS,
@@ -94,13 +91,22 @@ def handle_outside_to_local(
         message,
         from_mail=alias.create_outside_email(envelope.mail_from),
         from_name=envelope.mail_from,
-        to_mail=alias.user.email.address,
+        to_mail=alias.target_address,
     )
     server_statistics.add_sent_email(db)
 
+    # Only once the mail has been sent, as the spool retries mails that failed to be sent
+    if alias.preferences.create_mail_report and alias.public_key is not None:
+        logger.info("Queueing mail report.")
+        queue_email_report(
+            report_data=report,
+            user_id=alias.user_id,
+            public_key=alias.public_key,
+        )
+
 
 def parse_text(
-    alias: EmailAlias,
+    alias: AliasRoute,
     content: str,
 ) -> str:
     return content
@@ -109,23 +115,35 @@ def parse_text(
 def parse_html(
     db: Session,
     /,
-    alias: EmailAlias,
+    alias: AliasRoute,
     report: EmailReportData,
     content: str,
+    image_download_deadline: Optional[float] = None,
 ) -> str:
     enable_image_proxy = settings.get(db, "ENABLE_IMAGE_PROXY")
+    visitors: list[HTMLVisitor] = []
 
-    if alias.remove_trackers:
+    # Trackers must be removed first so that they won't be proxied
+    if alias.preferences.remove_trackers:
         logger.info("Removing single pixel image trackers.")
-        content = remove_image_trackers(report, html=content)
+        visitors.append(ImageTrackerRemover(report))
 
-    if enable_image_proxy and alias.proxy_images:
+    if enable_image_proxy and alias.preferences.proxy_images:
         logger.info("Converting images to proxy links.")
-        content = convert_images(report, alias=alias, html=content)
+        visitors.append(
+            ImageProxyConverter(
+                report,
+                alias_id=alias.id,
+                preferences=alias.preferences,
+                download_deadline=image_download_deadline,
+            )
+        )
 
-    if alias.expand_url_shorteners:
+    if alias.preferences.expand_url_shorteners:
         logger.info("Expanding shortened URLs.")
-        content = expand_shortened_urls(report, alias=alias, html=content)
+        visitors.append(ShortenedURLExpander(report, preferences=alias.preferences))
+
+    content = rewrite_html(content, visitors)
 
     server_statistics.add_removed_trackers(db, len(report.single_pixel_images))
     server_statistics.add_proxied_images(db, len(report.proxied_images))
@@ -1,20 +1,16 @@
 import logging
+import smtplib
 
 import binascii
 from mailbox import Message
-from typing import Union
 
 from aiosmtpd.smtp import Envelope
-from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import Alias
+from sqlalchemy.exc import InterfaceError, OperationalError
 
 from app import life_constants, logger
-from app.controllers.alias import get_alias_by_local_and_domain
+from app.controllers.alias_routing import AliasRoute, ReservedAliasRoute, resolve_alias_route
 from app.controllers import server_statistics
-from app.controllers.reserved_alias import get_reserved_alias_by_address
 from app.database.dependencies import with_db
-from app.models import ReservedAlias
 from email_utils import status
 from email_utils.errors import AliasNotFoundError, EmailHandlerError
 from email_utils.send_mail import (
@@ -28,26 +24,39 @@ from . import headers
 from .bounce_messages import (
     extract_forward_status, extract_forward_status_header, extract_in_reply_to_header,
     generate_forward_status,
-    get_report_from_message, is_not_deliverable, StatusType,
+    get_bounce_report, is_not_deliverable, StatusType,
 )
 from .handle_local_to_outside import handle_local_to_outside
 from .handle_outside_to_local import handle_outside_to_local
 from .headers import set_header
+from .workers import run_coroutine_in_worker
 
 __all__ = [
     "handle",
 ]
 
 
-def get_alias(db: Session, /, local: str, domain: str) -> Union[Alias, ReservedAlias, None]:
-    # Try reserved alias
-    try:
-        return get_reserved_alias_by_address(db, local=local, domain=domain)
-    except NoResultFound:
-        pass
+def _is_temporary_error(error: Exception) -> bool:
+    """Whether handling the mail again later may succeed."""
+    # The database is unavailable
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+
+    # The relay is unavailable
+    return isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError))
 
 
 async def handle(envelope: Envelope, message: Message) -> str:
+    return await run_coroutine_in_worker(_handle, envelope, message)
+
+
+async def _handle(envelope: Envelope, message: Message) -> str:
     logger.info("Retrieving mail from database.")
 
     original_message_id = ""
@@ -59,28 +68,29 @@ async def handle(envelope: Envelope, message: Message) -> str:
             set_header(message, headers.MESSAGE_ID, message_id)
 
             logger.info("Checking if mail is a bounce mail from us.")
-            if (report_message := get_report_from_message(message)) is not None:
+            if (report_message := get_bounce_report(envelope, message)) is not None:
                 if (forward_status := extract_forward_status_header(report_message)) is not None:
                     logger.info("Mail is a bounce mail from us. Extracting data.")
 
                     try:
                         data = extract_forward_status(forward_status)
+                        status_type = StatusType(data["type"])
                     except (ValueError, binascii.Error):
                         logger.info("Forward status is invalid. Ignoring mail.")
                         return status.E200
 
                     logger.info(f"Data is {data=}.")
 
-                    if data["status_type"] == StatusType.FORWARD_ALIAS_TO_OUTSIDE:
+                    if status_type == StatusType.FORWARD_ALIAS_TO_OUTSIDE:
                         logger.info(
                             "Mail should originally be forwarded FROM a local alias TO the "
                             "outside. Informing local user."
                         )
 
                         local, domain = envelope.rcpt_tos[0].split("@")
-                        try:
-                            alias = get_alias_by_local_and_domain(db, local=local, domain=domain)
-                        except NoResultFound:
+                        alias = resolve_alias_route(db, local=local, domain=domain)
+
+                        if not isinstance(alias, AliasRoute):
                             logger.info("Alias does not exist. We can't inform the user.")
                             return status.E200
 
@@ -103,29 +113,38 @@ async def handle(envelope: Envelope, message: Message) -> str:
                                     "server_url": life_constants.APP_DOMAIN,
                                 }
                             ),
-                            to_mail=alias.user.email.address,
+                            to_mail=alias.target_address,
                             extra_headers={
                                 headers.IN_REPLY_TO: extract_in_reply_to_header(report_message),
                             }
                         )
 
                         return status.E200
-                    elif data["status_type"] == StatusType.FORWARD_OUTSIDE_TO_ALIAS:
+                    elif status_type == StatusType.FORWARD_OUTSIDE_TO_ALIAS:
                         logger.info(
                             "Mail should originally be forwarded FROM the outside TO a local alias. "
                             "Informing outside user."
                         )
 
+                        # The bounce is sent to the relay address the mail was forwarded from
+                        if (
+                            not data["outside_address"]
+                            or data["outside_address"] == "<>"
+                            or (alias_address := extract_alias_address(envelope.rcpt_tos[0])) is None
+                        ):
+                            logger.info("Outside user is unknown. We can't inform them.")
+                            return status.E200
+
                         send_mail(
                             message=draft_message(
                                 subject="Your mail could not be delivered",
-                                template="not-deliverable-to-web",
+                                template="not-deliverable-to-server",
                                 context={
                                     "title": "Your mail could not be delivered",
                                     "preview_text": "Your mail could not be delivered",
                                     "body":
                                         f"We are sorry, but we couldn't deliver your email to "
-                                        f"{data['outside_address']}. We tried to send it, "
+                                        f"{alias_address[0]}. We tried to forward it, "
                                         f"but the user's server couldn't receive it.",
                                     "explanation":
                                         "We recommend you to try it again later. "
@@ -133,18 +152,15 @@ async def handle(envelope: Envelope, message: Message) -> str:
                                     "server_url": life_constants.APP_DOMAIN,
                                 }
                             ),
-                            to_mail=envelope.rcpt_tos[0],
-                            extra_headers={
-                                headers.REPLY_TO: extract_in_reply_to_header(report_message),
-                            }
+                            to_mail=data["outside_address"],
                         )
 
                         return status.E200
-                    elif data["status_type"] == StatusType.BOUNCE:
+                    elif status_type == StatusType.BOUNCE:
                         logger.info("Mail is a bounce mail from us. Nothing to do.")
 
                         return status.E200
-                    elif data["status_type"] == StatusType.OFFICIAL:
+                    elif status_type == StatusType.OFFICIAL:
                         # Todo: Inform admins
                         return status.E200
 
@@ -177,11 +193,9 @@ async def handle(envelope: Envelope, message: Message) -> str:
             )
 
             local, domain = envelope.rcpt_tos[0].split("@")
-            try:
-                alias = get_alias_by_local_and_domain(db, local=local, domain=domain)
-            except NoResultFound:
-                pass
-            else:
+            alias = resolve_alias_route(db, local=local, domain=domain)
+
+            if isinstance(alias, AliasRoute):
                 # OUTSIDE user wants to send a mail TO an alias
                 handle_outside_to_local(
                     db,
@@ -196,10 +210,9 @@ async def handle(envelope: Envelope, message: Message) -> str:
             logger.info(
                 f"Checking if DESTINATION mail {envelope.rcpt_tos[0]} is an reserved alias mail."
             )
-            local, domain = envelope.rcpt_tos[0].split("@")
-            if reserved_alias := get_reserved_alias_by_address(db, local=local, domain=domain):
+            if isinstance(alias, ReservedAliasRoute):
                 # OUTSIDE user wants to send a mail TO a reserved alias.
-                validate_alias(reserved_alias)
+                validate_alias(alias)
 
                 set_header(
                     message,
@@ -211,13 +224,24 @@ async def handle(envelope: Envelope, message: Message) -> str:
                     )
                 )
 
-                for user in reserved_alias.users:
-                    send_mail(
-                        message,
-                        from_mail=reserved_alias.create_outside_email(envelope.mail_from),
-                        from_name=envelope.mail_from,
-                        to_mail=user.email.address,
-                    )
+                errors = []
+
+                for address in alias.target_addresses:
+                    try:
+                        send_mail(
+                            message,
+                            from_mail=alias.create_outside_email(envelope.mail_from),
+                            from_name=envelope.mail_from,
+                            to_mail=address,
+                        )
+                    except Exception as error:
+                        logger.warning(f"Could not send mail to {address}: {error}.")
+                        errors.append(error)
+
+                # Retrying would send the mail to the addresses that received it again
+                if len(errors) == len(alias.target_addresses) and errors:
+                    raise errors[0]
+
                 server_statistics.add_sent_email(db)
 
                 return status.E200
@@ -257,4 +281,8 @@ async def handle(envelope: Envelope, message: Message) -> str:
             logging.error(error, exc_info=True)
             logger.info("Exception occurred.")
 
+            # The spool tries again later, so only errors that may go away are temporary
+            if _is_temporary_error(error):
+                return status.E404
+
             return status.E501
@@ -1,7 +1,7 @@
 import fnmatch
 import json
 import re
-from typing import Optional
+from typing import Generic, Optional, TypeVar
 from urllib.parse import urlparse
 
 from app.constants import ROOT_DIR
@@ -15,11 +15,14 @@ url_shorteners_data: UrlShortenersJsonFile = json.load(URL_SHORTENERS_PATH.open(
 
 
 __all__ = [
+    "PatternMatcher",
     "check_pattern_matches",
     "check_is_url_a_tracker",
     "check_is_a_url_shortener",
 ]
 
+T = TypeVar("T", TrackerData, ShortenerData)
+
 
 def check_pattern_matches(url: str, pattern) -> bool:
     result = urlparse(url)
@@ -32,19 +35,87 @@ def check_pattern_matches(url: str, pattern) -> bool:
         return re.search(pattern['pattern'], url) is not None
 
 
-def check_is_url_a_tracker(url: str) -> Optional[TrackerData]:
-    blacklisted_trackers = tracker_data["trackers"]["blacklist"]
+class PatternMatcher(Generic[T]):
+    """Matches URLs against the patterns of a list of entries (trackers, shorteners, ...).
 
-    for tracker in blacklisted_trackers:
-        for pattern in tracker["patterns"]:
-            if check_pattern_matches(url, pattern):
-                return tracker
+    All patterns are compiled once:
+        - `domain` patterns are stored in a hostname index
+        - `glob` patterns are translated and merged into one regex
+        - `regex` patterns are pre-compiled
 
+    `find` returns the first entry (in list order) that has a matching pattern, just like
+    checking every pattern one by one would.
+    """
 
-def check_is_a_url_shortener(url: str) -> Optional[ShortenerData]:
-    url_shorteners = url_shorteners_data["shorteners"]["blacklist"]
+    def __init__(self, entries: list[T]):
+        self.entries = entries
+        self._domains: dict[str, int] = {}
+        self._glob_groups: dict[str, int] = {}
+        self._regexes: list[tuple[int, re.Pattern]] = []
+
+        globs = []
+
+        for index, entry in enumerate(entries):
+            for pattern in entry["patterns"]:
+                match pattern["type"]:
+                    case "domain":
+                        self._domains.setdefault(pattern["pattern"].lower(), index)
+                    case "glob":
+                        group_name = f"pattern_{len(globs)}"
+                        self._glob_groups[group_name] = index
+                        globs.append(
+                            f"(?P<{group_name}>{fnmatch.translate(pattern['pattern'])})"
+                        )
+                    case "regex":
+                        self._regexes.append((index, re.compile(pattern["pattern"])))
+
+        # Alternatives are tried in order, so the first matching glob is the one of the
+        # entry with the lowest index
+        self._glob_regex = re.compile("|".join(globs)) if globs else None
+
+    def _find_index(self, url: str) -> Optional[int]:
+        try:
+            hostname = urlparse(url).hostname
+        except ValueError:
+            hostname = None
+
+        best_index = self._domains.get(hostname) if hostname is not None else None
+
+        if self._glob_regex is not None \
+                and (match := self._glob_regex.match(url)) is not None:
+            index = self._glob_groups[match.lastgroup]
+
+            if best_index is None or index < best_index:
+                best_index = index
+
+        for index, regex in self._regexes:
+            if best_index is not None and index >= best_index:
+                break
 
-    for shortener in url_shorteners:
-        for pattern in shortener["patterns"]:
-            if check_pattern_matches(url, pattern):
-                return shortener
+            if regex.search(url) is not None:
+                best_index = index
+                break
+
+        return best_index
+
+    def find(self, url: str) -> Optional[T]:
+        if (index := self._find_index(url)) is not None:
+            return self.entries[index]
+
+        return None
+
+
+tracker_matcher: PatternMatcher[TrackerData] = PatternMatcher(
+    tracker_data["trackers"]["blacklist"]
+)
+url_shortener_matcher: PatternMatcher[ShortenerData] = PatternMatcher(
+    url_shorteners_data["shorteners"]["blocklist"]
+)
+
+
+def check_is_url_a_tracker(url: str) -> Optional[TrackerData]:
+    return tracker_matcher.find(url)
+
+
+def check_is_a_url_shortener(url: str) -> Optional[ShortenerData]:
+    return url_shortener_matcher.find(url)
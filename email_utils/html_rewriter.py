@@ -0,0 +1,65 @@
+import lxml.html
+from lxml.etree import _Element, XMLSyntaxError
+from pyquery import PyQuery as pq
+
+__all__ = [
+    "HTMLVisitor",
+    "rewrite_html",
+]
+
+
+class HTMLVisitor:
+    """Base class for visitors run by `rewrite_html`.
+
+    `visit` is called for every element whose tag is in `tags`, in document order. `finish` is
+    called once after the whole document has been walked, before it is serialized.
+    """
+
+    tags: tuple[str, ...] = ()
+
+    def visit(self, element: _Element) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+def _is_detached(element: _Element, root: _Element) -> bool:
+    return element is not root and element.getparent() is None
+
+
+def rewrite_html(html: str, /, visitors: list[HTMLVisitor]) -> str:
+    """Parse `html` once, run all `visitors` over a single walk and serialize once.
+
+    Visitors are run in the given order for each element. If a visitor removes an element from
+    the tree, the remaining visitors are skipped for it.
+    """
+    visitors = [visitor for visitor in visitors if visitor.tags]
+
+    if not visitors:
+        return html
+
+    try:
+        root = lxml.html.fromstring(html)
+    except XMLSyntaxError:
+        return html
+
+    tags = {
+        tag
+        for visitor in visitors
+        for tag in visitor.tags
+    }
+
+    # Materialize the elements first, as visitors may remove elements while walking
+    for element in list(root.iter(*tags)):  # type: _Element
+        for visitor in visitors:
+            if _is_detached(element, root):
+                break
+
+            if element.tag in visitor.tags:
+                visitor.visit(element)
+
+    for visitor in visitors:
+        visitor.finish()
+
+    return pq(root).outer_html()
@@ -1,5 +1,3 @@
-import smtplib
-import time
 from email.message import Message
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -9,6 +7,7 @@ from app import life_constants, logger
 from . import formatters, headers
 from .bounce_messages import generate_forward_status, StatusType
 from .headers import set_header
+from .smtp_pool import smtp_pool
 from .template_renderer import render
 from .utils import message_to_bytes
 
@@ -27,21 +26,12 @@ def _send_mail_to_smtp_server(
         f"Send mail -> Sending mail {from_address=} {to_address=}; "
         f"Postfix Host={life_constants.POSTFIX_HOST}, Postfix Port={life_constants.POSTFIX_PORT}."
     )
-    with smtplib.SMTP(host=life_constants.POSTFIX_HOST, port=life_constants.POSTFIX_PORT) as smtp:
-        logger.info("Send mail -> Activating TLS.")
-        if life_constants.IS_DEBUG:
-            time.sleep(1)
-
-        if not life_constants.IS_DEBUG:
-            smtp.starttls()
-
-        logger.info("Send mail -> Sending mail now.")
-        smtp.sendmail(
-            from_addr=from_address,
-            to_addrs=to_address,
-            msg=message_to_bytes(message),
-        )
-        logger.info("Send mail -> Mail sent successfully.")
+    smtp_pool.send(
+        from_address=from_address,
+        to_address=to_address,
+        content=message_to_bytes(message),
+    )
+    logger.info("Send mail -> Mail sent successfully.")
 
 
 def _debug_email(
@@ -61,14 +51,16 @@ def send_mail(
     to_mail: str,
     from_mail: str = life_constants.FROM_MAIL,
     from_name: Optional[str] = None,
-    extra_headers: dict[str, str] = None,
+    extra_headers: dict[str, Optional[str]] = None,
 ):
     logger.info(f"Send Mail -> Send new mail {from_mail=} {to_mail=}.")
     from_name = from_name or from_mail
 
     if extra_headers:
         for header, value in extra_headers.items():
-            set_header(message, header, value)
+            # Headers extracted from bounces may be missing
+            if value is not None:
+                set_header(message, header, value)
 
     set_header(
         message,
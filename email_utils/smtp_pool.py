@@ -0,0 +1,152 @@
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import ContextManager, Optional
+
+from app import life_constants, logger
+
+__all__ = [
+    "SMTPConnectionPool",
+    "smtp_pool",
+]
+
+# Idle connections are checked with a `NOOP` before being reused after this time
+HEALTH_CHECK_AFTER_IN_SECONDS = 5
+
+
+class SMTPConnectionPool:
+    """Keeps SMTP connections (including their TLS sessions) open between mails.
+
+    At most `size` connections are open at the same time. Connections are reset with `RSET`
+    before they are put back. Connections that have been idle for longer than `max_idle_time`
+    seconds are closed instead of being reused.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        max_idle_time: int,
+        use_tls: bool,
+    ):
+        self.host = host
+        self.port = port
+        self.max_idle_time = max_idle_time
+        self.use_tls = use_tls
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        # (connection, time it has been put back)
+        self._idle_connections: deque[tuple[smtplib.SMTP, float]] = deque()
+
+    def _connect(self) -> smtplib.SMTP:
+        logger.info(f"SMTP Pool -> Connecting to {self.host}:{self.port}.")
+        smtp = smtplib.SMTP(host=self.host, port=self.port)
+
+        if self.use_tls:
+            logger.info("SMTP Pool -> Activating TLS.")
+            smtp.starttls()
+
+        return smtp
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except smtplib.SMTPException:
+            smtp.close()
+        except OSError:
+            smtp.close()
+
+    @staticmethod
+    def _is_healthy(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _get_idle_connection(self) -> Optional[smtplib.SMTP]:
+        while True:
+            with self._lock:
+                if not self._idle_connections:
+                    return None
+
+                # Reuse the most recently used connection, so that rarely used ones expire
+                smtp, released_at = self._idle_connections.pop()
+
+            idle_time = time.monotonic() - released_at
+
+            if idle_time > self.max_idle_time:
+                self._close(smtp)
+                continue
+
+            if idle_time > HEALTH_CHECK_AFTER_IN_SECONDS and not self._is_healthy(smtp):
+                logger.info("SMTP Pool -> Idle connection is not healthy anymore. Closing it.")
+                self._close(smtp)
+                continue
+
+            return smtp
+
+    def _release(self, smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.rset()
+        except (smtplib.SMTPException, OSError):
+            self._close(smtp)
+            return
+
+        with self._lock:
+            self._idle_connections.append((smtp, time.monotonic()))
+
+    @contextmanager
+    def connection(self) -> ContextManager[smtplib.SMTP]:
+        with self._slots:
+            smtp = self._get_idle_connection() or self._connect()
+
+            try:
+                yield smtp
+            except smtplib.SMTPServerDisconnected:
+                smtp.close()
+                raise
+            except smtplib.SMTPException:
+                # The server is still connected, the mail itself has been rejected
+                self._release(smtp)
+                raise
+            except BaseException:
+                self._close(smtp)
+                raise
+            else:
+                self._release(smtp)
+
+    def send(self, from_address: str, to_address: str, content: bytes) -> None:
+        """Send a mail, reconnecting once if a pooled connection has been dropped."""
+        try:
+            with self.connection() as smtp:
+                smtp.sendmail(from_addr=from_address, to_addrs=to_address, msg=content)
+        except smtplib.SMTPServerDisconnected:
+            logger.info("SMTP Pool -> Server disconnected. Retrying with a new connection.")
+
+            # The server probably dropped all of our idle connections
+            self.close()
+
+            with self.connection() as smtp:
+                smtp.sendmail(from_addr=from_address, to_addrs=to_address, msg=content)
+
+    def close(self) -> None:
+        with self._lock:
+            connections = list(self._idle_connections)
+            self._idle_connections.clear()
+
+        for smtp, _ in connections:
+            self._close(smtp)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=life_constants.POSTFIX_HOST,
+    port=life_constants.POSTFIX_PORT,
+    size=life_constants.POSTFIX_POOL_SIZE,
+    max_idle_time=life_constants.POSTFIX_POOL_MAX_IDLE_TIME_IN_SECONDS,
+    use_tls=not life_constants.IS_DEBUG,
+)
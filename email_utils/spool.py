@@ -0,0 +1,341 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from email.message import Message
+from pathlib import Path
+from typing import Optional
+
+from aiosmtpd.smtp import Envelope
+
+from app import life_constants, logger
+from app.constants import ROOT_DIR
+from .bounce_messages import is_not_deliverable
+from .handler import handle
+from .sanitizers import sanitize_message
+from .send_mail import draft_message, send_mail
+from .utils import parse_message, parse_message_headers
+from .workers import run_in_worker
+
+__all__ = [
+    "SpoolEntry",
+    "SpoolStatistics",
+    "enqueue",
+    "recover",
+    "claim_ready_entries",
+    "process_entry",
+    "process_forever",
+    "get_spool_statistics",
+]
+
+# Mails are accepted into `incoming`, moved to `processing` while being handled and moved to
+# `failed` once all attempts have been used up:
+#   <state>/<time of the next attempt in ms>-<id>.spool
+# Entries in `processing` are kept in a folder named after the pid of the process handling them,
+# so that the entries of a dead process can be put back.
+# The modification time of an entry is always the time it has been accepted.
+# Entries consist of one line of JSON metadata followed by the raw mail.
+SPOOL_PATH = ROOT_DIR / "storage" / "spool"
+ENTRY_SUFFIX = ".spool"
+INCOMING = "incoming"
+PROCESSING = "processing"
+FAILED = "failed"
+
+
+@dataclass
+class SpoolEntry:
+    path: Path
+    id: str
+    mail_from: Optional[str]
+    rcpt_tos: list[str]
+    content: bytes
+    attempts: int
+    accepted_at: float
+
+
+@dataclass
+class SpoolStatistics:
+    incoming_amount: int
+    processing_amount: int
+    failed_amount: int
+    oldest_age_in_seconds: float
+
+
+def _get_folder(state: str) -> Path:
+    folder = SPOOL_PATH / state
+    folder.mkdir(parents=True, exist_ok=True)
+
+    return folder
+
+
+def _get_next_attempt_at(path: Path) -> float:
+    return int(path.name.split("-", 1)[0]) / 1000
+
+
+def _sync_folder(folder: Path) -> None:
+    # Makes renames into `folder` survive crashes
+    descriptor = os.open(folder, os.O_RDONLY)
+
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _write_entry(entry: SpoolEntry, state: str, next_attempt_at: float) -> Path:
+    folder = _get_folder(state)
+    path = folder / f"{int(next_attempt_at * 1000):015d}-{entry.id}{ENTRY_SUFFIX}"
+    temporary_file = folder / f".{entry.id}.tmp"
+
+    metadata = json.dumps({
+        "id": entry.id,
+        "mail_from": entry.mail_from,
+        "rcpt_tos": entry.rcpt_tos,
+        "attempts": entry.attempts,
+        "accepted_at": entry.accepted_at,
+    })
+
+    with temporary_file.open("wb") as file:
+        file.write(metadata.encode("utf-8") + b"\n")
+        file.write(entry.content)
+        file.flush()
+        # Accepted mails must not be lost or left empty after a crash
+        os.fsync(file.fileno())
+
+    os.utime(temporary_file, (entry.accepted_at, entry.accepted_at))
+    # Replacing is atomic, so the workers never see partially written entries
+    os.replace(temporary_file, path)
+    _sync_folder(folder)
+
+    return path
+
+
+def _read_entry(path: Path) -> SpoolEntry:
+    with path.open("rb") as file:
+        data = json.loads(file.readline())
+        content = file.read()
+
+    return SpoolEntry(
+        path=path,
+        id=data["id"],
+        mail_from=data["mail_from"],
+        rcpt_tos=data["rcpt_tos"],
+        content=content,
+        attempts=data["attempts"],
+        accepted_at=data["accepted_at"],
+    )
+
+
+def enqueue(envelope: Envelope) -> SpoolEntry:
+    """Persist a validated `envelope`. Once this returns, the mail may be accepted."""
+    now = time.time()
+    entry = SpoolEntry(
+        path=Path(),
+        id=str(uuid.uuid4()),
+        mail_from=envelope.mail_from,
+        rcpt_tos=envelope.rcpt_tos,
+        content=envelope.original_content,
+        attempts=0,
+        accepted_at=now,
+    )
+    entry.path = _write_entry(entry, INCOMING, next_attempt_at=now)
+
+    logger.info(f"Spool -> Mail {entry.id} has been spooled.")
+
+    return entry
+
+
+def recover(pid: Optional[int] = None) -> int:
+    """Put back entries that were being processed when the handler stopped.
+
+    If `pid` is given, only the entries of that process are put back. It must not be running
+    anymore.
+
+    Returns the amount of recovered entries.
+    """
+    pattern = f"*/*{ENTRY_SUFFIX}" if pid is None else f"{pid}/*{ENTRY_SUFFIX}"
+    count = 0
+
+    for path in _get_folder(PROCESSING).glob(pattern):
+        os.replace(path, _get_folder(INCOMING) / path.name)
+        count += 1
+
+    if count:
+        logger.info(f"Spool -> Recovered {count} interrupted mails.")
+
+    return count
+
+
+def claim_ready_entries(limit: int) -> list[SpoolEntry]:
+    """Move up to `limit` entries that are due into `processing` and return them."""
+    now = time.time()
+    entries = []
+    processing_folder = _get_folder(f"{PROCESSING}/{os.getpid()}")
+
+    # Names start with the time of the next attempt, so due entries come first
+    for path in sorted(_get_folder(INCOMING).glob(f"*{ENTRY_SUFFIX}")):
+        if len(entries) >= limit or _get_next_attempt_at(path) > now:
+            break
+
+        claimed_path = processing_folder / path.name
+
+        try:
+            os.replace(path, claimed_path)
+        except FileNotFoundError:
+            # Claimed by another worker
+            continue
+
+        try:
+            entries.append(_read_entry(claimed_path))
+        except (ValueError, KeyError, TypeError) as error:
+            logger.warning(
+                f"Spool -> Entry {path.name} is unreadable: {error}. Moving it to failed."
+            )
+            os.replace(claimed_path, _get_folder(FAILED) / path.name)
+
+    return entries
+
+
+def _complete(entry: SpoolEntry) -> None:
+    entry.path.unlink(missing_ok=True)
+
+
+def _inform_sender(entry: SpoolEntry) -> None:
+    envelope = Envelope()
+    envelope.mail_from = entry.mail_from
+
+    if not entry.mail_from or is_not_deliverable(envelope, parse_message_headers(entry.content)):
+        return
+
+    try:
+        send_mail(
+            to_mail=entry.mail_from,
+            message=draft_message(
+                template="not-deliverable-to-server",
+                subject="Your email could not be delivered",
+                context={
+                    "title": "We could not deliver your email.",
+                    "preview_text": "We could not deliver your email.",
+                    "body":
+                        f"We are sorry, but we couldn't deliver your email to "
+                        f"{entry.rcpt_tos[0]}. We tried to deliver it "
+                        f"{entry.attempts} times, but an error occurred each time."
+                    ,
+                    "explanation": "We recommend you to try again later.",
+                    "server_url": life_constants.APP_DOMAIN,
+                }
+            )
+        )
+    except Exception as error:
+        logger.warning(f"Spool -> Could not inform sender of mail {entry.id}: {error}.")
+
+
+def _reschedule(entry: SpoolEntry) -> None:
+    entry.attempts += 1
+    has_failed = entry.attempts >= life_constants.EMAIL_SPOOL_MAX_ATTEMPTS
+
+    if has_failed:
+        logger.warning(
+            f"Spool -> Mail {entry.id} could not be handled after {entry.attempts} attempts. "
+            f"Giving up."
+        )
+        _write_entry(entry, FAILED, next_attempt_at=time.time())
+    else:
+        delay = life_constants.EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS * 2 ** (entry.attempts - 1)
+        logger.info(f"Spool -> Retrying mail {entry.id} in {delay} seconds.")
+        _write_entry(entry, INCOMING, next_attempt_at=time.time() + delay)
+
+    entry.path.unlink(missing_ok=True)
+
+    if has_failed:
+        _inform_sender(entry)
+
+
+def _build_mail(entry: SpoolEntry) -> tuple[Envelope, Message]:
+    envelope = Envelope()
+    envelope.mail_from = entry.mail_from
+    envelope.rcpt_tos = entry.rcpt_tos
+    envelope.original_content = entry.content
+    envelope.content = entry.content
+
+    message = parse_message(entry.content)
+    sanitize_message(message)
+
+    return envelope, message
+
+
+async def process_entry(entry: SpoolEntry) -> None:
+    logger.info(f"Spool -> Processing mail {entry.id}; attempt {entry.attempts + 1}.")
+
+    try:
+        envelope, message = await run_in_worker(_build_mail, entry)
+        status_code = await handle(envelope, message)
+    except Exception as error:
+        logger.warning(f"Spool -> An error occurred while handling mail {entry.id}: {error}.")
+        status_code = None
+
+    # Only temporary errors are retried, all other errors have already been reported back
+    if status_code is None or status_code.startswith("4"):
+        await run_in_worker(_reschedule, entry)
+    else:
+        logger.info(f"Spool -> Mail {entry.id} handled with status code: {status_code}.")
+        await run_in_worker(_complete, entry)
+
+
+async def process_forever(
+    stop_event: Optional[threading.Event] = None,
+    recover_interrupted: bool = True,
+) -> None:
+    """Handle spooled mails until `stop_event` is set, then wait for the running ones.
+
+    Only one process may recover interrupted mails, as it can't tell them apart from mails that
+    are being processed by other processes.
+    """
+    if recover_interrupted:
+        await run_in_worker(recover)
+
+    stop_event = stop_event or threading.Event()
+    tasks: set[asyncio.Task] = set()
+
+    while not stop_event.is_set():
+        free_slots = life_constants.EMAIL_HANDLER_MAX_WORKERS - len(tasks)
+
+        if free_slots > 0:
+            for entry in await run_in_worker(claim_ready_entries, free_slots):
+                task = asyncio.create_task(process_entry(entry))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        await asyncio.sleep(life_constants.EMAIL_SPOOL_POLL_INTERVAL_IN_SECONDS)
+
+    if tasks:
+        logger.info(f"Spool -> Waiting for {len(tasks)} mails to be handled.")
+        await asyncio.gather(*tasks)
+
+
+def get_spool_statistics() -> SpoolStatistics:
+    now = time.time()
+    amounts = {}
+    oldest_accepted_at = now
+
+    for state in (INCOMING, PROCESSING, FAILED):
+        amounts[state] = 0
+
+        for path in _get_folder(state).rglob(f"*{ENTRY_SUFFIX}"):
+            amounts[state] += 1
+
+            if state != FAILED:
+                try:
+                    oldest_accepted_at = min(oldest_accepted_at, path.stat().st_mtime)
+                except FileNotFoundError:
+                    pass
+
+    return SpoolStatistics(
+        incoming_amount=amounts[INCOMING],
+        processing_amount=amounts[PROCESSING],
+        failed_amount=amounts[FAILED],
+        oldest_age_in_seconds=now - oldest_accepted_at,
+    )
@@ -1,7 +1,7 @@
 from typing import Literal, Optional, TypedDict
 
 __all__ = [
-    "BlacklistData",
+    "BlocklistData",
     "ShortenerPattern",
     "ShortenerData",
     "UrlShortenersJsonFile",
@@ -10,7 +10,7 @@ __all__ = [
 
 class ShortenerPattern(TypedDict):
     pattern: str
-    type: Literal["domain"]
+    type: Literal["domain", "glob"]
 
 
 class ShortenerData(TypedDict):
@@ -19,10 +19,10 @@ class ShortenerData(TypedDict):
     patterns: list[ShortenerPattern]
 
 
-class BlacklistData(TypedDict):
-    blacklist: list[ShortenerData]
+class BlocklistData(TypedDict):
+    blocklist: list[ShortenerData]
 
 
 class UrlShortenersJsonFile(TypedDict):
-    shorteners: BlacklistData
+    shorteners: BlocklistData
 
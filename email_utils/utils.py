@@ -6,8 +6,10 @@ import re
 import socket
 import time
 from email import policy
+from email.feedparser import BytesFeedParser
 from email.header import decode_header
 from email.message import Message
+from email.parser import BytesHeaderParser
 from typing import Generator, Optional
 
 import email_normalize
@@ -20,6 +22,8 @@ from email_utils.errors import AliasNotFoundError
 
 __all__ = [
     "generate_message_id",
+    "parse_message",
+    "parse_message_headers",
     "message_to_bytes",
     "get_alias_by_email",
     "determine_text_language",
@@ -33,6 +37,7 @@ USER_EMAIL_CONTENT_TYPES = [
     "text/html",
     "text/plain",
 ]
+PARSE_CHUNK_SIZE = 64 * 1024
 
 
 def generate_message_id(
@@ -48,6 +53,32 @@ def generate_message_id(
     return "<%d.%d.%d%s@%s>" % (timeval, pid, randint, idstring, message_domain)
 
 
+def parse_message(content: bytes) -> Message:
+    """Parse `content` in chunks.
+
+    `message_from_bytes` decodes the whole content first and keeps that copy until the message
+    is parsed; this only keeps one chunk next to the parsed message.
+    """
+    parser = BytesFeedParser()
+
+    for start in range(0, len(content), PARSE_CHUNK_SIZE):
+        parser.feed(content[start:start + PARSE_CHUNK_SIZE])
+
+    return parser.close()
+
+
+def parse_message_headers(content: bytes) -> Message:
+    """Parse only the headers of `content`. The payload of the returned message is empty."""
+    header_ends = [
+        index + 1
+        for separator in (b"\n\n", b"\n\r\n")
+        if (index := content.find(separator)) != -1
+    ]
+    header_end = min(header_ends, default=len(content))
+
+    return BytesHeaderParser().parsebytes(content[:header_end])
+
+
 def message_to_bytes(message: Message) -> bytes:
     for generator_policy in [None, policy.SMTP, policy.SMTPUTF8]:
         try:
@@ -176,6 +207,10 @@ def find_email_content(message: Message) -> Generator[tuple[Message, str], None,
     Only returns the content that will be visible to the user (encrypted content, attachments,
     etc. are ignored).
     """
+    if not message.is_multipart() and message.get_content_type() not in USER_EMAIL_CONTENT_TYPES:
+        # Don't decode mails that only consist of an attachment
+        return
+
     content = message.get_payload(decode=True) or message.get_payload()
     logger.info("Parsing content.")
     if type(content) is bytes:
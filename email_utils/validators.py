@@ -2,15 +2,19 @@ import re
 from typing import Union
 
 from aiosmtpd.smtp import Envelope
+from sqlalchemy.orm import Session
 
 from app import constants
+from app.controllers.alias_routing import AliasRoute, ReservedAliasRoute, resolve_alias_route
 from app.models import EmailAlias
 from app.utils.email import normalize_email
 from email_utils.errors import AliasDisabledError, InvalidEmailError, PrivacyLeakError
+from email_utils.utils import extract_alias_address
 
 __all__ = [
     "validate_envelope",
     "validate_alias",
+    "is_known_recipient",
     "check_for_email_privacy_leak",
 ]
 
@@ -33,11 +37,21 @@ def validate_envelope(envelope: Envelope) -> None:
         validate_email(mail)
 
 
-def validate_alias(alias: Union[EmailAlias]) -> None:
+def validate_alias(alias: Union[EmailAlias, AliasRoute, ReservedAliasRoute]) -> None:
     if not alias.is_active:
         raise AliasDisabledError()
 
 
+def is_known_recipient(db: Session, /, address: str) -> bool:
+    """Check whether `address` is an alias, a reserved alias or a relay address of an alias."""
+    if (result := extract_alias_address(address)) is not None:
+        address, _ = result
+
+    local, domain = address.split("@")
+
+    return resolve_alias_route(db, local=local, domain=domain) is not None
+
+
 async def check_for_email_privacy_leak(content: str, address: str) -> None:
     """Check if `address` is in `content` and raise an error if it is. `address` must be normalized.
 
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app import life_constants
+
+__all__ = [
+    "run_in_worker",
+    "run_in_acceptor",
+    "run_coroutine_in_worker",
+]
+
+T = TypeVar("T")
+
+# Mails are processed here, so that blocking calls (database, HTTP, SMTP, GPG) never stall the
+# event loop that accepts new SMTP connections
+_executor = ThreadPoolExecutor(
+    max_workers=life_constants.EMAIL_HANDLER_MAX_WORKERS,
+    thread_name_prefix="mail-worker",
+)
+# Accepting a mail only validates and spools it; it must not queue up behind processed mails
+_accept_executor = ThreadPoolExecutor(
+    max_workers=life_constants.EMAIL_HANDLER_ACCEPT_WORKERS,
+    thread_name_prefix="mail-acceptor",
+)
+
+
+async def run_in_worker(function: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(_executor, functools.partial(function, *args, **kwargs))
+
+
+async def run_in_acceptor(function: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(
+        _accept_executor,
+        functools.partial(function, *args, **kwargs),
+    )
+
+
+def _run_coroutine(function: Callable[..., Awaitable[T]], /, *args: Any, **kwargs: Any) -> T:
+    return asyncio.run(function(*args, **kwargs))
+
+
+async def run_coroutine_in_worker(
+    function: Callable[..., Awaitable[T]],
+    /,
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Run the coroutine `function` on its own event loop inside a worker.
+
+    Use this for coroutines that mix blocking calls with awaits. The blocking calls will only
+    block the worker instead of the calling event loop.
+    """
+    return await run_in_worker(_run_coroutine, function, *args, **kwargs)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 
 import pyotp
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session
 from sqlalchemy_utils import create_database, database_exists
 from starlette.testclient import TestClient
@@ -11,8 +11,11 @@ from starlette.testclient import TestClient
 from app import constants, life_constants
 from app.authentication.authentication_response import OTPVerificationStatus
 from app.authentication.handler import access_security, refresh_security
+from app.controllers import (
+    alias_routing, alias_utils, email_report, global_settings, server_statistics,
+)
 from app.controllers.alias import generate_random_local_id
-from app.controllers.api_key import _generate_key
+from app.controllers.api_key import _create_key_digest, _generate_key
 from app.controllers.email_login import generate_token
 from app.controllers._cors import generate_cors_token
 from app.database.base import Base
@@ -25,6 +28,8 @@ from app.models import (
 )
 from app.models.enums.alias import AliasType
 from app.models.user_otp import OTPStatusType
+from app.utils import image_store
+from email_utils import spool
 from tests.helpers import create_item
 from app.utils.hashes import hash_fast
 
@@ -36,12 +41,57 @@ def update_is_testing():
     constants.IS_TESTING = True
 
 
+@pytest.fixture(autouse=True)
+def reset_caches(tmp_path, monkeypatch):
+    # Caches and buffers live as long as the process, so they would leak into other tests
+    global_settings.invalidate_cache()
+    alias_utils._cached_amounts.clear()
+    alias_routing._entries.clear()
+    server_statistics._pending_amounts.clear()
+    monkeypatch.setattr(email_report, "PENDING_REPORTS_PATH", tmp_path / "email-reports")
+
+
+@pytest.fixture(autouse=True)
+def image_storage_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_store, "STORAGE_PATH", tmp_path / "images")
+
+    yield image_store.STORAGE_PATH
+
+
+@pytest.fixture(autouse=True)
+def spool_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(spool, "SPOOL_PATH", tmp_path / "spool")
+
+    yield spool.SPOOL_PATH
+
+
+def _has_trigram_support(engine) -> bool:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first() is not None
+
+
+def _drop_trigram_indexes() -> None:
+    # Without `pg_trgm` the tables can still be created; only fuzzy searches will fail
+    for table in Base.metadata.tables.values():
+        for index in list(table.indexes):
+            if "gin_trgm_ops" in index.dialect_options["postgresql"]["ops"].values():
+                table.indexes.remove(index)
+
+
 @pytest.fixture(scope="session")
 def db_engine():
     engine = create_engine(DB_URI)
     if not database_exists:
         create_database(engine.url)
 
+    if _has_trigram_support(engine):
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    else:
+        _drop_trigram_indexes()
+
     Base.metadata.create_all(bind=engine)
 
     yield engine
@@ -66,6 +116,14 @@ def db(db_engine):
     connection.close()
 
 
+@pytest.fixture
+def trigram_db(db_engine, db):
+    if not _has_trigram_support(db_engine):
+        pytest.skip("`pg_trgm` is not available in the test database")
+
+    yield db
+
+
 @pytest.fixture(scope="function")
 def client(db):
     app.dependency_overrides[get_db] = lambda: db
@@ -220,7 +278,7 @@ def create_api_key(db: Session):
             {
                 "user_id": user.id,
                 "expires_at": datetime.utcnow() + timedelta(days=1),
-                "hashed_key": hash_fast(key),
+                "key_digest": _create_key_digest(key),
                 "label": "t",
                 **kwargs,
             },
@@ -1,6 +1,7 @@
 from starlette.testclient import TestClient
 
 from app import life_constants
+from app.models.enums.api_key import APIKeyScope
 
 
 def test_admin_can_get_correct_admin_users(
@@ -40,3 +41,44 @@ def test_non_admin_can_not_access_admin_apis(
     )
 
     assert response.status_code == 401, f"Status code should be 401 but is {response.status_code}"
+
+
+def test_admin_can_get_mail_queue(
+    create_user,
+    client: TestClient,
+    create_auth_tokens,
+):
+    user = create_user(is_verified=True, is_admin=True)
+    auth = create_auth_tokens(user)
+
+    response = client.get(
+        "/v1/admin/mail-queue/",
+        headers=auth["headers"],
+    )
+
+    assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}"
+    assert "incoming_amount" in response.json()
+
+
+def test_mail_queue_requires_its_own_api_key_scope(
+    create_user,
+    client: TestClient,
+    create_api_key,
+):
+    user = create_user(is_verified=True, is_admin=True)
+    _, cron_report_key = create_api_key(user=user, scopes=[APIKeyScope.ADMIN_CRON_REPORT_READ])
+    _, mail_queue_key = create_api_key(user=user, scopes=[APIKeyScope.ADMIN_MAIL_QUEUE_READ])
+
+    response = client.get(
+        "/v1/admin/mail-queue/",
+        headers={"Authorization": f"Api-Key {cron_report_key}"},
+    )
+
+    assert response.status_code == 401, f"Status code should be 401 but is {response.status_code}"
+
+    response = client.get(
+        "/v1/admin/mail-queue/",
+        headers={"Authorization": f"Api-Key {mail_queue_key}"},
+    )
+
+    assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}"
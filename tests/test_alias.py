@@ -2,8 +2,12 @@ from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 from app import life_constants
-from app.models.alias import DeletedEmailAlias
+from app.controllers.alias import update_alias
+from app.controllers.alias_routing import AliasRoute, resolve_alias_route
+from app.controllers.alias_utils import check_if_alias_exists
+from app.models.alias import DeletedEmailAlias, EmailAlias
 from app.models.enums.alias import AliasType
+from app.schemas.alias import AliasUpdate
 
 
 def test_can_create_random_alias(
@@ -175,3 +179,131 @@ def test_can_not_surpass_max_amount(
     )
 
     assert response.status_code == 403, f"Status code should be 403 but is {response.status_code}"
+
+
+def test_alias_exists_checks_all_alias_tables(
+    db: Session,
+    create_user,
+    create_random_alias,
+    create_reserved_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+    reserved_alias = create_reserved_alias(users=[user])
+    db.add(DeletedEmailAlias(email=f"deleted@{life_constants.MAIL_DOMAIN}"))
+    db.commit()
+
+    assert check_if_alias_exists(db, local=alias.local, domain=alias.domain)
+    assert check_if_alias_exists(db, local=reserved_alias.local, domain=reserved_alias.domain)
+    assert check_if_alias_exists(db, local="deleted", domain=life_constants.MAIL_DOMAIN), \
+        "Deleted aliases must not be reused."
+    assert not check_if_alias_exists(db, local="never-used", domain=life_constants.MAIL_DOMAIN)
+
+
+def test_can_list_aliases_by_cursor(
+    client: TestClient,
+    db: Session,
+    create_user,
+    create_auth_tokens,
+    create_random_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    auth = create_auth_tokens(user)
+    for _ in range(5):
+        create_random_alias(user=user)
+
+    ids = []
+    cursor = None
+
+    while True:
+        response = client.get(
+            "/v1/alias/cursor/",
+            params={"size": 2, "include_total": True, **({"cursor": cursor} if cursor else {})},
+            headers=auth["headers"],
+        )
+
+        assert response.status_code == 200, \
+            f"Status code should be 200 but is {response.status_code}"
+        assert response.json()["total"] == 5, "Total should count all aliases."
+
+        ids.extend(item["id"] for item in response.json()["items"])
+        cursor = response.json()["next_cursor"]
+
+        if cursor is None:
+            break
+
+    # The database's collation decides the order of `local`
+    rows = db \
+        .query(EmailAlias.id) \
+        .filter_by(user_id=user.id) \
+        .order_by(EmailAlias.local, EmailAlias.id) \
+        .all()
+    expected_ids = [str(row.id) for row in rows]
+    assert ids == expected_ids, "Pages should return every alias exactly once in order."
+
+
+def test_can_not_continue_search_with_cursor_without_search(
+    client: TestClient,
+    create_user,
+    create_auth_tokens,
+    create_random_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    auth = create_auth_tokens(user)
+    for _ in range(3):
+        create_random_alias(user=user)
+
+    response = client.get("/v1/alias/cursor/", params={"size": 1}, headers=auth["headers"])
+    cursor = response.json()["next_cursor"]
+
+    response = client.get(
+        "/v1/alias/cursor/",
+        params={"size": 1, "cursor": cursor, "query": "shopping"},
+        headers=auth["headers"],
+    )
+
+    assert response.status_code == 400, f"Status code should be 400 but is {response.status_code}"
+
+
+def test_alias_routes_are_cached_until_invalidated(
+    db: Session,
+    create_user,
+    create_random_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    route = resolve_alias_route(db, local=alias.local, domain=alias.domain)
+    assert isinstance(route, AliasRoute), "Alias should be resolved."
+    assert route.target_address == user.email.address, "Route should forward to the user."
+
+    alias.is_active = False
+    db.commit()
+    assert resolve_alias_route(db, local=alias.local, domain=alias.domain).is_active, \
+        "Route should be cached."
+
+    update_alias(db, alias=alias, data=AliasUpdate(is_active=False))
+    assert not resolve_alias_route(db, local=alias.local, domain=alias.domain).is_active, \
+        "Updating an alias should invalidate its route."
+
+
+def test_unknown_alias_routes_are_not_cached(
+    db: Session,
+    create_user,
+    create_random_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+    local, domain = alias.local, alias.domain
+    db.delete(alias)
+    db.commit()
+
+    assert resolve_alias_route(db, local=local, domain=domain) is None, \
+        "Unknown address should not be resolved."
+
+    # Created by another process, which can't invalidate the routes cached here
+    alias = create_random_alias(user=user)
+    alias.local = local
+    db.commit()
+    assert resolve_alias_route(db, local=local, domain=domain) is not None, \
+        "Created alias should be resolved right away."
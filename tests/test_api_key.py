@@ -3,7 +3,10 @@ from datetime import datetime, timedelta
 from requests import Session
 from starlette.testclient import TestClient
 
+from app import life_constants
+from app.controllers.api_key import _generate_key, find_api_key
 from app.models.enums.api_key import APIKeyScope
+from app.utils.hashes import hash_fast
 
 
 def test_can_create_api_key(
@@ -93,3 +96,49 @@ def test_can_get_api_keys(
 
     assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}"
     assert len(response.json()["items"]) == 1, "There should be one API key"
+
+
+def test_legacy_api_key_is_migrated_on_first_use(
+    db: Session,
+    create_user,
+    create_api_key,
+):
+    user = create_user(is_verified=True)
+    key = _generate_key()
+    api_key, _ = create_api_key(
+        user=user,
+        scopes=[APIKeyScope.ALIAS_CREATE],
+        key_digest=None,
+        hashed_key=hash_fast(key),
+    )
+
+    assert find_api_key(db, key) == api_key, "Legacy API key should still be found."
+    assert api_key.key_digest is not None, "Legacy API key should have been migrated."
+    assert api_key.hashed_key is None
+
+    assert find_api_key(db, key) == api_key, "Migrated API key should be found by its digest."
+
+
+def test_every_legacy_api_key_can_be_migrated(
+    db: Session,
+    create_user,
+    create_api_key,
+    monkeypatch,
+):
+    user = create_user(is_verified=True)
+    keys = [_generate_key() for _ in range(3)]
+    api_keys = [
+        create_api_key(
+            user=user,
+            scopes=[APIKeyScope.ALIAS_CREATE],
+            key_digest=None,
+            hashed_key=hash_fast(key),
+            expires_at=datetime.utcnow() + timedelta(days=days),
+        )[0]
+        for days, key in enumerate(keys, start=1)
+    ]
+    # Keys created with other settings must still be found
+    monkeypatch.setattr(life_constants, "API_KEY_LENGTH", 10)
+
+    for key, api_key in zip(keys, api_keys):
+        assert find_api_key(db, key) == api_key, "Every legacy API key should be found."
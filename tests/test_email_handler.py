@@ -1,12 +1,29 @@
-from email.message import EmailMessage
+import asyncio
+import re
+import smtplib
+import time
+from email import message_from_bytes
+from email.message import EmailMessage, Message
+from email.mime.message import MIMEMessage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 
 import pytest
 from aiosmtpd.smtp import Envelope
-
-from email_utils import status
-from email_utils.bounce_messages import extract_forward_status, generate_forward_status, StatusType
+from sqlalchemy import event
+
+from app.controllers import email_report
+from email_utils import headers, status
+from email_utils.bounce_messages import (
+    extract_forward_status, extract_forward_status_header, generate_forward_status,
+    get_bounce_report, StatusType,
+)
 from email_utils.handler import handle
-from email_utils.utils import generate_message_id
+from email_utils.utils import (
+    generate_message_id, message_to_bytes, parse_message, parse_message_headers,
+)
+from email_utils.workers import run_in_worker
+from tests.test_pgp import PUBLIC_KEY
 
 
 @pytest.mark.asyncio
@@ -157,3 +174,333 @@ async def test_local_user_can_not_send_email_on_privacy_leak(
     )
 
     assert response == status.E501
+
+
+@pytest.mark.asyncio
+async def test_blocking_work_does_not_block_event_loop():
+    ticks = []
+
+    async def tick():
+        for _ in range(3):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(
+        run_in_worker(time.sleep, 0.2),
+        tick(),
+    )
+
+    assert len(ticks) == 3
+    assert ticks[-1] - ticks[0] < 0.15, "Event loop has been blocked by the worker."
+
+
+@pytest.mark.asyncio
+async def test_outside_to_local_loads_alias_in_one_query(
+    db,
+    create_user,
+    create_random_alias,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+    # Make sure nothing is served from the identity map
+    db.expire_all()
+
+    message = EmailMessage()
+    message.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+    envelope.rcpt_tos = [alias.address]
+
+    statements = []
+
+    def _collect_statements(conn, cursor, statement, *args):
+        if re.search(r'\b(email_alias|"user"|email|user_preferences)\b', statement):
+            statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", _collect_statements)
+    try:
+        response = await handle(
+            envelope=envelope,
+            message=message,
+        )
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", _collect_statements)
+
+    assert response == status.E200
+    assert len(statements) == 1, \
+        f"Alias, user, email and preferences should be loaded in one query: {statements}"
+
+
+def test_parse_message_in_chunks_matches_whole_parse():
+    message = EmailMessage()
+    message["Subject"] = "Hello"
+    message.set_content("Hello " * 50_000)
+    message.add_alternative("<p>Hello</p>", subtype="html")
+    message.add_attachment(b"\x00\x01" * 100_000, maintype="application", subtype="octet-stream")
+    content = message_to_bytes(message)
+
+    parsed = parse_message(content)
+
+    assert message_to_bytes(parsed) == message_to_bytes(message_from_bytes(content)), \
+        "Parsing in chunks should give the same message."
+
+
+def test_parse_message_headers_skips_body():
+    message = EmailMessage()
+    message["Subject"] = "Hello"
+    message.set_content("Hello")
+
+    parsed = parse_message_headers(message_to_bytes(message))
+
+    assert parsed["Subject"] == "Hello"
+    assert not parsed.get_payload(), "Body should not be parsed."
+
+
+def _create_bounce(original: Message) -> MIMEMultipart:
+    bounce = MIMEMultipart("report", report_type="delivery-status")
+    bounce.attach(MIMEText("Your mail could not be delivered."))
+    bounce.attach(MIMEMessage(original))
+
+    return bounce
+
+
+def test_normal_mail_is_not_treated_as_bounce(monkeypatch):
+    forwarded = EmailMessage()
+    forwarded[headers.KLECK_FORWARD_STATUS] = generate_forward_status(StatusType.BOUNCE)
+    forwarded.set_content("Hello")
+    message = MIMEMultipart()
+    message.attach(MIMEText("See the attached mail."))
+    message.attach(MIMEMessage(forwarded))
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("Normal mails should not be serialized.")
+
+    monkeypatch.setattr(Message, "as_string", _fail)
+    monkeypatch.setattr(Message, "walk", _fail)
+
+    assert get_bounce_report(envelope, message) is None, \
+        "Attached mails of normal mails are no bounce reports."
+
+
+def test_can_extract_forward_status_from_rfc822_headers_bounce():
+    forward_status = generate_forward_status(StatusType.FORWARD_ALIAS_TO_OUTSIDE)
+    # Servers may fold long headers
+    original_headers = (
+        f"Subject: Hello\r\n"
+        f"{headers.KLECK_FORWARD_STATUS}:\r\n {forward_status[:40]}\r\n {forward_status[40:]}\r\n"
+        f"{headers.IN_REPLY_TO}: <original@example.com>\r\n"
+    )
+    bounce = MIMEMultipart("report", report_type="delivery-status")
+    bounce.attach(MIMEText("Your mail could not be delivered."))
+    bounce.attach(MIMEText(original_headers, "rfc822-headers"))
+    envelope = Envelope()
+    envelope.mail_from = "<>"
+
+    report = get_bounce_report(envelope, message_from_bytes(bounce.as_bytes()))
+
+    assert report is not None, "Bounce report should be found."
+    assert extract_forward_status_header(report) == forward_status
+
+
+@pytest.mark.asyncio
+async def test_bounce_of_bounce_is_ignored(
+    create_user,
+    create_random_alias,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    original = EmailMessage()
+    original[headers.KLECK_FORWARD_STATUS] = generate_forward_status(StatusType.BOUNCE)
+    original.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "<>"
+    envelope.rcpt_tos = [alias.address]
+
+    response = await handle(
+        envelope=envelope,
+        message=_create_bounce(original),
+    )
+
+    assert response == status.E200
+
+
+def test_only_reports_from_null_sender_are_bounces():
+    original = EmailMessage()
+    original[headers.KLECK_FORWARD_STATUS] = generate_forward_status(StatusType.BOUNCE)
+    original.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+
+    assert get_bounce_report(envelope, _create_bounce(original)) is None, \
+        "Reports from normal senders are no bounces."
+
+    message = MIMEMultipart()
+    message.attach(MIMEMessage(original))
+    envelope.mail_from = "<>"
+
+    assert get_bounce_report(envelope, message) is None, \
+        "Mails from the null sender that are no reports are no bounces."
+
+
+def _capture_sent_mails(monkeypatch) -> list[dict]:
+    sent_mails = []
+
+    monkeypatch.setattr(
+        "email_utils.handler.send_mail",
+        lambda **kwargs: sent_mails.append(kwargs),
+    )
+
+    return sent_mails
+
+
+@pytest.mark.asyncio
+async def test_outside_sender_is_informed_when_forward_bounces(
+    monkeypatch,
+    create_user,
+    create_random_alias,
+):
+    sent_mails = _capture_sent_mails(monkeypatch)
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    original = EmailMessage()
+    original[headers.KLECK_FORWARD_STATUS] = generate_forward_status(
+        StatusType.FORWARD_OUTSIDE_TO_ALIAS,
+        outside_address="outside@example.com",
+    )
+    original.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "<>"
+    envelope.rcpt_tos = [f"outside_at_example.com_{alias.address}"]
+
+    response = await handle(
+        envelope=envelope,
+        message=_create_bounce(original),
+    )
+
+    assert response == status.E200
+    assert [mail["to_mail"] for mail in sent_mails] == ["outside@example.com"], \
+        "Only the original outside sender should be informed."
+
+
+@pytest.mark.asyncio
+async def test_unknown_outside_sender_is_not_informed_when_forward_bounces(
+    monkeypatch,
+    create_user,
+    create_random_alias,
+):
+    sent_mails = _capture_sent_mails(monkeypatch)
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    original = EmailMessage()
+    original[headers.KLECK_FORWARD_STATUS] = generate_forward_status(
+        StatusType.FORWARD_OUTSIDE_TO_ALIAS,
+        outside_address="<>",
+    )
+    original.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "<>"
+    envelope.rcpt_tos = [f"outside_at_example.com_{alias.address}"]
+
+    response = await handle(
+        envelope=envelope,
+        message=_create_bounce(original),
+    )
+
+    assert response == status.E200
+    assert sent_mails == [], "Bounces of bounces should not be answered."
+
+
+async def _handle_with_failing_send(
+    monkeypatch,
+    error: Exception,
+    create_user,
+    create_random_alias,
+) -> str:
+    user = create_user(is_verified=True)
+    user.public_key = PUBLIC_KEY
+    alias = create_random_alias(user=user, pref_create_mail_report=True)
+
+    def _fail(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr("email_utils.handle_outside_to_local.send_mail", _fail)
+
+    message = EmailMessage()
+    message.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+    envelope.rcpt_tos = [alias.address]
+
+    return await handle(envelope=envelope, message=message)
+
+
+@pytest.mark.asyncio
+async def test_mail_is_retried_when_relay_is_unavailable(
+    monkeypatch,
+    create_user,
+    create_random_alias,
+):
+    response = await _handle_with_failing_send(
+        monkeypatch,
+        smtplib.SMTPServerDisconnected(),
+        create_user,
+        create_random_alias,
+    )
+
+    assert response.startswith("4"), "Mail should be retried when the relay is unavailable."
+    assert list(email_report.PENDING_REPORTS_PATH.glob("*.json")) == [], \
+        "Reports should only be queued once the mail has been sent."
+
+
+@pytest.mark.asyncio
+async def test_mail_is_not_retried_when_relay_rejects_it(
+    monkeypatch,
+    create_user,
+    create_random_alias,
+):
+    response = await _handle_with_failing_send(
+        monkeypatch,
+        smtplib.SMTPDataError(554, b"Rejected"),
+        create_user,
+        create_random_alias,
+    )
+
+    assert response.startswith("5"), "Permanent rejections should not be retried."
+
+
+@pytest.mark.asyncio
+async def test_reserved_alias_mail_is_not_sent_twice(
+    monkeypatch,
+    db,
+    create_user,
+    create_reserved_alias,
+):
+    users = [create_user(is_verified=True) for _ in range(2)]
+    alias = create_reserved_alias(users=users)
+    db.commit()
+    sent_addresses = []
+
+    def _send_mail(*args, to_mail: str, **kwargs):
+        if to_mail == users[1].email.address:
+            raise smtplib.SMTPServerDisconnected()
+
+        sent_addresses.append(to_mail)
+
+    monkeypatch.setattr("email_utils.handler.send_mail", _send_mail)
+
+    message = EmailMessage()
+    message.set_content("Hello")
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+    envelope.rcpt_tos = [f"{alias.local}@{alias.domain}"]
+
+    response = await handle(envelope=envelope, message=message)
+
+    assert sent_addresses == [users[0].email.address]
+    assert response == status.E200, \
+        "Mail should not be retried once it has been sent to any of the users."
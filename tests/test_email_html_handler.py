@@ -5,6 +5,7 @@ from app import life_constants
 from app.constants import ROOT_DIR
 from app.email_report_data import EmailReportData
 from email_utils import content_handler
+from email_utils.html_rewriter import HTMLVisitor, rewrite_html
 
 
 def test_can_convert_images(
@@ -24,7 +25,12 @@ def test_can_convert_images(
         message_id="",
         report_id="",
     )
-    new_html = content_handler.convert_images(report, alias=alias, html=html)
+    new_html = content_handler.convert_images(
+        report,
+        alias_id=alias.id,
+        preferences=alias.get_effective_preferences(),
+        html=html,
+    )
     print(new_html)
 
     assert html != new_html, "HTML should have changed."
@@ -86,7 +92,11 @@ def test_can_expand_shortened_url(create_random_alias, create_user):
         message_id="",
         report_id="",
     )
-    new_html = content_handler.expand_shortened_urls(report, alias=alias, html=html)
+    new_html = content_handler.expand_shortened_urls(
+        report,
+        preferences=alias.get_effective_preferences(),
+        html=html,
+    )
 
     assert html != new_html, "HTML should have changed."
     d = pq(lxml.html.fromstring(new_html))
@@ -107,9 +117,45 @@ def test_can_expand_recursive_shortened_url(create_random_alias, create_user):
         message_id="",
         report_id="",
     )
-    new_html = content_handler.expand_shortened_urls(report, alias=alias, html=html)
+    new_html = content_handler.expand_shortened_urls(
+        report,
+        preferences=alias.get_effective_preferences(),
+        html=html,
+    )
 
     assert html != new_html, "HTML should have changed."
     d = pq(lxml.html.fromstring(new_html))
     anchor = d.find("a")[0]
     assert anchor.attrib["href"] != "https://bit.ly/3EbcxK9"
+
+
+def test_rewrite_html_skips_removed_images_for_later_visitors():
+    html = (ROOT_DIR / "explorative_tests" / "image_tracker_url.html").read_text()
+
+    report = EmailReportData(
+        mail_from="from@example.com",
+        mail_to="to@example.com",
+        subject="Awesome Subject here",
+        message_id="",
+        report_id="",
+    )
+
+    class ImageCollector(HTMLVisitor):
+        tags = ("img",)
+
+        def __init__(self):
+            self.visited = []
+
+        def visit(self, element) -> None:
+            self.visited.append(element)
+
+    collector = ImageCollector()
+    new_html = rewrite_html(
+        html,
+        [content_handler.ImageTrackerRemover(report), collector],
+    )
+
+    d = pq(lxml.html.fromstring(new_html))
+    assert len(d.find("img")) == 0, "There should be no images left."
+    assert len(report.single_pixel_images) == 1, "There should be one removed tracker."
+    assert collector.visited == [], "Removed images should not be passed to later visitors."
@@ -2,7 +2,8 @@ from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 from app import life_constants
-from app.controllers.global_settings import get_settings, get
+from app.controllers.global_settings import get, get_settings, invalidate_cache, update_settings
+from app.schemas.admin import AdminUpdateGlobalSettingsModel
 
 
 def test_can_get_global_setting_if_enabled_and_value_not_null(
@@ -123,3 +124,29 @@ def test_can_not_set_empty_chars(
     )
 
     assert response.status_code == 422, f"Status code should be 422 but is {response.status_code}"
+
+
+def test_cached_setting_is_invalidated_on_update(
+    db: Session,
+) -> None:
+    life_constants.USE_GLOBAL_SETTINGS = True
+    invalidate_cache()
+
+    settings = get_settings(db)
+    settings.random_email_id_min_length = 20
+    db.add(settings)
+    db.commit()
+
+    assert get(db, "RANDOM_EMAIL_ID_MIN_LENGTH") == 20
+
+    settings.random_email_id_min_length = 30
+    db.add(settings)
+    db.commit()
+
+    assert get(db, "RANDOM_EMAIL_ID_MIN_LENGTH") == 20, "Value should be served from the cache."
+
+    update_settings(db, AdminUpdateGlobalSettingsModel(random_email_id_min_length=40))
+
+    assert get(db, "RANDOM_EMAIL_ID_MIN_LENGTH") == 40, "Update should invalidate the cache."
+
+    invalidate_cache()
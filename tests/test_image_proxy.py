@@ -1,12 +1,25 @@
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from io import BytesIO
 from urllib.parse import urlparse
 
 import lxml.html
+import pytest
+from aiosmtpd.smtp import Envelope
+from PIL import Image
 from pyquery import PyQuery as pq
 from sqlalchemy.orm import Session
 
+from app import life_constants
 from app.constants import ROOT_DIR
 from app.email_report_data import EmailReportData
-from email_utils import content_handler
+from app.models.enums.alias import ImageProxyFormatType, ProxyUserAgentType
+from app.utils import image, image_store
+from app.utils.image import create_image_url
+from email_utils import content_handler, handle_outside_to_local
+from email_utils.handler import handle
 
 
 def test_can_proxy_image(
@@ -27,7 +40,12 @@ def test_can_proxy_image(
         message_id="",
         report_id="",
     )
-    new_html = content_handler.convert_images(report, alias=alias, html=html)
+    new_html = content_handler.convert_images(
+        report,
+        alias_id=alias.id,
+        preferences=alias.get_effective_preferences(),
+        html=html,
+    )
 
     d = pq(lxml.html.fromstring(new_html))
     img = d.find("img")[0]
@@ -41,3 +59,163 @@ def test_can_proxy_image(
     )
 
     assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}."
+
+
+def test_proxy_image_returns_not_modified_for_same_etag(
+    db: Session,
+    create_user,
+    create_random_alias,
+    client,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user, pref_image_proxy_format=ImageProxyFormatType.PNG)
+
+    original_url = "https://example.com/not-modified.jpeg"
+    image = Image.new("RGB", (2, 2))
+    image.format = "JPEG"
+    file = image_store.store_blob(image_store.create_blob_key(original_url), image)
+
+    result = urlparse(create_image_url(original_url=original_url, alias_id=alias.id, file=file))
+    path = result.path + "?" + result.query
+
+    response = client.get(path)
+
+    assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}."
+    assert response.headers["content-type"] == "image/png", "Image should be converted to PNG."
+
+    response = client.get(path, headers={"If-None-Match": response.headers["etag"]})
+
+    assert response.status_code == 304, f"Status code should be 304 but is {response.status_code}."
+
+
+def _create_image_content() -> BytesIO:
+    content = BytesIO()
+    Image.new("RGB", (2, 2)).save(content, format="PNG")
+    content.seek(0)
+
+    return content
+
+
+def _save_images(urls: list[str]) -> dict:
+    return image.save_images(
+        urls,
+        user_agent=ProxyUserAgentType.FIREFOX,
+        preferred_type=ImageProxyFormatType.PNG,
+    )
+
+
+def test_save_images_downloads_each_url_once(monkeypatch):
+    downloaded_urls = []
+
+    def _download_image(url, **kwargs):
+        downloaded_urls.append(url)
+        return _create_image_content()
+
+    monkeypatch.setattr(image, "download_image", _download_image)
+
+    files = _save_images([
+        "https://example.com/a.png",
+        "https://example.com/b.png",
+        "https://example.com/a.png",
+    ])
+
+    assert sorted(downloaded_urls) == ["https://example.com/a.png", "https://example.com/b.png"], \
+        "Each url should be downloaded once."
+    assert all(file is not None and file.exists() for file in files.values()), \
+        "All images should be saved."
+
+
+def test_save_images_limits_concurrent_downloads(monkeypatch):
+    monkeypatch.setattr(life_constants, "IMAGE_PROXY_MAX_CONCURRENT_DOWNLOADS_PER_MAIL", 2)
+    lock = threading.Lock()
+    running_amount = 0
+    max_running_amount = 0
+
+    def _download_image(url, **kwargs):
+        nonlocal running_amount, max_running_amount
+
+        with lock:
+            running_amount += 1
+            max_running_amount = max(max_running_amount, running_amount)
+
+        time.sleep(0.05)
+
+        with lock:
+            running_amount -= 1
+
+        return _create_image_content()
+
+    monkeypatch.setattr(image, "download_image", _download_image)
+
+    _save_images([f"https://example.com/{index}.png" for index in range(6)])
+
+    assert max_running_amount == 2, "Images of a mail should be downloaded with the limit."
+
+
+def test_save_images_maps_failed_downloads_to_none(monkeypatch):
+    def _download_image(url, **kwargs):
+        raise OSError("Connection reset")
+
+    monkeypatch.setattr(image, "download_image", _download_image)
+
+    assert _save_images(["https://example.com/failing.png"]) == {
+        "https://example.com/failing.png": None,
+    }, "Failed downloads should be proxied lazily."
+
+
+def test_save_images_discards_late_downloads(monkeypatch):
+    monkeypatch.setattr(life_constants, "IMAGE_PROXY_MAIL_DOWNLOAD_TIMEOUT_IN_SECONDS", 0.05)
+    download_finished = threading.Event()
+
+    def _download_image(url, **kwargs):
+        time.sleep(0.2)
+        download_finished.set()
+        return _create_image_content()
+
+    monkeypatch.setattr(image, "download_image", _download_image)
+
+    started_at = time.monotonic()
+    files = _save_images(["https://example.com/slow.png"])
+
+    assert time.monotonic() - started_at < 0.2, "Mail should not wait for slow downloads."
+    assert files == {"https://example.com/slow.png": None}, \
+        "Slow downloads should be proxied lazily."
+
+    download_finished.wait()
+    # Give the download a moment to store its image
+    time.sleep(0.05)
+
+    key = image_store.create_blob_key("https://example.com/slow.png")
+    assert image_store.find_fresh_blob(key, ImageProxyFormatType.PNG) is None, \
+        "Late downloads should not be stored."
+
+
+@pytest.mark.asyncio
+async def test_html_parts_of_a_mail_share_one_download_deadline(
+    monkeypatch,
+    create_user,
+    create_random_alias,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user, pref_proxy_images=True)
+    deadlines = []
+
+    def _save_images(urls, deadline=None, **kwargs):
+        deadlines.append(deadline)
+        return {url: None for url in urls}
+
+    monkeypatch.setattr(content_handler, "save_images", _save_images)
+    monkeypatch.setattr(handle_outside_to_local, "send_mail", lambda *args, **kwargs: None)
+
+    message = MIMEMultipart()
+    for index in range(2):
+        message.attach(MIMEText(f'<img src="https://example.com/{index}.png">', "html"))
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+    envelope.rcpt_tos = [alias.address]
+
+    await handle(envelope=envelope, message=message)
+
+    assert len(deadlines) == 2, "Images of both HTML parts should be downloaded."
+    assert deadlines[0] is not None and deadlines[0] == deadlines[1], \
+        "All HTML parts of a mail should share one time budget."
@@ -0,0 +1,132 @@
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.models.enums.alias import ImageProxyFormatType
+from app.utils import image_store
+
+
+def _create_blob(url: str):
+    key = image_store.create_blob_key(url)
+    image = Image.new("RGB", (2, 2))
+    image.format = "PNG"
+
+    return key, image_store.store_blob(key, image)
+
+
+def test_reuses_fresh_blob():
+    key, blob = _create_blob("https://example.com/logo.png")
+
+    assert image_store.find_fresh_blob(key, ImageProxyFormatType.PNG) == blob, "Stored blob should be reused."
+
+
+def test_does_not_reuse_outdated_blob():
+    key, blob = _create_blob("https://example.com/outdated-logo.png")
+    outdated = time.time() - 60 * 60 * 24 * 365
+    os.utime(blob, (outdated, outdated))
+
+    assert image_store.find_fresh_blob(key, ImageProxyFormatType.PNG) is None, "Outdated blob should not be reused."
+
+
+def test_garbage_collection_keeps_referenced_blobs():
+    _, referenced_blob = _create_blob("https://example.com/referenced.png")
+    _, unreferenced_blob = _create_blob("https://example.com/unreferenced.png")
+    image_store.add_reference(referenced_blob)
+
+    outdated = time.time() - 60
+    os.utime(referenced_blob, (outdated, outdated))
+    os.utime(unreferenced_blob, (outdated, outdated))
+
+    image_store.collect_garbage(life_time_in_hours=24)
+
+    assert referenced_blob.exists(), "Referenced blob should be kept."
+    assert not unreferenced_blob.exists(), "Unreferenced blob should be deleted."
+
+
+def test_garbage_collection_skips_vanished_blobs(monkeypatch):
+    _, unreferenced_blob = _create_blob("https://example.com/vanishing.png")
+    outdated = time.time() - 60
+    os.utime(unreferenced_blob, (outdated, outdated))
+    glob = Path.glob
+
+    def _glob_with_vanished_blob(path: Path, pattern: str):
+        if path.name == image_store.BLOBS_FOLDER:
+            # Renamed by a concurrent write after being listed
+            yield path / "00" / "vanished.png"
+
+        yield from glob(path, pattern)
+
+    monkeypatch.setattr(Path, "glob", _glob_with_vanished_blob)
+
+    image_store.collect_garbage(life_time_in_hours=24)
+
+    assert not unreferenced_blob.exists(), "Other blobs should still be collected."
+
+
+@pytest.mark.parametrize("timezone", ["Etc/GMT-14", "Etc/GMT+12"])
+def test_references_of_today_are_kept_in_any_timezone(monkeypatch, timezone):
+    _, blob = _create_blob("https://example.com/timezone.png")
+    image_store.add_reference(blob)
+    outdated = time.time() - 60
+    os.utime(blob, (outdated, outdated))
+
+    monkeypatch.setenv("TZ", timezone)
+    time.tzset()
+    try:
+        image_store.collect_garbage(life_time_in_hours=24)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+    folder_name = datetime.utcnow().strftime(image_store.DATE_FORMAT)
+    assert (image_store.STORAGE_PATH / image_store.REFERENCES_FOLDER / folder_name).exists(), \
+        "References of the current UTC day should not expire."
+    assert blob.exists(), "Referenced blob should be kept."
+
+
+def test_reuses_fresh_blob_of_other_format():
+    key, blob = _create_blob("https://example.com/fallback.png")
+
+    found_blob = image_store.find_fresh_blob(key, ImageProxyFormatType.WEBP)
+
+    assert found_blob == blob, "Fresh blobs of other formats should be reused."
+    assert image_store.get_variant(found_blob, ImageProxyFormatType.WEBP).suffix == ".webp", \
+        "Reused blob should be converted to the preferred format."
+
+
+def test_storing_blob_keeps_fresh_variants():
+    key, png_blob = _create_blob("https://example.com/shared.png")
+    webp_variant = image_store.get_variant(png_blob, ImageProxyFormatType.WEBP)
+
+    image = Image.new("RGB", (2, 2))
+    image.format = "JPEG"
+    image_store.store_blob(key, image)
+
+    assert png_blob.exists(), "Fresh blobs used by other mails should be kept."
+    assert webp_variant.exists(), "Fresh variants used by other mails should be kept."
+
+
+def test_storing_blob_deletes_outdated_variants():
+    key, png_blob = _create_blob("https://example.com/outdated-shared.png")
+    outdated = time.time() - 60 * 60 * 24 * 365
+    os.utime(png_blob, (outdated, outdated))
+
+    image = Image.new("RGB", (2, 2))
+    image.format = "JPEG"
+    image_store.store_blob(key, image)
+
+    assert not png_blob.exists(), "Outdated variants should be deleted."
+
+
+def test_variant_is_recreated_after_new_download():
+    key, png_blob = _create_blob("https://example.com/redownloaded.png")
+    webp_variant = image_store.get_variant(png_blob, ImageProxyFormatType.WEBP)
+    outdated = time.time() - 60
+    os.utime(webp_variant, (outdated, outdated))
+
+    assert image_store.get_variant(png_blob, ImageProxyFormatType.WEBP).stat().st_mtime == \
+           png_blob.stat().st_mtime, "Variant of a previous download should be recreated."
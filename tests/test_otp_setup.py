@@ -1,7 +1,9 @@
 import pyotp
+from sqlalchemy import event
 from starlette.testclient import TestClient
 
 
+
 def test_can_do_otp_setup_flow(
     client: TestClient,
     create_user,
@@ -291,3 +293,60 @@ def test_can_not_delete_otp_with_invalid_recover_code(
 
     assert response.status_code == 400, \
         f"Status code should be 400 but is {response.status_code}; Deleting OTP failed"
+
+
+def test_enabling_otp_elsewhere_requires_otp_right_away(
+    client: TestClient,
+    create_user,
+    create_auth_tokens,
+    setup_otp,
+):
+    user = create_user()
+    auth = create_auth_tokens(user=user)
+
+    response = client.get(
+        "/v1/alias/",
+        headers=auth["headers"],
+    )
+
+    assert response.status_code == 200, \
+        f"Status code should be 200 but is {response.status_code}; Listing aliases failed"
+
+    # Like another process would, without invalidating anything cached here
+    setup_otp(user)
+
+    response = client.get(
+        "/v1/alias/",
+        headers=auth["headers"],
+    )
+
+    assert response.status_code == 424, \
+        f"Status code should be 424 but is {response.status_code}; OTP should be required now"
+
+
+def test_authentication_loads_user_in_one_query(
+    client: TestClient,
+    db,
+    create_user,
+    create_auth_tokens,
+    setup_otp,
+):
+    user = create_user()
+    setup_otp(user)
+    auth = create_auth_tokens(user=user)
+    db.expire_all()
+    statements = []
+
+    def _collect_statements(conn, cursor, statement, *args):
+        if statement.startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", _collect_statements)
+    try:
+        response = client.get("/v1/setup-otp/", headers=auth["headers"])
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", _collect_statements)
+
+    assert response.status_code == 200, \
+        f"Status code should be 200 but is {response.status_code}; Getting OTP failed"
+    assert len(statements) == 1, "The user and its OTP should be loaded in one query."
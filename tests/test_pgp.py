@@ -1,3 +1,5 @@
+from pretty_bad_protocol import gnupg
+
 from app import gpg_handler
 
 PUBLIC_KEY = """-----BEGIN PGP PUBLIC KEY BLOCK-----
@@ -40,3 +42,17 @@ def test_can_sign():
 def test_can_encrypt():
     message = str(gpg_handler.encrypt_message("hello", public_key_in_str=PUBLIC_KEY))
     assert message.startswith("-----BEGIN PGP MESSAGE-----")
+
+
+def test_can_encrypt_and_sign(tmp_path):
+    message = str(gpg_handler.encrypt_and_sign_message("hello", public_key_in_str=PUBLIC_KEY))
+    assert message.startswith("-----BEGIN PGP MESSAGE-----")
+
+    # Decrypt as the user would, so the user's key never ends up in the server's keyring
+    user_gpg = gnupg.GPG(gpg_handler.gpg.binary, homedir=str(tmp_path / "gnupg"))
+    user_gpg.encoding = "utf-8"
+    user_gpg.import_keys(PRIVATE_KEY)
+    user_gpg.import_keys(gpg_handler.SERVER_PUBLIC_KEY)
+    decrypted = user_gpg.decrypt(message)
+    assert str(decrypted) == "hello", "Message should be decryptable with the user's key."
+    assert decrypted.valid, "Message should be signed by the server."
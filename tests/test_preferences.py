@@ -1,3 +1,4 @@
+from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 
@@ -47,3 +48,21 @@ def test_user_can_update_single_preferences_with_instances_update(
     assert response.status_code == 200
     assert user.preferences.alias_proxy_images is False
     assert user.email_aliases[0].pref_proxy_images is False
+
+
+def test_effective_preferences_fall_back_to_user_preferences(
+    db: Session,
+    create_user,
+    create_random_alias,
+) -> None:
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user, pref_proxy_images=True)
+    user.preferences.alias_proxy_images = False
+    user.preferences.alias_remove_trackers = False
+    db.commit()
+
+    preferences = alias.get_effective_preferences()
+
+    assert preferences.proxy_images is True, "Alias preference should be used if it is set."
+    assert preferences.remove_trackers is False, \
+        "User preference should be used if the alias preference is not set."
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
+
+from app import life_constants
+from app.controllers import email_report
+from app.controllers.email_report import (
+    flush_email_reports, queue_email_report, recover_email_reports,
+)
+from app.email_report_data import EmailReportData
+from app.models import EmailReport
+from tests.test_pgp import PUBLIC_KEY
+
+
+def _create_reports(db: Session, user, amount: int) -> list[EmailReport]:
+    now = datetime.utcnow()
+    reports = [
+        EmailReport(
+            user_id=user.id,
+            encrypted_content="content",
+            created_at=now - timedelta(minutes=index),
+        )
+        for index in range(amount)
+    ]
+
+    db.add_all(reports)
+    db.commit()
+
+    return reports
+
+
+def test_can_list_reports(
+    client: TestClient,
+    db: Session,
+    create_user,
+    create_auth_tokens,
+) -> None:
+    user = create_user(is_verified=True)
+    auth = create_auth_tokens(user)
+    reports = _create_reports(db, user, 3)
+
+    response = client.get("/v1/report/", headers=auth["headers"])
+
+    assert response.status_code == 200, f"Status code should be 200 but is {response.status_code}"
+    assert [item["id"] for item in response.json()["items"]] == \
+        [str(report.id) for report in reports], "Reports should be listed newest first."
+    assert response.json()["items"][0]["encrypted_content"] == reports[0].encrypted_content, \
+        "Report list should contain the content."
+
+
+def test_can_list_reports_by_cursor(
+    client: TestClient,
+    db: Session,
+    create_user,
+    create_auth_tokens,
+) -> None:
+    user = create_user(is_verified=True)
+    auth = create_auth_tokens(user)
+    reports = _create_reports(db, user, 5)
+
+    ids = []
+    cursor = None
+
+    while True:
+        response = client.get(
+            "/v1/report/cursor/",
+            params={"size": 2, **({"cursor": cursor} if cursor else {})},
+            headers=auth["headers"],
+        )
+
+        assert response.status_code == 200, \
+            f"Status code should be 200 but is {response.status_code}"
+
+        ids.extend(item["id"] for item in response.json()["items"])
+        cursor = response.json()["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert ids == [str(report.id) for report in reports], \
+        "Pages should return every report exactly once, newest first."
+
+
+def test_invalid_report_cursor_is_rejected(
+    client: TestClient,
+    create_user,
+    create_auth_tokens,
+) -> None:
+    user = create_user(is_verified=True)
+    auth = create_auth_tokens(user)
+
+    response = client.get(
+        "/v1/report/cursor/",
+        params={"cursor": "invalid"},
+        headers=auth["headers"],
+    )
+
+    assert response.status_code == 422, f"Status code should be 422 but is {response.status_code}"
+
+
+def _queue_reports(user, amount: int) -> None:
+    for index in range(amount):
+        queue_email_report(
+            report_data=EmailReportData(
+                mail_from="outside@example.com",
+                mail_to="alias@example.com",
+                subject=f"Subject {index}",
+                message_id="",
+                report_id="",
+            ),
+            user_id=user.id,
+            public_key=PUBLIC_KEY,
+        )
+
+
+def test_queued_reports_are_inserted_in_one_batch(
+    db: Session,
+    create_user,
+) -> None:
+    user = create_user(is_verified=True)
+    user.public_key = PUBLIC_KEY
+    db.commit()
+
+    _queue_reports(user, 3)
+
+    assert db.query(EmailReport).filter_by(user_id=user.id).count() == 0, \
+        "Reports should be queued until they are flushed."
+
+    statements = []
+
+    def _count_inserts(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO email_report"):
+            statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", _count_inserts)
+    try:
+        assert flush_email_reports(db) == 3, "All queued reports should be created."
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", _count_inserts)
+
+    assert len(statements) == 1, "Reports should be inserted with a single statement."
+
+    reports = db.query(EmailReport).filter_by(user_id=user.id).all()
+    assert len(reports) == 3, "All queued reports should be saved."
+    assert all(
+        report.encrypted_content.startswith("-----BEGIN PGP MESSAGE-----")
+        for report in reports
+    ), "Reports should be encrypted."
+
+
+def test_reports_of_crashed_process_are_created_once(
+    db: Session,
+    create_user,
+) -> None:
+    user = create_user(is_verified=True)
+    _queue_reports(user, 1)
+
+    path, = email_report.PENDING_REPORTS_PATH.glob("*.json")
+    content = path.read_text()
+
+    assert flush_email_reports(db) == 1
+
+    # The process crashed after inserting the report, but before removing it from the queue
+    crashed_folder = email_report.PENDING_REPORTS_PATH / "1"
+    crashed_folder.mkdir()
+    (crashed_folder / path.name).write_text(content)
+
+    assert recover_email_reports(1) == 1, "Reports of the crashed process should be put back."
+    flush_email_reports(db)
+
+    assert db.query(EmailReport).filter_by(user_id=user.id).count() == 1, \
+        "Recovered reports should not be created twice."
+
+
+def test_oldest_reports_are_dropped_when_too_many_are_queued(
+    db: Session,
+    create_user,
+    monkeypatch,
+) -> None:
+    monkeypatch.setattr(life_constants, "EMAIL_REPORT_MAX_PENDING", 2)
+    user = create_user(is_verified=True)
+    _queue_reports(user, 3)
+
+    assert flush_email_reports(db) == 2, "Only the newest reports should be created."
+
+
+def test_queued_reports_are_encrypted(
+    db: Session,
+    create_user,
+) -> None:
+    user = create_user(is_verified=True)
+    _queue_reports(user, 1)
+
+    path, = email_report.PENDING_REPORTS_PATH.glob("*.json")
+
+    assert "outside@example.com" not in path.read_text(), \
+        "Queued reports should not contain details of the mail in plaintext."
+
+
+def test_reports_of_deleted_users_are_dropped(
+    db: Session,
+    create_user,
+) -> None:
+    user = create_user(is_verified=True)
+    deleted_user = create_user(is_verified=True)
+    _queue_reports(deleted_user, 1)
+    _queue_reports(user, 2)
+
+    db.delete(deleted_user)
+    db.commit()
+
+    assert flush_email_reports(db) == 2, "Reports of existing users should still be created."
+    assert db.query(EmailReport).filter_by(user_id=user.id).count() == 2
+    assert list(email_report.PENDING_REPORTS_PATH.rglob("*.json")) == [], \
+        "Reports that can't be created should not be retried."
@@ -0,0 +1,67 @@
+from sqlalchemy.dialects import postgresql
+
+from app.database.search import get_fuzzy_distance, matches_fuzzy
+from app.models import EmailAlias
+
+
+def _compile(clause) -> tuple[str, list]:
+    compiled = clause.compile(dialect=postgresql.dialect())
+
+    return str(compiled), list(compiled.params.values())
+
+
+def test_long_search_uses_word_similarity():
+    sql, params = _compile(matches_fuzzy(EmailAlias.local, "shopping"))
+
+    assert "%>" in sql, "Long searches should use the word similarity operator"
+    assert params == ["shopping"], "The search should be passed unchanged"
+
+
+def test_short_search_falls_back_to_ilike():
+    sql, params = _compile(matches_fuzzy(EmailAlias.local, "ab"))
+
+    assert "ILIKE" in sql, "Short searches should not use the word similarity operator"
+    assert params == ["%ab%"], "Short searches should match any local containing them"
+
+
+def test_short_search_escapes_wildcards():
+    _, params = _compile(matches_fuzzy(EmailAlias.local, "%_"))
+
+    assert params == ["%\\%\\_%"], "Wildcards in the search should be matched literally"
+
+
+def test_fuzzy_distance_is_scaled_to_an_integer():
+    sql, params = _compile(get_fuzzy_distance(EmailAlias.local, "shopping"))
+
+    assert "<->>" in sql and "AS INTEGER" in sql, "The word distance should be an integer"
+    assert params[0] == "shopping", "The search should be passed unchanged"
+
+
+def test_can_search_aliases_fuzzy(trigram_db, create_user, create_random_alias):
+    user = create_user()
+    expected = create_random_alias(user, local="shopping")
+    similar = create_random_alias(user, local="shoping.list")
+    create_random_alias(user, local="banking")
+
+    result = trigram_db \
+        .query(EmailAlias) \
+        .filter_by(user_id=user.id) \
+        .filter(matches_fuzzy(EmailAlias.local, "shopping")) \
+        .order_by(get_fuzzy_distance(EmailAlias.local, "shopping"), EmailAlias.local) \
+        .all()
+
+    assert result == [expected, similar], "Similar aliases should be found ordered by distance"
+
+
+def test_can_search_aliases_with_short_search(db, create_user, create_random_alias):
+    user = create_user()
+    expected = create_random_alias(user, local="xab")
+    create_random_alias(user, local="xyz")
+
+    result = db \
+        .query(EmailAlias) \
+        .filter_by(user_id=user.id) \
+        .filter(matches_fuzzy(EmailAlias.local, "AB")) \
+        .all()
+
+    assert result == [expected], "Short searches should match case-insensitively"
@@ -0,0 +1,89 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from email_utils.smtp_pool import SMTPConnectionPool
+
+
+class CountingHandler:
+    def __init__(self):
+        self.connections = 0
+        self.mails = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mails.append(envelope)
+        return "250 OK"
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_get_free_port())
+    controller.start()
+
+    yield controller, handler
+
+    controller.stop()
+
+
+def _create_pool(controller: Controller) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        host=controller.hostname,
+        port=controller.port,
+        size=2,
+        max_idle_time=60,
+        use_tls=False,
+    )
+
+
+def test_pool_reuses_connections(smtp_server):
+    controller, handler = smtp_server
+    pool = _create_pool(controller)
+
+    for _ in range(3):
+        pool.send(
+            from_address="sender@example.com",
+            to_address="receiver@example.com",
+            content=b"Subject: Test\r\n\r\nHello",
+        )
+
+    pool.close()
+
+    assert len(handler.mails) == 3, "Not all mails have been delivered."
+    assert handler.connections == 1, "Pool should reuse its idle connection."
+
+
+def test_pool_reconnects_after_disconnect(smtp_server):
+    controller, handler = smtp_server
+    pool = _create_pool(controller)
+
+    pool.send(
+        from_address="sender@example.com",
+        to_address="receiver@example.com",
+        content=b"Subject: Test\r\n\r\nHello",
+    )
+
+    # Simulate the server dropping the idle connection
+    smtp, _ = pool._idle_connections[0]
+    smtp.sock.close()
+
+    pool.send(
+        from_address="sender@example.com",
+        to_address="receiver@example.com",
+        content=b"Subject: Test\r\n\r\nHello again",
+    )
+    pool.close()
+
+    assert len(handler.mails) == 2, "Mail should be sent again after the server disconnected."
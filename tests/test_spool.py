@@ -0,0 +1,154 @@
+import os
+import time
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.smtp import Envelope
+
+from app import life_constants
+from email_handler import ExampleHandler
+from email_utils import spool, status
+from email_utils.utils import message_to_bytes
+
+
+def _create_envelope(to_address: str) -> Envelope:
+    message = EmailMessage()
+    message.set_content("Hello")
+
+    envelope = Envelope()
+    envelope.mail_from = "outside@example.com"
+    envelope.rcpt_tos = [to_address]
+    envelope.original_content = message_to_bytes(message)
+
+    return envelope
+
+
+def test_spooled_mail_is_counted():
+    spool.enqueue(_create_envelope("someone@example.com"))
+
+    statistics = spool.get_spool_statistics()
+
+    assert statistics.incoming_amount == 1, "Spooled mail should be waiting."
+    assert statistics.oldest_age_in_seconds >= 0
+
+
+def test_rescheduled_mail_is_not_claimed_before_its_next_attempt():
+    spool.enqueue(_create_envelope("someone@example.com"))
+
+    entry, = spool.claim_ready_entries(limit=10)
+    spool._reschedule(entry)
+
+    assert entry.attempts == 1
+    assert spool.claim_ready_entries(limit=10) == [], \
+        "Rescheduled mail should wait for its next attempt."
+    assert spool.get_spool_statistics().incoming_amount == 1
+
+
+def test_mail_fails_after_max_attempts(monkeypatch):
+    informed_addresses = []
+    monkeypatch.setattr(life_constants, "EMAIL_SPOOL_RETRY_DELAY_IN_SECONDS", 0)
+    monkeypatch.setattr(
+        spool,
+        "send_mail",
+        lambda to_mail, **kwargs: informed_addresses.append(to_mail),
+    )
+    spool.enqueue(_create_envelope("someone@example.com"))
+
+    for _ in range(life_constants.EMAIL_SPOOL_MAX_ATTEMPTS):
+        entry, = spool.claim_ready_entries(limit=10)
+        spool._reschedule(entry)
+
+    statistics = spool.get_spool_statistics()
+
+    assert statistics.incoming_amount == 0
+    assert statistics.failed_amount == 1, "Mail should be given up on after max attempts."
+    assert informed_addresses == ["outside@example.com"], \
+        "Sender should be informed once the mail has been given up on."
+
+
+def test_interrupted_mail_is_recovered():
+    spool.enqueue(_create_envelope("someone@example.com"))
+    spool.claim_ready_entries(limit=10)
+
+    assert spool.recover() == 1
+    assert len(spool.claim_ready_entries(limit=10)) == 1
+
+
+def test_only_mails_of_the_given_process_are_recovered(spool_path):
+    spool.enqueue(_create_envelope("someone@example.com"))
+    spool.claim_ready_entries(limit=10)
+
+    assert spool.recover(os.getpid() + 1) == 0, "Mails of other processes should be kept."
+    assert spool.recover(os.getpid()) == 1
+
+
+@pytest.mark.asyncio
+async def test_spooled_mail_is_handled(
+    create_user,
+    create_random_alias,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    accepted_at = time.time()
+    spool.enqueue(_create_envelope(alias.address))
+
+    entry, = spool.claim_ready_entries(limit=10)
+    assert entry.accepted_at >= accepted_at
+
+    await spool.process_entry(entry)
+
+    statistics = spool.get_spool_statistics()
+
+    assert statistics.processing_amount == 0
+    assert statistics.incoming_amount == 0, "Handled mail should be removed from the spool."
+
+
+def test_spooled_mail_keeps_its_content():
+    envelope = _create_envelope("someone@example.com")
+    spool.enqueue(envelope)
+
+    entry, = spool.claim_ready_entries(limit=10)
+
+    assert entry.content == envelope.original_content, "Mail should be spooled unchanged."
+    assert entry.rcpt_tos == envelope.rcpt_tos
+
+
+def test_unreadable_entry_is_moved_to_failed(spool_path):
+    spool.enqueue(_create_envelope("someone@example.com"))
+    # Left behind by a crash while writing
+    (spool_path / spool.INCOMING / f"{0:015d}-empty{spool.ENTRY_SUFFIX}").touch()
+
+    entries = spool.claim_ready_entries(limit=10)
+
+    assert [entry.rcpt_tos for entry in entries] == [["someone@example.com"]], \
+        "Readable entries should still be claimed."
+    assert spool.get_spool_statistics().failed_amount == 1, \
+        "Unreadable entries should be moved to failed."
+
+
+@pytest.mark.asyncio
+async def test_mail_to_unknown_recipient_is_rejected(db):
+    response = await ExampleHandler().handle_DATA(
+        None,
+        None,
+        _create_envelope("does-not-exist@example.com"),
+    )
+
+    assert response.startswith("5"), "Unknown recipients should be rejected right away."
+    assert spool.get_spool_statistics().incoming_amount == 0, \
+        "Mails to unknown recipients should not be spooled."
+
+
+@pytest.mark.asyncio
+async def test_mail_to_alias_is_spooled(
+    create_user,
+    create_random_alias,
+):
+    user = create_user(is_verified=True)
+    alias = create_random_alias(user=user)
+
+    response = await ExampleHandler().handle_DATA(None, None, _create_envelope(alias.address))
+
+    assert response == status.E200
+    assert spool.get_spool_statistics().incoming_amount == 1
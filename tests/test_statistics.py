@@ -6,6 +6,7 @@ from aiosmtpd.smtp import Envelope
 
 from app import constants
 from app.constants import ROOT_DIR
+from app.controllers import server_statistics
 from email_utils import headers
 from email_utils.handler import handle
 
@@ -36,6 +37,8 @@ async def test_can_create_statistics(
         envelope=envelope,
         message=message,
     )
+    # The email handler flushes its statistics periodically
+    server_statistics.flush(db)
 
     new_statistics = client.get("/v1/server/statistics").json()
 
@@ -51,3 +54,22 @@ async def test_can_create_statistics(
         "aliases amount should have changed"
     assert previous_statistics["app_version"] == constants.APP_VERSION, \
         "app version should not have changed"
+
+
+def test_statistics_are_buffered_until_flushed(
+    db,
+):
+    previous_amount = server_statistics.get_server_statistics(db).sent_emails_amount
+
+    server_statistics.add_sent_email(db)
+    server_statistics.add_sent_email(db)
+
+    db.expire_all()
+    assert server_statistics.get_server_statistics(db).sent_emails_amount == previous_amount, \
+        "Statistics should be buffered until they are flushed."
+
+    server_statistics.flush(db)
+
+    db.expire_all()
+    assert server_statistics.get_server_statistics(db).sent_emails_amount == \
+           previous_amount + 2, "Flush should write all buffered statistics."
@@ -0,0 +1,113 @@
+import os
+import smtplib
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import email_handler
+from email_utils import spool
+from tests.test_spool import _create_envelope
+
+
+class _FakeProcess:
+    def __init__(self, pid: int, is_alive: bool):
+        self.pid = pid
+        self.exitcode = None if is_alive else 1
+        self._is_alive = is_alive
+
+    def is_alive(self) -> bool:
+        return self._is_alive
+
+    def terminate(self) -> None:
+        self._is_alive = False
+
+    def kill(self) -> None:
+        self._is_alive = False
+
+    def join(self, timeout=None) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def heartbeat_interval(monkeypatch):
+    monkeypatch.setattr(email_handler, "HEARTBEAT_INTERVAL_IN_SECONDS", 0.01)
+
+
+def test_dead_worker_is_restarted_and_its_mails_are_recovered(monkeypatch):
+    stop_event = threading.Event()
+    incoming_amounts_on_restart = []
+    started_processes = []
+
+    # The entry is claimed by this process, which plays the worker that dies
+    spool.enqueue(_create_envelope("someone@example.com"))
+    spool.claim_ready_entries(limit=10)
+
+    def _start_worker(context):
+        if started_processes:
+            incoming_amounts_on_restart.append(spool.get_spool_statistics().incoming_amount)
+            stop_event.set()
+            process = _FakeProcess(pid=os.getpid() + 1, is_alive=True)
+        else:
+            process = _FakeProcess(pid=os.getpid(), is_alive=False)
+
+        started_processes.append(process)
+
+        return process, SimpleNamespace(value=time.time())
+
+    monkeypatch.setattr(email_handler, "_start_worker", _start_worker)
+
+    email_handler.supervise(1, stop_event)
+
+    assert len(started_processes) == 2, "Dead worker should be restarted."
+    assert incoming_amounts_on_restart == [1], \
+        "Mails of the dead worker should be recovered before it is restarted."
+
+
+def test_unresponsive_worker_is_killed_and_restarted(monkeypatch):
+    stop_event = threading.Event()
+    started_processes = []
+
+    def _start_worker(context):
+        if started_processes:
+            stop_event.set()
+
+        process = _FakeProcess(pid=os.getpid() + len(started_processes), is_alive=True)
+        started_processes.append(process)
+
+        # The first worker never sends a heartbeat
+        return process, SimpleNamespace(value=time.time() - 3600)
+
+    monkeypatch.setattr(email_handler, "_start_worker", _start_worker)
+
+    email_handler.supervise(1, stop_event)
+
+    assert len(started_processes) == 2, "Unresponsive worker should be restarted."
+    assert not started_processes[0].is_alive(), "Unresponsive worker should be killed."
+
+
+def test_controllers_can_share_the_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    controllers = [
+        email_handler.ReusePortController(
+            email_handler.ExampleHandler(),
+            hostname="127.0.0.1",
+            port=port,
+        )
+        for _ in range(2)
+    ]
+
+    try:
+        for controller in controllers:
+            controller.start()
+
+        with smtplib.SMTP("127.0.0.1", port) as client:
+            assert client.noop()[0] == 250, "Shared port should accept connections."
+    finally:
+        for controller in controllers:
+            controller.stop(no_assert=True)
@@ -30,3 +30,19 @@ def test_returns_none_if_no_trackers_available():
     )
 
     assert result is None, "Result should be None"
+
+
+def test_returns_first_tracker_in_list_order():
+    # `/track/open` is a generic regex pattern of a later tracker, but the domain matches an
+    # earlier one
+    result = trackers_handler.check_is_url_a_tracker("https://trk.365offers.trade/track/open")
+
+    assert result is not None, "Result should be a dict"
+    assert result["name"] == "365offers"
+
+
+def test_returns_correct_url_shortener_for_domain():
+    result = trackers_handler.check_is_a_url_shortener("https://ppt.cc/abc")
+
+    assert result is not None, "Result should be a dict"
+    assert result["name"] == "PPT.cc"
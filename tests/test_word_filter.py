@@ -0,0 +1,23 @@
+from app.utils.word_filter import WordFilter
+
+
+def test_finds_words_anywhere_in_value():
+    word_filter = WordFilter(["apple", "Banana", "pear"], min_length=4)
+
+    assert word_filter.matches("x9APPLEz")
+    assert word_filter.matches("bananas")
+    assert word_filter.matches("spear")
+    assert not word_filter.matches("appl3pea"), "Partial words should not match."
+
+
+def test_finds_words_overlapping_other_prefixes():
+    word_filter = WordFilter(["abcd", "bcx"], min_length=3)
+
+    assert word_filter.matches("abcx"), "Word starting inside another prefix should match."
+
+
+def test_ignores_short_and_non_alphabetic_words():
+    word_filter = WordFilter(["cat", "don't", "café"], min_length=4)
+
+    assert not word_filter.matches("concatenate")
+    assert not word_filter.matches("dontcafe")